@@ -1,27 +1,11 @@
 # config.py
 import argparse
-import math
 
-# Heuristic functions
-def manhattan(a, b): return abs(a[0]-b[0]) + abs(a[1]-b[1])
-def euclidean(a, b): return math.hypot(a[0]-b[0], a[1]-b[1])
-def octile(a, b):
-    dx, dy = abs(a[0]-b[0]), abs(a[1]-b[1])
-    return (math.sqrt(2)-1) * min(dx, dy) + max(dx, dy)
-def chebyshev(a, b): return max(abs(a[0]-b[0]), abs(a[1]-b[1]))
+# Heuristics live in core.heuristics; re-exported here for the UI and CLI.
+from core.heuristics import HEURISTICS, HEURISTIC_FUNCS
 
-# Heuristic names for UI
-HEURISTICS = ["Manhattan", "Euclidean", "Octile", "Chebyshev"]
-
-# Heuristic function map (for runtime use)
-HEURISTIC_FUNCS = {
-    "Manhattan": manhattan,
-    "Euclidean": euclidean,
-    "Octile": octile,
-    "Chebyshev": chebyshev
-}
-
-ALGORITHMS = ["A*", "Dijkstra", "Greedy Best-First"]
+ALGORITHMS = ["A*", "Dijkstra", "Greedy Best-First", "Jump Point Search",
+              "Bidirectional A*", "Bidirectional Dijkstra", "HPA*", "Space-Time A*"]
 
 def parse_args():
     p = argparse.ArgumentParser()
@@ -30,4 +14,8 @@ def parse_args():
     p.add_argument("--no-diagonal", action="store_true")
     p.add_argument("--allow-corner-cut", action="store_true")
     p.add_argument("--interval", type=int, default=50)
+    p.add_argument("--renderer", default="canvas", choices=["canvas", "bitmap"],
+                   help="bitmap rasterizes into image tiles with zoom, for very large grids")
+    p.add_argument("--no-warm-cache", action="store_true",
+                   help="don't preload stored paths, components and fields when a map is loaded")
     return p.parse_args()
\ No newline at end of file
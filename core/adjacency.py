@@ -0,0 +1,72 @@
+# core/adjacency.py
+from array import array
+import numpy as np
+from core.moves import is_open, legal_moves, moves_for
+from core.wavefront import cost_array
+
+# Per-cell outgoing moves in flat arrays, indexed by r*cols+c: cell i's moves are slots
+# i*stride .. i*stride + degree[i] - 1 of targets (cell index) and costs (step cost). A
+# fixed stride (4 or 8 slots per cell) wastes a few slots on walls and edges but lets an
+# edit rewrite a cell's moves in place. Built once per grid and movement rules with NumPy;
+# patch() refreshes only the 3x3 block whose moves can depend on an edited cell (as
+# target or as a corner-cutting blocker).
+class Adjacency:
+    def __init__(self, grid, allow_diagonal=True, prevent_corner_cutting=True):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows else 0
+        self.allow_diagonal = allow_diagonal
+        self.prevent_corner_cutting = prevent_corner_cutting
+        self.stride = 8 if allow_diagonal else 4
+        self.rebuild()
+
+    def matches(self, grid, allow_diagonal, prevent_corner_cutting):
+        return (self.grid is grid and self.allow_diagonal == allow_diagonal
+                and self.prevent_corner_cutting == prevent_corner_cutting)
+
+    def rebuild(self):
+        rows, cols, stride = self.rows, self.cols, self.stride
+        cost = np.zeros((rows + 2, cols + 2))
+        cost[1:-1, 1:-1] = cost_array(self.grid) if rows and cols else 0.0
+        open_ = cost > 0
+        inner = (slice(1, rows + 1), slice(1, cols + 1))
+        index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+        degree = np.zeros((rows, cols), dtype=np.uint8)
+        targets = np.zeros((rows, cols, stride), dtype=np.int32)
+        costs = np.zeros((rows, cols, stride))
+        for dr, dc, mult in moves_for(self.allow_diagonal):
+            near = (slice(1 + dr, rows + 1 + dr), slice(1 + dc, cols + 1 + dc))
+            move = open_[inner] & open_[near]
+            if dr and dc and self.prevent_corner_cutting:
+                move &= open_[1 + dr:rows + 1 + dr, 1:cols + 1] & open_[1:rows + 1, 1 + dc:cols + 1 + dc]
+            # Every cell writes its next free slot; only cells with the move claim it.
+            slot = degree[..., None]
+            np.put_along_axis(targets, slot, (index + (dr * cols + dc))[..., None], axis=2)
+            np.put_along_axis(costs, slot, (mult * cost[near])[..., None], axis=2)
+            degree += move
+        self.degree = array('B', degree.tobytes())
+        self.targets = array('i', targets.tobytes())
+        self.costs = array('d', costs.tobytes())
+
+    def links(self, i):
+        # (target index, step cost) pairs of cell i's moves.
+        base = i * self.stride
+        end = base + self.degree[i]
+        return zip(self.targets[base:end], self.costs[base:end])
+
+    def patch(self, r, c):
+        for nr in range(max(0, r - 1), min(self.rows, r + 2)):
+            for nc in range(max(0, c - 1), min(self.cols, c + 2)):
+                i = nr * self.cols + nc
+                base = i * self.stride
+                out = self._cell_links(nr, nc)
+                self.degree[i] = len(out)
+                for k, (j, step) in enumerate(out, base):
+                    self.targets[k] = j
+                    self.costs[k] = step
+
+    def _cell_links(self, r, c):
+        grid, cols = self.grid, self.cols
+        if not is_open(grid, r, c): return ()
+        return [(nr * cols + nc, mult * grid[nr][nc])
+                for nr, nc, mult in legal_moves(grid, r, c, self.allow_diagonal, self.prevent_corner_cutting)]
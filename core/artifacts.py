@@ -0,0 +1,42 @@
+# core/artifacts.py
+import json
+import struct
+import zlib
+import numpy as np
+
+# Derived data worth keeping with a stored map: solved paths with their search stats,
+# connected-component labels and goal distance fields. Each artifact is keyed by its
+# kind and a canonical JSON of the parameters it was computed with, and encoded into a
+# compact zlib-compressed blob; MapDatabase files them under the map id and grid digest.
+PATH = 'path'              # params: start, goal, algo, heuristic, weight, allow_diagonal, prevent_corner_cutting
+COMPONENTS = 'components'  # params: allow_diagonal, prevent_corner_cutting
+FIELD = 'field'            # params: goal, allow_diagonal, prevent_corner_cutting
+
+PATH_HEADER = struct.Struct('<dII')  # cost, expansions, path length
+ARRAY_HEADER = struct.Struct('<4sII')  # dtype, rows, cols
+
+def params_key(**params):
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+def encode_path(path, cost, expansions=0):
+    cells = np.asarray(path, dtype='<i4').reshape(-1)
+    return zlib.compress(PATH_HEADER.pack(cost, expansions, len(path)) + cells.tobytes())
+
+def decode_path(blob):
+    # Returns (path, cost, expansions); an empty path records "known unreachable".
+    data = zlib.decompress(blob)
+    cost, expansions, n = PATH_HEADER.unpack_from(data)
+    cells = np.frombuffer(data, dtype='<i4', count=2 * n, offset=PATH_HEADER.size).reshape(n, 2)
+    return [tuple(cell) for cell in cells.tolist()], cost, expansions
+
+def encode_array(array, dtype):
+    # dtype narrows the stored copy ('<i4' labels, '<f4' fields, which are display data).
+    array = np.asarray(array, dtype=dtype)
+    rows, cols = array.shape
+    return zlib.compress(ARRAY_HEADER.pack(array.dtype.str.encode(), rows, cols) + array.tobytes())
+
+def decode_array(blob):
+    data = zlib.decompress(blob)
+    dtype, rows, cols = ARRAY_HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=dtype.rstrip(b'\0').decode(), count=rows * cols,
+                         offset=ARRAY_HEADER.size).reshape(rows, cols)
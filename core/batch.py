@@ -0,0 +1,110 @@
+# core/batch.py
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from core.adjacency import Adjacency
+from core.engine import PathfindingEngine, SearchResult
+from core.hpa import HierarchicalPlanner
+
+# Per-process solver state, set up once by _init_worker.
+_worker = {}
+
+def publish_grid(grid):
+    # Copy the grid once into a shared-memory block of float64s, row-major.
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    flat = array('d', (v for row in grid for v in row))
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(flat) * flat.itemsize))
+    shm.buf[:len(flat) * flat.itemsize] = flat.tobytes()
+    return shm, rows, cols
+
+def attach_grid(name, rows, cols):
+    # Zero-copy view: each row is a memoryview slice into the shared block.
+    shm = shared_memory.SharedMemory(name=name)
+    flat = shm.buf[:rows * cols * 8].cast('d')
+    return shm, [flat[r * cols:(r + 1) * cols] for r in range(rows)]
+
+def _init_worker(name, rows, cols, params):
+    shm, grid = attach_grid(name, rows, cols)
+    _worker['shm'] = shm
+    _worker['grid'] = grid
+    _worker['params'] = params
+    _worker['solver'] = None
+
+def _solver():
+    if _worker['solver'] is None:
+        grid, params = _worker['grid'], dict(_worker['params'])
+        if params['algo'] == "HPA*":
+            _worker['solver'] = HierarchicalPlanner(grid, allow_diagonal=params['allow_diagonal'],
+                                                    prevent_corner_cutting=params['prevent_corner_cutting'])
+        else:
+            params['adjacency'] = Adjacency(grid, params['allow_diagonal'], params['prevent_corner_cutting'])
+            _worker['solver'] = PathfindingEngine(grid, **params)
+    return _worker['solver']
+
+def _solve_chunk(chunk):
+    solver = _solver()
+    out = []
+    for index, start, goal in chunk:
+        try:
+            res = solver.solve(start, goal)
+            out.append((index, res.path, res.cost, res.expansions))
+        except ValueError:
+            out.append((index, [], float('inf'), 0))
+    return out
+
+def _solve_many(index, source, targets):
+    try:
+        results = _solver().solve_many(source, targets)
+    except ValueError:
+        return index, {t: ([], float('inf')) for t in targets}
+    return index, {t: (res.path, res.cost) for t, res in results.items()}
+
+def solve_many_batch(grid, sources, targets, allow_diagonal=True, prevent_corner_cutting=True, workers=None):
+    # One one-to-many Dijkstra per source, in parallel. Yields (source index, {target: (path, cost)})
+    # in completion order.
+    sources = [tuple(s) for s in sources]
+    targets = [tuple(t) for t in targets]
+    if not sources: return
+    params = {'algo': "Dijkstra", 'heuristic': "Octile", 'weight': 1.0,
+              'allow_diagonal': allow_diagonal, 'prevent_corner_cutting': prevent_corner_cutting}
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+    shm, rows, cols = publish_grid(grid)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(shm.name, rows, cols, params))
+    try:
+        futures = [pool.submit(_solve_many, i, s, targets) for i, s in enumerate(sources)]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # A consumer that stops early (cancelled) drops the sources not yet started.
+        pool.shutdown(cancel_futures=True)
+        shm.close()
+        shm.unlink()
+
+def solve_batch(grid, queries, algo="A*", heuristic="Octile", weight=1.0, allow_diagonal=True,
+                prevent_corner_cutting=True, workers=None, chunk_size=16):
+    # Fan (start, goal) queries out over a process pool and yield (query index, SearchResult)
+    # in completion order. The grid is shared once via shared memory; only query tuples and
+    # paths cross process boundaries.
+    queries = list(queries)
+    if not queries: return
+    params = {'algo': algo, 'heuristic': heuristic, 'weight': weight,
+              'allow_diagonal': allow_diagonal, 'prevent_corner_cutting': prevent_corner_cutting}
+    workers = workers or os.cpu_count() or 1
+    shm, rows, cols = publish_grid(grid)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, rows, cols, params)) as pool:
+            chunks = [[(i, tuple(s), tuple(g)) for i, (s, g) in enumerate(queries[k:k + chunk_size], k)]
+                      for k in range(0, len(queries), chunk_size)]
+            futures = [pool.submit(_solve_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                for index, path, cost, expansions in future.result():
+                    result = SearchResult()
+                    result.path, result.cost, result.expansions = path, cost, expansions
+                    yield index, result
+    finally:
+        shm.close()
+        shm.unlink()
@@ -1,64 +1,249 @@
 # core/database.py
 import sqlite3
 import json
+import threading
+from core.grid_codec import encode_grid, decode_grid
+from core.landmarks import LandmarkSet
+
+TAG_SEP = '\x1f'  # joins a map's tags in catalog rows; never typed into a tag
+
+# Catalog orderings: the columns a page is sorted on (all descending, id last so the
+# order is total) for keyset pagination.
+ORDERS = {
+    "created": ("created", "id"),
+    "rating": ("rating", "created", "id"),
+}
 
 class MapDatabase:
+    # PRAGMA user_version: 1 = grids stored as core.grid_codec blobs,
+    # 2 = tags normalized into map_tags, 3 = derived artifacts table.
+    SCHEMA_VERSION = 3
+
     def __init__(self, db_path="astar_maps.db"):
         self.db_path = db_path
+        # One connection for the life of the object; sqlite3 keeps its prepared
+        # statements cached. The lock serializes use from more than one thread.
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=128)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
         self.init_db()
 
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
     def init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS maps (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    rows INTEGER,
-                    cols INTEGER,
-                    grid TEXT,
-                    start TEXT,
-                    goal TEXT,
-                    waypoints TEXT,
-                    tags TEXT,
-                    rating INTEGER DEFAULT 0,
-                    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.commit()
+        with self.lock:
+            with self.conn as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS maps (
+                        id INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        rows INTEGER,
+                        cols INTEGER,
+                        grid BLOB,
+                        start TEXT,
+                        goal TEXT,
+                        waypoints TEXT,
+                        tags TEXT,
+                        rating INTEGER DEFAULT 0,
+                        created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS map_tags (
+                        tag TEXT NOT NULL,
+                        map_id INTEGER NOT NULL REFERENCES maps(id) ON DELETE CASCADE,
+                        PRIMARY KEY (tag, map_id)
+                    ) WITHOUT ROWID
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS map_tags_map ON map_tags(map_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS maps_created ON maps(created DESC, id DESC)")
+                conn.execute("CREATE INDEX IF NOT EXISTS maps_rating ON maps(rating DESC, created DESC, id DESC)")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS landmarks (
+                        map_id INTEGER NOT NULL REFERENCES maps(id) ON DELETE CASCADE,
+                        cells TEXT,
+                        rows INTEGER,
+                        cols INTEGER,
+                        allow_diagonal INTEGER,
+                        prevent_corner_cutting INTEGER,
+                        min_cost REAL,
+                        digest TEXT,
+                        forward BLOB,
+                        backward BLOB,
+                        PRIMARY KEY (map_id, allow_diagonal, prevent_corner_cutting)
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS artifacts (
+                        map_id INTEGER NOT NULL REFERENCES maps(id) ON DELETE CASCADE,
+                        digest TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        params TEXT NOT NULL,
+                        data BLOB,
+                        created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (map_id, digest, kind, params)
+                    ) WITHOUT ROWID
+                """)
+                migrated = self.migrate(conn)
+            if migrated:
+                self.conn.execute("VACUUM")
+
+    def migrate(self, conn):
+        # Brings an older database up to SCHEMA_VERSION; returns True if rows were rewritten.
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        migrated = False
+        if version < 1:
+            # Grids were JSON text of nested float lists; re-encode them one map at a time.
+            ids = [row[0] for row in conn.execute("SELECT id FROM maps WHERE typeof(grid) = 'text'")]
+            for map_id in ids:
+                (grid,) = conn.execute("SELECT grid FROM maps WHERE id = ?", (map_id,)).fetchone()
+                conn.execute("UPDATE maps SET grid = ? WHERE id = ?", (encode_grid(json.loads(grid)), map_id))
+            migrated = bool(ids)
+        if version < 2:
+            # Tags were a JSON list per map; move them into map_tags.
+            rows = conn.execute("SELECT id, tags FROM maps WHERE tags IS NOT NULL").fetchall()
+            conn.executemany("INSERT OR IGNORE INTO map_tags (tag, map_id) VALUES (?, ?)",
+                             [(tag, map_id) for map_id, tags in rows for tag in _clean_tags(json.loads(tags))])
+            conn.execute("UPDATE maps SET tags = NULL")
+            migrated = migrated or bool(rows)
+        if version < self.SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        return migrated
 
     def save_map(self, name, rows, cols, grid, start, goal, waypoints=None, tags="", rating=0):
-        grid_str = json.dumps(grid)
+        grid_blob = encode_grid(grid)
         start_str = json.dumps(start)
         goal_str = json.dumps(goal)
         waypoints_str = json.dumps(waypoints or [])
-        tags_str = json.dumps([tag.strip() for tag in tags.split(',')] if tags else [])
-        with sqlite3.connect(self.db_path) as conn:
+        tag_list = _clean_tags(tags.split(',') if tags else [])
+        with self.lock, self.conn as conn:
+            cursor = conn.execute("""
+                INSERT INTO maps (name, rows, cols, grid, start, goal, waypoints, rating)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (name, rows, cols, grid_blob, start_str, goal_str, waypoints_str, rating))
+            map_id = cursor.lastrowid
+            conn.executemany("INSERT OR IGNORE INTO map_tags (tag, map_id) VALUES (?, ?)",
+                             [(tag, map_id) for tag in tag_list])
+            return map_id
+
+    def save_landmarks(self, map_id, landmarks):
+        # One landmark set per map and movement rules; a rebuilt set replaces the old one.
+        with self.lock, self.conn as conn:
             conn.execute("""
-                INSERT INTO maps (name, rows, cols, grid, start, goal, waypoints, tags, rating)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (name, rows, cols, grid_str, start_str, goal_str, waypoints_str, tags_str, rating))
-            conn.commit()
+                INSERT OR REPLACE INTO landmarks (map_id, cells, rows, cols, allow_diagonal,
+                    prevent_corner_cutting, min_cost, digest, forward, backward)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (map_id,) + landmarks.to_row())
 
-    def load_maps(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT id, name, tags, rating FROM maps ORDER BY created DESC")
-            return cursor.fetchall()
+    def load_landmarks(self, map_id, allow_diagonal, prevent_corner_cutting):
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT cells, rows, cols, allow_diagonal, prevent_corner_cutting, min_cost, digest, forward, backward
+                FROM landmarks WHERE map_id = ? AND allow_diagonal = ? AND prevent_corner_cutting = ?
+            """, (map_id, int(allow_diagonal), int(prevent_corner_cutting))).fetchone()
+        return LandmarkSet.from_row(row) if row else None
+
+    def save_artifact(self, map_id, digest, kind, params, data):
+        # Derived data (see core.artifacts) for a map's grid as it was when computed;
+        # anything filed under another digest of the same map is stale and goes.
+        with self.lock, self.conn as conn:
+            conn.execute("DELETE FROM artifacts WHERE map_id = ? AND digest != ?", (map_id, digest))
+            conn.execute("""
+                INSERT OR REPLACE INTO artifacts (map_id, digest, kind, params, data) VALUES (?, ?, ?, ?, ?)
+            """, (map_id, digest, kind, params, data))
+
+    def load_artifacts(self, map_id, digest, kind=None):
+        # [(kind, params dict, data)] stored for this map and grid digest.
+        sql = "SELECT kind, params, data FROM artifacts WHERE map_id = ? AND digest = ?"
+        args = (map_id, digest)
+        if kind is not None:
+            sql += " AND kind = ?"
+            args += (kind,)
+        with self.lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        return [(kind, json.loads(params), data) for kind, params, data in rows]
+
+    def query_maps(self, tag=None, min_rating=0, name=None, order="created", limit=50, after=None):
+        # One page of the catalog, newest (or best rated) first, as
+        # (id, name, tags, rating, created) rows with tags a list. Filters: an exact tag,
+        # a minimum rating and a name substring. Pages are keyset-paginated: pass the
+        # cursor() of the previous page's last row as `after`, which stays fast however
+        # deep the page is.
+        columns = ORDERS[order]
+        where, params = [], []
+        if tag:
+            # Probed per row along the order's index, so the page stops after `limit` hits.
+            where.append("EXISTS (SELECT 1 FROM map_tags WHERE tag = ? AND map_id = maps.id)")
+            params.append(tag.strip())
+        if min_rating:
+            where.append("rating >= ?")
+            params.append(min_rating)
+        if name:
+            where.append("name LIKE ? ESCAPE '\\'")
+            params.append('%' + name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if after is not None:
+            where.append(f"({', '.join(columns)}) < ({', '.join('?' * len(columns))})")
+            params.extend(after)
+        sql = f"""
+            SELECT id, name,
+                   (SELECT group_concat(tag, '{TAG_SEP}') FROM map_tags WHERE map_id = maps.id),
+                   rating, created
+            FROM maps {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY {', '.join(c + ' DESC' for c in columns)}
+            LIMIT ?
+        """
+        with self.lock:
+            rows = self.conn.execute(sql, params + [limit]).fetchall()
+        return [(map_id, name, sorted(tags.split(TAG_SEP)) if tags else [], rating, created)
+                for map_id, name, tags, rating, created in rows]
+
+    @staticmethod
+    def cursor(row, order="created"):
+        # Keyset cursor of a query_maps row, for the `after` of the next page.
+        map_id, _, _, rating, created = row
+        values = {"id": map_id, "rating": rating, "created": created}
+        return tuple(values[c] for c in ORDERS[order])
+
+    def count_maps(self, tag=None, min_rating=0):
+        where, params = [], []
+        if tag:
+            where.append("id IN (SELECT map_id FROM map_tags WHERE tag = ?)")
+            params.append(tag.strip())
+        if min_rating:
+            where.append("rating >= ?")
+            params.append(min_rating)
+        with self.lock:
+            return self.conn.execute(f"SELECT count(*) FROM maps {'WHERE ' + ' AND '.join(where) if where else ''}",
+                                     params).fetchone()[0]
+
+    def list_tags(self):
+        with self.lock:
+            return [tag for (tag,) in self.conn.execute("SELECT DISTINCT tag FROM map_tags ORDER BY tag")]
 
     def get_map_by_id(self, map_id):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT * FROM maps WHERE id = ?", (map_id,))
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "id": row[0],
-                    "name": row[1],
-                    "rows": row[2],
-                    "cols": row[3],
-                    "grid": json.loads(row[4]),
-                    "start": tuple(json.loads(row[5])),
-                    "goal": tuple(json.loads(row[6])),
-                    "waypoints": json.loads(row[7]),
-                    "tags": json.loads(row[8]),
-                    "rating": row[9]
-                }
-        return None
\ No newline at end of file
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT id, name, rows, cols, grid, start, goal, waypoints, rating FROM maps WHERE id = ?
+            """, (map_id,)).fetchone()
+            if not row:
+                return None
+            tags = [tag for (tag,) in self.conn.execute("SELECT tag FROM map_tags WHERE map_id = ? ORDER BY tag", (map_id,))]
+        return {
+            "id": row[0],
+            "name": row[1],
+            "rows": row[2],
+            "cols": row[3],
+            "grid": decode_grid(row[4]),
+            "start": tuple(json.loads(row[5])),
+            "goal": tuple(json.loads(row[6])),
+            "waypoints": [tuple(w) for w in json.loads(row[7])],
+            "tags": tags,
+            "rating": row[8]
+        }
+
+def _clean_tags(tags):
+    return sorted({tag.strip() for tag in tags if tag.strip()})
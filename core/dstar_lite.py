@@ -0,0 +1,145 @@
+# core/dstar_lite.py
+import heapq
+from core.heuristics import manhattan, octile
+from core.moves import is_open, legal_moves
+
+INF = float('inf')
+EPS = 1e-9  # relative tolerance on keys; sums reached along different paths differ in the last bits
+
+# D* Lite (Koenig & Likhachev): searches backward from the goal and keeps g/rhs values
+# between calls, so when cells change only the affected part of the search is repaired.
+# g[i] is the cost from cell i to the goal; a move u -> v costs step * grid[v].
+class DStarLite:
+    def __init__(self, grid, start, goal, allow_diagonal=True, prevent_corner_cutting=True):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows else 0
+        self.allow_diagonal = allow_diagonal
+        self.prevent_corner_cutting = prevent_corner_cutting
+        self.distance = octile if allow_diagonal else manhattan
+        self.start = start
+        self.goal = goal
+        size = self.rows * self.cols
+        self.g = [INF] * size
+        self.rhs = [INF] * size
+        self.km = 0.0
+        self.queue = []
+        self.queued = {}  # index -> key currently valid in the heap
+        self.expansions = 0
+        t = goal[0] * self.cols + goal[1]
+        self.rhs[t] = 0.0
+        self._push(t)
+
+    def open(self, r, c):
+        return is_open(self.grid, r, c)
+
+    def heuristic(self, i):
+        return self.distance(divmod(i, self.cols), self.start)
+
+    def moves(self, i):
+        # (neighbor, step multiplier) pairs; the relation is symmetric so it serves as
+        # both successors and predecessors.
+        cols = self.cols
+        r, c = divmod(i, cols)
+        if not self.open(r, c): return
+        for nr, nc, mult in legal_moves(self.grid, r, c, self.allow_diagonal, self.prevent_corner_cutting):
+            yield nr * cols + nc, mult
+
+    def _key(self, i):
+        m = min(self.g[i], self.rhs[i])
+        return (m + self.heuristic(i) + self.km, m)
+
+    def _push(self, i):
+        key = self._key(i)
+        self.queued[i] = key
+        heapq.heappush(self.queue, (key, i))
+
+    def _top(self):
+        while self.queue and self.queued.get(self.queue[0][1]) != self.queue[0][0]:
+            heapq.heappop(self.queue)
+        return self.queue[0] if self.queue else None
+
+    def _update_vertex(self, i):
+        cols = self.cols
+        if i != self.goal[0] * cols + self.goal[1]:
+            best = INF
+            g, grid = self.g, self.grid
+            for j, mult in self.moves(i):
+                jr, jc = divmod(j, cols)
+                cand = mult * grid[jr][jc] + g[j]
+                if cand < best: best = cand
+            self.rhs[i] = best
+        self.queued.pop(i, None)
+        if self.g[i] != self.rhs[i]:
+            self._push(i)
+
+    def compute(self):
+        s = self.start[0] * self.cols + self.start[1]
+        g, rhs = self.g, self.rhs
+        while True:
+            top = self._top()
+            if top is None: break
+            if not _not_after(top[0], self._key(s)) and rhs[s] == g[s]: break
+            k_old, u = heapq.heappop(self.queue)
+            del self.queued[u]
+            self.expansions += 1
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u)
+            elif g[u] > rhs[u]:
+                g[u] = rhs[u]
+                for j, _ in self.moves(u):
+                    self._update_vertex(j)
+            else:
+                g[u] = INF
+                self._update_vertex(u)
+                for j, _ in self.moves(u):
+                    self._update_vertex(j)
+        return self.path()
+
+    def move_start(self, start):
+        s = start[0] * self.cols + start[1]
+        self.km += self.heuristic(s)
+        self.start = start
+
+    def update_cells(self, cells):
+        # A changed cell alters the moves of every cell in its 3x3 block (entering it,
+        # leaving it, or cutting its corner), so those vertices are re-evaluated.
+        touched = set()
+        for r, c in cells:
+            for nr in range(max(0, r - 1), min(self.rows, r + 2)):
+                for nc in range(max(0, c - 1), min(self.cols, c + 2)):
+                    touched.add(nr * self.cols + nc)
+        for i in touched:
+            self._update_vertex(i)
+        return self.compute()
+
+    def cost(self):
+        return self.g[self.start[0] * self.cols + self.start[1]]
+
+    def path(self):
+        cols = self.cols
+        i = self.start[0] * cols + self.start[1]
+        t = self.goal[0] * cols + self.goal[1]
+        if self.g[i] == INF and self.rhs[i] == INF: return []
+        path = [self.start]
+        seen = {i}
+        while i != t:
+            best, nxt = INF, -1
+            for j, mult in self.moves(i):
+                jr, jc = divmod(j, cols)
+                cand = mult * self.grid[jr][jc] + self.g[j]
+                if cand < best: best, nxt = cand, j
+            if nxt < 0 or best == INF or nxt in seen: return []
+            seen.add(nxt)
+            path.append(divmod(nxt, cols))
+            i = nxt
+        return path
+
+def _not_after(a, b):
+    # a <= b on (k1, k2) keys, with near-ties counted as ties so compute() expands them
+    # rather than stopping one ulp short.
+    tol = EPS * max(1.0, abs(b[0]))
+    if a[0] < b[0] - tol: return True
+    if a[0] > b[0] + tol: return False
+    return a[1] <= b[1] + EPS * max(1.0, abs(b[1]))
@@ -1,127 +1,412 @@
 # core/engine.py
-import math
 import heapq
-from config import HEURISTICS
-
-def manhattan(a, b): return abs(a[0]-b[0]) + abs(a[1]-b[1])
-def euclidean(a, b): return math.hypot(a[0]-b[0], a[1]-b[1])
-def octile(a, b):
-    dx, dy = abs(a[0]-b[0]), abs(a[1]-b[1])
-    return (math.sqrt(2)-1) * min(dx, dy) + max(dx, dy)
-def chebyshev(a, b): return max(abs(a[0]-b[0]), abs(a[1]-b[1]))
-
-HEURISTIC_FUNCS = {
-    "Manhattan": manhattan,
-    "Euclidean": euclidean,
-    "Octile": octile,
-    "Chebyshev": chebyshev
-}
+from core.heuristics import octile, h_table
+from core.moves import DIAG_COST, is_open, legal_moves
+from core.node_store import NodeStore
+from core.jps import JumpPointSearch, is_uniform, expand_segment
+
+# Trace event kinds. Events are tuples: (EXPAND, cell), (OPEN, cell), (IMPROVE, cell),
+# (PATH_FOUND, path, cost) and (EXHAUSTED,). Bidirectional searches append BACKWARD
+# to the cell events of their goal-side frontier.
+EXPAND = 'expand'
+OPEN = 'open'
+IMPROVE = 'improve'
+PATH_FOUND = 'path_found'
+EXHAUSTED = 'exhausted'
+BACKWARD = 1
+
+BIDIRECTIONAL = ("Bidirectional A*", "Bidirectional Dijkstra")
 
 class PathfindingEngine:
-    def __init__(self, grid, algo="A*", heuristic="Octile", weight=1.0, allow_diagonal=True, prevent_corner_cutting=True):
+    def __init__(self, grid, algo="A*", heuristic="Octile", weight=1.0, allow_diagonal=True, prevent_corner_cutting=True, store=None, adjacency=None, landmarks=None):
         self.grid = grid
         self.algo = algo
-        self.heuristic = HEURISTIC_FUNCS.get(heuristic, octile)
+        self.heuristic = heuristic
         self.weight = weight
         self.allow_diagonal = allow_diagonal
         self.prevent_corner_cutting = prevent_corner_cutting
         self.rows = len(grid)
         self.cols = len(grid[0]) if self.rows else 0
-        self.orth_cost = 1.0
-        self.diag_cost = math.sqrt(2.0)
+        # Reusing a NodeStore across searches on the same grid makes setup O(1).
+        self.store = store if store is not None and store.fits(self.rows * self.cols) else NodeStore(self.rows * self.cols)
+        if adjacency is not None and not adjacency.matches(grid, allow_diagonal, prevent_corner_cutting):
+            adjacency = None
+        self.adjacency = adjacency
+        if landmarks is not None and (heuristic != "Landmarks"
+                                      or not landmarks.matches(grid, allow_diagonal, prevent_corner_cutting)):
+            landmarks = None
+        self.landmarks = landmarks
 
     def in_bounds(self, r, c): 
         return 0 <= r < self.rows and 0 <= c < self.cols
     def traversable(self, r, c): 
-        return self.in_bounds(r, c) and self.grid[r][c] > 0
+        return is_open(self.grid, r, c)
 
     def neighbors(self, r, c):
-        orth = [(0,1), (0,-1), (1,0), (-1,0)]
-        for dr, dc in orth:
-            nr, nc = r + dr, c + dc
-            if self.traversable(nr, nc):
-                yield nr, nc, self.orth_cost * self.grid[nr][nc]
-        if self.allow_diagonal:
-            diag = [(1,1), (1,-1), (-1,1), (-1,-1)]
-            for dr, dc in diag:
-                nr, nc = r + dr, c + dc
-                if not self.traversable(nr, nc): continue
-                if self.prevent_corner_cutting:
-                    if not (self.traversable(r+dr, c) and self.traversable(r, c+dc)): continue
-                yield nr, nc, self.diag_cost * self.grid[nr][nc]
-
-    def reconstruct_path(self, cells, dest):
+        grid = self.grid
+        for nr, nc, mult in legal_moves(grid, r, c, self.allow_diagonal, self.prevent_corner_cutting):
+            yield nr, nc, mult * grid[nr][nc]
+
+    def h_values(self, goal, reverse=False):
+        # Per-goal h-table, indexed by flat cell index; shared across searches to that goal.
+        # reverse=True bounds the cost from goal to each cell, for backward searches.
+        return h_table(self.heuristic, tuple(goal), self.rows, self.cols, self.landmarks, reverse)
+
+    def links(self, i):
+        if self.adjacency is not None:
+            return self.adjacency.links(i)
+        cols = self.cols
+        r, c = divmod(i, cols)
+        return [(nr * cols + nc, step) for nr, nc, step in self.neighbors(r, c)]
+
+    def reconstruct_path(self, parent, dest):
+        cols = self.cols
         path = []
-        r, c = dest
-        if cells[r][c].get('parent', (-1,-1)) == (-1, -1): return path
-        while cells[r][c]['parent'] != (r, c):
-            path.append((r, c))
-            r, c = cells[r][c]['parent']
-        path.append((r, c))
+        i = dest
+        while parent[i] != i:
+            path.append(divmod(i, cols))
+            i = parent[i]
+        path.append(divmod(i, cols))
+        path.reverse()
         return path
 
-    def search_generator(self, start, goal):
+    def solve(self, start, goal):
+        result = SearchResult()
+        for _ in self._search(start, goal, result, trace=False):
+            pass
+        return result
+
+    def solve_many(self, start, goals, check=None):
+        # One-to-many Dijkstra: settles cells in cost order until every goal is settled,
+        # whatever self.algo is. Returns {goal: SearchResult}; unreachable goals get empty paths.
+        # check() is called now and then so a worker can cancel the search.
+        if not self.traversable(*start):
+            raise ValueError("Start is blocked or out of bounds")
+        store = self.store
+        gen = store.reset()
+        g, parent, stamp, closed = store.g, store.parent, store.stamp, store.closed
+        cols = self.cols
+        links = self.adjacency.links if self.adjacency is not None else self.links
+        s = start[0] * cols + start[1]
+        pending = {goal[0] * cols + goal[1] for goal in goals if self.traversable(*goal)}
+        g[s] = 0.0
+        parent[s] = s
+        stamp[s] = gen
+        heap = [(0.0, s)]
+        expansions = 0
+        while heap and pending:
+            d, i = heapq.heappop(heap)
+            if closed[i] == gen or d > g[i]: continue
+            closed[i] = gen
+            expansions += 1
+            if check is not None and not expansions & 1023: check()
+            pending.discard(i)
+            for j, step in links(i):
+                if closed[j] == gen: continue
+                nd = d + step
+                if stamp[j] != gen or nd < g[j]:
+                    g[j] = nd
+                    parent[j] = i
+                    stamp[j] = gen
+                    heapq.heappush(heap, (nd, j))
+        results = {}
+        for goal in goals:
+            result = SearchResult()
+            result.expansions = expansions
+            t = goal[0] * cols + goal[1]
+            if self.in_bounds(*goal) and closed[t] == gen:
+                result.path, result.cost = self.reconstruct_path(parent, t), g[t]
+            results[tuple(goal)] = result
+        return results
+
+    def _search(self, start, goal, result, trace):
+        # Core loop shared by solve() and the animated generator; yields
+        # (kind, cell) events only when tracing so headless runs allocate nothing per step.
         if not (self.traversable(*start) and self.traversable(*goal)):
             raise ValueError("Start or goal is blocked or out of bounds")
         if start == goal:
-            yield {'current': start, 'opened': set(), 'visited': [start], 'path': [start], 'done': True}
+            result.path, result.cost, result.expansions = [start], 0.0, 1
+            if trace: yield (EXPAND, start)
+            return
+        if self.algo == "Jump Point Search" and is_uniform(self.grid):
+            yield from self._jps_search(start, goal, result, trace)
+            return
+        if self.algo in BIDIRECTIONAL:
+            yield from self._bidirectional_search(start, goal, result, trace)
             return
 
-        cells = [[{'parent': (-1,-1), 'f': float('inf'), 'g': float('inf'), 'h': 0.0} 
-                  for _ in range(self.cols)] for _ in range(self.rows)]
-        closed = [[False] * self.cols for _ in range(self.rows)]
+        store = self.store
+        gen = store.reset()
+        g, f, parent, stamp, closed = store.g, store.f, store.parent, store.stamp, store.closed
+        result.bind(store, self.cols)
+        cols = self.cols
+        links = self.adjacency.links if self.adjacency is not None else self.links
+        weight = self.weight
+        use_g = self.algo != "Greedy Best-First"
+        use_h = self.algo != "Dijkstra"
+        h = self.h_values(goal) if use_h else None
         sr, sc = start
-        gr, gc = goal
-
-        cells[sr][sc]['g'] = 0.0
-        cells[sr][sc]['h'] = self.heuristic((sr, sc), (gr, gc))
-        if self.algo == "Dijkstra":
-            cells[sr][sc]['f'] = cells[sr][sc]['g']
-        elif self.algo == "Greedy Best-First":
-            cells[sr][sc]['f'] = self.weight * cells[sr][sc]['h']
-        else:
-            cells[sr][sc]['f'] = cells[sr][sc]['g'] + self.weight * cells[sr][sc]['h']
-        cells[sr][sc]['parent'] = (sr, sc)
+        s = sr * cols + sc
+        t = goal[0] * cols + goal[1]
+
+        g[s] = 0.0
+        f[s] = weight * h[s] if use_h else 0.0
+        parent[s] = s
+        stamp[s] = gen
 
-        open_heap = []
-        heapq.heappush(open_heap, (cells[sr][sc]['f'], 0, (sr, sc)))
+        open_heap = [(f[s], 0, s)]
         counter = 1
-        opened = set()
-        visited = []
+        expansions = 0
+
+        while open_heap:
+            fval, _, i = heapq.heappop(open_heap)
+            if closed[i] == gen: continue
+            if fval > f[i]: continue
+
+            closed[i] = gen
+            expansions += 1
+            if trace: yield (EXPAND, divmod(i, cols))
+            if i == t:
+                # Only a popped goal has its final g; one merely generated may still improve.
+                result.path = self.reconstruct_path(parent, t)
+                result.cost = g[t]
+                result.expansions = expansions
+                return
+
+            gi = g[i]
+            for j, step in links(i):
+                if closed[j] == gen: continue
+                tentative_g = gi + step
+                fresh = stamp[j] != gen
+                if fresh or tentative_g < g[j]:
+                    g[j] = tentative_g
+                    fj = 0.0
+                    if use_g: fj = tentative_g
+                    if use_h: fj += weight * h[j]
+                    f[j] = fj
+                    parent[j] = i
+                    stamp[j] = gen
+                    heapq.heappush(open_heap, (fj, counter, j))
+                    counter += 1
+                    if trace: yield (OPEN if fresh else IMPROVE, divmod(j, cols))
+        result.expansions = expansions
+
+    def _jps_search(self, start, goal, result, trace):
+        # A* over jump points; only valid on uniform-cost grids, where every straight
+        # or diagonal run between jump points costs its octile length.
+        jps = JumpPointSearch(self.grid, self.allow_diagonal, self.prevent_corner_cutting)
+        jps.goal = goal
+        store = self.store
+        gen = store.reset()
+        g, f, parent, stamp, closed = store.g, store.f, store.parent, store.stamp, store.closed
+        result.bind(store, self.cols)
+        cols = self.cols
+        weight = self.weight
+        h = self.h_values(goal)
+        s = start[0] * cols + start[1]
+        t = goal[0] * cols + goal[1]
 
-        yield {'current': None, 'opened': set(opened), 'visited': list(visited), 'path': None, 'done': False}
+        g[s] = 0.0
+        f[s] = weight * h[s]
+        parent[s] = s
+        stamp[s] = gen
+        open_heap = [(f[s], 0, s)]
+        counter = 1
+        expansions = 0
 
         while open_heap:
-            fval, _, (r, c) = heapq.heappop(open_heap)
-            if closed[r][c]: continue
-            if fval > cells[r][c]['f']: continue
-
-            closed[r][c] = True
-            visited.append((r, c))
-            yield {'current': (r, c), 'opened': set(opened), 'visited': list(visited), 'path': None, 'done': False}
-
-            for nr, nc, step in self.neighbors(r, c):
-                if closed[nr][nc]: continue
-                tentative_g = cells[r][c]['g'] + step
-                if tentative_g < cells[nr][nc]['g']:
-                    cells[nr][nc]['g'] = tentative_g
-                    cells[nr][nc]['h'] = self.heuristic((nr, nc), (gr, gc))
-                    if self.algo == "Dijkstra":
-                        cells[nr][nc]['f'] = tentative_g
-                    elif self.algo == "Greedy Best-First":
-                        cells[nr][nc]['f'] = self.weight * cells[nr][nc]['h']
-                    else:
-                        cells[nr][nc]['f'] = tentative_g + self.weight * cells[nr][nc]['h']
-                    cells[nr][nc]['parent'] = (r, c)
-                    heapq.heappush(open_heap, (cells[nr][nc]['f'], counter, (nr, nc)))
+            fval, _, i = heapq.heappop(open_heap)
+            if closed[i] == gen: continue
+            if fval > f[i]: continue
+
+            closed[i] = gen
+            expansions += 1
+            cell = divmod(i, cols)
+            if trace: yield (EXPAND, cell)
+            if i == t:
+                jump_points = self.reconstruct_path(parent, t)
+                path = [start]
+                for a, b in zip(jump_points, jump_points[1:]):
+                    path.extend(expand_segment(a, b))
+                result.path, result.cost, result.expansions = path, g[t], expansions
+                return
+
+            p = parent[i]
+            for jp in jps.successors(cell[0], cell[1], None if p == i else divmod(p, cols)):
+                j = jp[0] * cols + jp[1]
+                if closed[j] == gen: continue
+                tentative_g = g[i] + octile(cell, jp)
+                fresh = stamp[j] != gen
+                if fresh or tentative_g < g[j]:
+                    g[j] = tentative_g
+                    f[j] = tentative_g + weight * h[j]
+                    parent[j] = i
+                    stamp[j] = gen
+                    heapq.heappush(open_heap, (f[j], counter, j))
                     counter += 1
-                    opened.add((nr, nc))
-                    yield {'current': (r, c), 'opened': set(opened), 'visited': list(visited), 'path': None, 'done': False}
-                if (nr, nc) == (gr, gc):
-                    path = self.reconstruct_path(cells, (gr, gc))
-                    for _ in range(50):
-                        yield {'current': (nr, nc), 'opened': set(opened), 'visited': list(visited), 'path': path, 'done': True}
-                    return
-
-        for _ in range(30):
-            yield {'current': None, 'opened': set(opened), 'visited': list(visited), 'path': None, 'done': True}
\ No newline at end of file
+                    if trace: yield (OPEN if fresh else IMPROVE, jp)
+        result.expansions = expansions
+
+    def _bidirectional_search(self, start, goal, result, trace):
+        # Forward search from start and backward search (over reversed moves) from goal.
+        # mu is the best start-goal cost seen where the frontiers touch. Dijkstra may stop
+        # once top_f + top_b >= mu; A* with consistent heuristics once max(top_f, top_b) >= mu.
+        cols = self.cols
+        grid = self.grid
+        stores = (self.store, self.store.partner())
+        gens = (stores[0].reset(), stores[1].reset())
+        result.bind(stores[0], cols)
+        links = self.adjacency.links if self.adjacency is not None else self.links
+        weight = self.weight
+        use_h = self.algo == "Bidirectional A*"
+        tables = (self.h_values(goal), self.h_values(start, reverse=True)) if use_h else None
+        roots = (start[0] * cols + start[1], goal[0] * cols + goal[1])
+
+        heaps = ([], [])
+        for k in (0, 1):
+            store, i = stores[k], roots[k]
+            store.g[i] = 0.0
+            store.f[i] = weight * tables[k][i] if use_h else 0.0
+            store.parent[i] = i
+            store.stamp[i] = gens[k]
+            heaps[k].append((store.f[i], 0, i))
+        counter = 1
+        expansions = 0
+        mu, meet = float('inf'), -1
+
+        while True:
+            for k in (0, 1):
+                heap, store, gen = heaps[k], stores[k], gens[k]
+                while heap and (store.closed[heap[0][2]] == gen or heap[0][0] > store.f[heap[0][2]]):
+                    heapq.heappop(heap)
+            if not heaps[0] or not heaps[1]: break
+            top_f, top_b = heaps[0][0][0], heaps[1][0][0]
+            if (max(top_f, top_b) if use_h else top_f + top_b) >= mu: break
+
+            k = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            store, gen = stores[k], gens[k]
+            other, other_gen = stores[1 - k], gens[1 - k]
+            g, f, parent, stamp, closed = store.g, store.f, store.parent, store.stamp, store.closed
+            h = tables[k] if use_h else None
+            _, _, i = heapq.heappop(heaps[k])
+            closed[i] = gen
+            expansions += 1
+            if trace: yield (EXPAND, divmod(i, cols)) if k == 0 else (EXPAND, divmod(i, cols), BACKWARD)
+
+            gi = g[i]
+            if k == 1:
+                ir, ic = divmod(i, cols)
+                into_i = grid[ir][ic]
+            for j, step in links(i):
+                if closed[j] == gen: continue
+                if k == 1:
+                    # Backward edges are forward moves j -> i, which pay i's terrain cost.
+                    jr, jc = divmod(j, cols)
+                    step = (1.0 if jr == ir or jc == ic else DIAG_COST) * into_i
+                tentative_g = gi + step
+                fresh = stamp[j] != gen
+                if fresh or tentative_g < g[j]:
+                    g[j] = tentative_g
+                    fj = tentative_g + weight * h[j] if use_h else tentative_g
+                    f[j] = fj
+                    parent[j] = i
+                    stamp[j] = gen
+                    heapq.heappush(heaps[k], (fj, counter, j))
+                    counter += 1
+                    if trace:
+                        kind = OPEN if fresh else IMPROVE
+                        yield (kind, divmod(j, cols)) if k == 0 else (kind, divmod(j, cols), BACKWARD)
+                if other.stamp[j] == other_gen and g[j] + other.g[j] < mu:
+                    mu, meet = g[j] + other.g[j], j
+
+        result.expansions = expansions
+        if meet < 0: return
+        path = self.reconstruct_path(stores[0].parent, meet)
+        back_parent = stores[1].parent
+        j = meet
+        while back_parent[j] != j:
+            j = back_parent[j]
+            path.append(divmod(j, cols))
+        result.path, result.cost = path, mu
+
+    def events(self, start, goal):
+        # Delta trace: each event carries only the cell that changed, ending with
+        # exactly one PATH_FOUND or EXHAUSTED event.
+        result = SearchResult()
+        yield from self._search(start, goal, result, trace=True)
+        if result.path:
+            yield (PATH_FOUND, result.path, result.cost)
+        else:
+            yield (EXHAUSTED,)
+
+    def search_generator(self, start, goal):
+        # Snapshot-style view over events(). The yielded 'opened'/'visited'
+        # collections are live and owned by the generator; copy them if you keep them.
+        opened = set()
+        visited = []
+        if start == goal:
+            for _ in self.events(start, goal): pass
+            yield {'current': start, 'opened': opened, 'visited': [start], 'path': [start], 'done': True}
+            return
+
+        yield {'current': None, 'opened': opened, 'visited': visited, 'path': None, 'done': False}
+        current = None
+        for event in self.events(start, goal):
+            kind = event[0]
+            if kind == EXPAND:
+                current = event[1]
+                visited.append(current)
+            elif kind == OPEN or kind == IMPROVE:
+                opened.add(event[1])
+            elif kind == PATH_FOUND:
+                yield {'current': goal, 'opened': opened, 'visited': visited, 'path': event[1], 'done': True}
+                return
+            else:
+                yield {'current': None, 'opened': opened, 'visited': visited, 'path': None, 'done': True}
+                return
+            yield {'current': current, 'opened': opened, 'visited': visited, 'path': None, 'done': False}
+
+
+class SearchResult:
+    def __init__(self):
+        self.path = []
+        self.cost = float('inf')
+        self.expansions = 0
+        self._store = None
+        self._generation = 0
+        self._cols = 0
+        self._g_values = None
+
+    def bind(self, store, cols):
+        self._store, self._generation, self._cols = store, store.generation, cols
+
+    @property
+    def found(self):
+        return bool(self.path)
+
+    def _live_store(self):
+        if self._store is not None and self._store.generation != self._generation:
+            raise RuntimeError("Search buffers were reused by a later search")
+        return self._store
+
+    def g(self, cell):
+        store = self._live_store()
+        if store is None:
+            return 0.0 if self.path and cell == self.path[0] else float('inf')
+        i = cell[0] * self._cols + cell[1]
+        return store.g[i] if store.stamp[i] == self._generation else float('inf')
+
+    @property
+    def g_values(self):
+        # Built on demand, and only valid until the store runs another search.
+        if self._g_values is None:
+            self._g_values = {}
+            store = self._live_store()
+            if store is None:
+                if self.path: self._g_values[self.path[0]] = 0.0
+            else:
+                gen, cols, g = self._generation, self._cols, store.g
+                for i, s in enumerate(store.stamp):
+                    if s == gen:
+                        self._g_values[divmod(i, cols)] = g[i]
+        return self._g_values
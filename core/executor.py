@@ -0,0 +1,82 @@
+# core/executor.py
+import queue
+import threading
+
+# Message kinds posted from the worker: (PROGRESS, payload), (DONE, result), (ERROR, exception).
+PROGRESS = 'progress'
+DONE = 'done'
+ERROR = 'error'
+
+class Cancelled(Exception):
+    pass
+
+# One background job. The worker posts messages into a bounded queue that the Tk thread
+# drains from root.after; when the consumer stops draining (e.g. paused) the worker blocks
+# in post() instead of racing ahead, and wakes periodically to notice cancellation.
+class SearchTask:
+    def __init__(self, maxsize=64):
+        self.queue = queue.Queue(maxsize)
+        self.cancelled = threading.Event()
+
+    def post(self, kind, payload=None):
+        while True:
+            if self.cancelled.is_set(): raise Cancelled()
+            try:
+                self.queue.put((kind, payload), timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def check(self):
+        if self.cancelled.is_set(): raise Cancelled()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def drain(self, limit=None):
+        out = []
+        while limit is None or len(out) < limit:
+            try:
+                out.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return out
+
+# Runs work(task, *args) on a daemon thread, one job at a time: submitting a new job
+# cancels the previous one. The return value arrives as a DONE message.
+class SearchExecutor:
+    def __init__(self):
+        self.task = None
+
+    def submit(self, work, *args, maxsize=64):
+        self.cancel()
+        task = SearchTask(maxsize)
+        def run():
+            try:
+                task.post(DONE, work(task, *args))
+            except Cancelled:
+                pass
+            except Exception as e:
+                try:
+                    task.post(ERROR, e)
+                except Cancelled:
+                    pass
+        threading.Thread(target=run, daemon=True).start()
+        self.task = task
+        return task
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+def stream_events(task, engine, start, goal, chunk=256):
+    # Worker side of an animated search: engine trace events in PROGRESS chunks.
+    buf = []
+    for event in engine.events(start, goal):
+        buf.append(event)
+        if len(buf) >= chunk:
+            task.post(PROGRESS, buf)
+            buf = []
+    if buf:
+        task.post(PROGRESS, buf)
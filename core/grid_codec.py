@@ -0,0 +1,54 @@
+# core/grid_codec.py
+import hashlib
+import struct
+import zlib
+import numpy as np
+
+# Versioned binary grid encoding for MapDatabase. Grids hold few distinct costs (walls,
+# a handful of terrain levels), so the usual form is a palette of those costs as float64
+# plus each cell's palette index bit-packed at 1, 2, 4 or 8 bits; a plain maze costs one
+# bit per cell. Grids with more than 256 costs fall back to raw float64s (bits = 0). The
+# body is zlib-compressed either way, and costs round-trip exactly.
+#   header: version (B), bits (B), rows (I), cols (I), palette size (H)
+HEADER = struct.Struct('<BBIIH')
+VERSION = 1
+LEVEL = 1  # the packing already does most of the work; higher levels cost far more time
+
+def grid_digest(grid):
+    # Identity of a grid's costs, for data derived from them (landmarks, artifacts).
+    return hashlib.sha1(np.asarray(grid, dtype=np.float64).tobytes()).hexdigest()
+
+def encode_grid(grid):
+    rows, cols = len(grid), len(grid[0]) if len(grid) else 0
+    cost = np.asarray(grid, dtype=np.float64).reshape(rows * cols)
+    palette, index = np.unique(cost, return_inverse=True)
+    if len(palette) > 256:
+        bits, palette, body = 0, np.empty(0), cost.astype('<f8').tobytes()
+    else:
+        bits = next(b for b in (1, 2, 4, 8) if len(palette) <= 1 << b)
+        body = _pack(index.astype(np.uint8), bits).tobytes()
+    header = HEADER.pack(VERSION, bits, rows, cols, len(palette))
+    return header + zlib.compress(palette.astype('<f8').tobytes() + body, LEVEL)
+
+def decode_grid(blob):
+    version, bits, rows, cols, n = HEADER.unpack_from(blob)
+    if version != VERSION:
+        raise ValueError(f"Unsupported grid encoding version {version}")
+    data = zlib.decompress(blob[HEADER.size:])
+    palette = np.frombuffer(data, dtype='<f8', count=n)
+    body = np.frombuffer(data, dtype=np.uint8, offset=8 * n)
+    if bits == 0:
+        cost = body.view('<f8')
+    else:
+        cost = palette[_unpack(body, bits, rows * cols)]
+    return cost.reshape(rows, cols).tolist()
+
+def _pack(index, bits):
+    per = 8 // bits
+    index = np.concatenate([index, np.zeros(-len(index) % per, dtype=np.uint8)]).reshape(-1, per)
+    shifts = np.arange(per, dtype=np.uint8) * bits
+    return np.bitwise_or.reduce(index << shifts, axis=1).astype(np.uint8)
+
+def _unpack(packed, bits, count):
+    shifts = np.arange(8 // bits, dtype=np.uint8) * bits
+    return ((packed[:, None] >> shifts) & ((1 << bits) - 1)).ravel()[:count]
@@ -0,0 +1,62 @@
+# core/heuristics.py
+import math
+from array import array
+from functools import lru_cache
+import numpy as np
+
+# Heuristic functions
+def manhattan(a, b): return abs(a[0]-b[0]) + abs(a[1]-b[1])
+def euclidean(a, b): return math.hypot(a[0]-b[0], a[1]-b[1])
+def octile(a, b):
+    dx, dy = abs(a[0]-b[0]), abs(a[1]-b[1])
+    return (math.sqrt(2)-1) * min(dx, dy) + max(dx, dy)
+def chebyshev(a, b): return max(abs(a[0]-b[0]), abs(a[1]-b[1]))
+
+# Heuristic names for UI. "Landmarks" is ALT over a core.landmarks.LandmarkSet and falls
+# back to Octile when no set is supplied.
+HEURISTICS = ["Manhattan", "Euclidean", "Octile", "Chebyshev", "Landmarks"]
+
+HEURISTIC_FUNCS = {
+    "Manhattan": manhattan,
+    "Euclidean": euclidean,
+    "Octile": octile,
+    "Chebyshev": chebyshev
+}
+
+# Vectorized forms over |dr|, |dc| arrays.
+_VECTOR_FUNCS = {
+    "Manhattan": lambda dr, dc: dr + dc,
+    "Euclidean": np.hypot,
+    "Octile": lambda dr, dc: (math.sqrt(2)-1) * np.minimum(dr, dc) + np.maximum(dr, dc),
+    "Chebyshev": np.maximum,
+}
+
+TABLE_CACHE_SIZE = 16  # per-goal tables kept; each is rows*cols float64s (twice over)
+
+def _geometric(name, goal, rows, cols):
+    func = _VECTOR_FUNCS.get(name, _VECTOR_FUNCS["Octile"])
+    dr = np.abs(np.arange(rows, dtype=np.float64) - goal[0])[:, None]
+    dc = np.abs(np.arange(cols, dtype=np.float64) - goal[1])[None, :]
+    return np.broadcast_to(np.asarray(func(dr, dc), dtype=np.float64), (rows, cols))
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def h_grid(name, goal, rows, cols, landmarks=None, reverse=False):
+    # h for every cell towards goal as a read-only (rows, cols) ndarray; unknown names fall
+    # back to Octile, as the engine always has. reverse=True bounds the cost from goal to
+    # each cell instead, which only differs for Landmarks (the geometric ones are symmetric).
+    if name == "Landmarks" and landmarks is not None:
+        # ALT bound, never weaker than the geometric one scaled by the cheapest terrain.
+        geometric = _geometric("Octile" if landmarks.allow_diagonal else "Manhattan", goal, rows, cols)
+        table = np.maximum(landmarks.bound(goal, reverse), geometric * landmarks.min_cost)
+    else:
+        table = _geometric(name, goal, rows, cols).copy()
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def h_table(name, goal, rows, cols, landmarks=None, reverse=False):
+    # The same table flattened to array('d') so the search loop indexes it by cell index
+    # and gets plain floats back.
+    flat = array('d')
+    flat.frombytes(h_grid(name, goal, rows, cols, landmarks, reverse).tobytes())
+    return flat
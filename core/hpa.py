@@ -0,0 +1,258 @@
+# core/hpa.py
+import heapq
+from core.engine import SearchResult
+from core.heuristics import manhattan, octile
+from core.moves import DIAG_COST, is_open, moves_for
+
+INF = float('inf')
+
+# HPA*: the grid is cut into cluster_size x cluster_size clusters. Open cells facing each
+# other across a cluster border become entrance nodes; an abstract graph links entrances
+# inside a cluster by cached local shortest-path costs and across borders by single steps.
+# Queries search the abstract graph and refine each hop with a cluster-local search, so
+# their cost grows with path length instead of map area. Results are near-optimal, not
+# optimal. With corner cutting allowed a diagonal step can cross a border (or a cluster
+# corner) where no orthogonal step can, so such crossings get transitions of their own.
+class HierarchicalPlanner:
+    def __init__(self, grid, cluster_size=10, allow_diagonal=True, prevent_corner_cutting=True):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows else 0
+        self.cluster_size = cluster_size
+        self.allow_diagonal = allow_diagonal
+        self.prevent_corner_cutting = prevent_corner_cutting
+        self.cluster_rows = -(-self.rows // cluster_size)
+        self.cluster_cols = -(-self.cols // cluster_size)
+        self.borders = {}   # (cluster, cluster) -> [(cell index, cell index)]
+        self.inter = {}     # node -> {node: cost} across cluster borders
+        self.nodes = {}     # cluster -> set of entrance nodes
+        self.intra = {}     # cluster -> {node: {node: cost}} inside the cluster
+        self.build()
+
+    def matches(self, grid, allow_diagonal, prevent_corner_cutting):
+        return (self.grid is grid and self.allow_diagonal == allow_diagonal
+                and self.prevent_corner_cutting == prevent_corner_cutting)
+
+    def cluster_of(self, r, c):
+        return (r // self.cluster_size, c // self.cluster_size)
+
+    def bounds(self, cluster):
+        cs = self.cluster_size
+        r0, c0 = cluster[0] * cs, cluster[1] * cs
+        return r0, c0, min(r0 + cs, self.rows), min(c0 + cs, self.cols)
+
+    def open(self, r, c):
+        return is_open(self.grid, r, c)
+
+    def build(self):
+        for cr in range(self.cluster_rows):
+            for cc in range(self.cluster_cols):
+                for other in self._neighbors((cr, cc)):
+                    if other > (cr, cc): self._build_border((cr, cc), other)
+        for cr in range(self.cluster_rows):
+            for cc in range(self.cluster_cols):
+                self._build_cluster((cr, cc))
+
+    def _neighbors(self, cluster):
+        # Clusters that can share a transition with cluster: the four beside it, plus the
+        # diagonal ones when a corner-cutting step can hop straight across a cluster corner.
+        cr, cc = cluster
+        steps = ((0, 1), (0, -1), (1, 0), (-1, 0))
+        if self.allow_diagonal and not self.prevent_corner_cutting:
+            steps += ((1, 1), (1, -1), (-1, 1), (-1, -1))
+        return [(cr + dr, cc + dc) for dr, dc in steps
+                if 0 <= cr + dr < self.cluster_rows and 0 <= cc + dc < self.cluster_cols]
+
+    def update_cell(self, r, c):
+        # A cell's crossings (as endpoint or as corner-cutting blocker) all lie in its 3x3
+        # block, so rebuild the borders between the clusters that block touches, then
+        # those clusters.
+        dirty = {self.cluster_of(nr, nc) for nr in range(max(0, r - 1), min(self.rows, r + 2))
+                 for nc in range(max(0, c - 1), min(self.cols, c + 2))}
+        for cl in dirty:
+            for other in self._neighbors(cl):
+                if other > cl and other in dirty: self._build_border(cl, other)
+        for cl in dirty:
+            self._build_cluster(cl)
+
+    def _build_border(self, a, b):
+        cols = self.cols
+        for i, j in self.borders.get((a, b), ()):
+            self.inter.get(i, {}).pop(j, None)
+            self.inter.get(j, {}).pop(i, None)
+        ar0, ac0, ar1, ac1 = self.bounds(a)
+        if a[0] == b[0]:
+            pairs = [((r, ac1 - 1), (r, ac1)) for r in range(ar0, ar1)]
+            diagonals = [((r, ac1 - 1), (r + dr, ac1)) for r in range(ar0, ar1) for dr in (-1, 1) if ar0 <= r + dr < ar1]
+        elif a[1] == b[1]:
+            pairs = [((ar1 - 1, c), (ar1, c)) for c in range(ac0, ac1)]
+            diagonals = [((ar1 - 1, c), (ar1, c + dc)) for c in range(ac0, ac1) for dc in (-1, 1) if ac0 <= c + dc < ac1]
+        else:
+            pairs = []
+            diagonals = [((ar1 - 1, ac1 - 1), (ar1, ac1))] if b[1] > a[1] else [((ar1 - 1, ac0), (ar1, ac0 - 1))]
+        transitions = []
+        if self.allow_diagonal and not self.prevent_corner_cutting:
+            # A diagonal crossing with an open corner cell is also reachable through an
+            # orthogonal opening next to it; only the ones squeezing between two walls
+            # need a transition of their own.
+            for p, q in diagonals:
+                if self.open(*p) and self.open(*q) and not self.open(p[0], q[1]) and not self.open(q[0], p[1]):
+                    transitions.append((p[0] * cols + p[1], q[0] * cols + q[1]))
+        run = []
+        for p, q in pairs + [(None, None)]:
+            if p is not None and self.open(*p) and self.open(*q):
+                run.append((p, q))
+                continue
+            if run:
+                # Long openings get an entrance at each end, short ones one in the middle.
+                picks = [run[0], run[-1]] if len(run) >= 6 else [run[len(run) // 2]]
+                for p2, q2 in picks:
+                    transitions.append((p2[0] * cols + p2[1], q2[0] * cols + q2[1]))
+                run = []
+        for i, j in transitions:
+            ir, ic = divmod(i, cols)
+            jr, jc = divmod(j, cols)
+            mult = DIAG_COST if ir != jr and ic != jc else 1.0
+            self.inter.setdefault(i, {})[j] = mult * self.grid[jr][jc]
+            self.inter.setdefault(j, {})[i] = mult * self.grid[ir][ic]
+        self.borders[(a, b)] = transitions
+
+    def _build_cluster(self, cluster):
+        nodes = set()
+        for other in self._neighbors(cluster):
+            for i, j in self.borders.get((min(cluster, other), max(cluster, other)), ()):
+                nodes.add(i if self.cluster_of(*divmod(i, self.cols)) == cluster else j)
+        old = self.nodes.get(cluster, set())
+        for node in old - nodes:
+            if not self.inter.get(node): self.inter.pop(node, None)
+        self.nodes[cluster] = nodes
+        bounds = self.bounds(cluster)
+        table = {}
+        for node in nodes:
+            dist, _ = self._local(node, bounds)
+            table[node] = {other: dist[other] for other in nodes if other != node and other in dist}
+        self.intra[cluster] = table
+
+    def _local(self, source, bounds, reverse=False, target=None):
+        # Dijkstra confined to the rectangle bounds. Forward costs pay the entered cell's
+        # terrain; reverse=True gives costs *to* source instead of from it.
+        r0, c0, r1, c1 = bounds
+        cols, grid = self.cols, self.grid
+        moves, no_cut = moves_for(self.allow_diagonal), self.prevent_corner_cutting
+        dist = {source: 0.0}
+        parent = {source: source}
+        heap = [(0.0, source)]
+        done = set()
+        while heap:
+            d, i = heapq.heappop(heap)
+            if i in done: continue
+            done.add(i)
+            if i == target: break
+            r, c = divmod(i, cols)
+            here = grid[r][c]
+            # legal_moves' rules inlined over the rectangle, which is this hot loop.
+            for dr, dc, mult in moves:
+                nr, nc = r + dr, c + dc
+                if not (r0 <= nr < r1 and c0 <= nc < c1): continue
+                there = grid[nr][nc]
+                if there <= 0: continue
+                if dr and dc and no_cut and not (grid[nr][c] > 0 and grid[r][nc] > 0): continue
+                j = nr * cols + nc
+                if j in done: continue
+                nd = d + mult * (here if reverse else there)
+                if nd < dist.get(j, INF):
+                    dist[j] = nd
+                    parent[j] = i
+                    heapq.heappush(heap, (nd, j))
+        return dist, parent
+
+    def solve(self, start, goal):
+        if not (self.open(*start) and self.open(*goal)):
+            raise ValueError("Start or goal is blocked or out of bounds")
+        result = SearchResult()
+        if start == goal:
+            result.path, result.cost, result.expansions = [start], 0.0, 1
+            return result
+        cols = self.cols
+        s = start[0] * cols + start[1]
+        t = goal[0] * cols + goal[1]
+        s_cluster, t_cluster = self.cluster_of(*start), self.cluster_of(*goal)
+
+        dist, _ = self._local(s, self.bounds(s_cluster))
+        start_edges = {n: dist[n] for n in self.nodes[s_cluster] if n in dist and n != s}
+        direct = None
+        if abs(s_cluster[0] - t_cluster[0]) <= 1 and abs(s_cluster[1] - t_cluster[1]) <= 1:
+            # Nearby endpoints: the abstract graph can force long detours through distant
+            # entrances, so also offer a direct hop searched over the surrounding clusters.
+            a0, a1, _, _ = self.bounds((max(0, min(s_cluster[0], t_cluster[0]) - 1), max(0, min(s_cluster[1], t_cluster[1]) - 1)))
+            _, _, b0, b1 = self.bounds((min(self.cluster_rows - 1, max(s_cluster[0], t_cluster[0]) + 1),
+                                        min(self.cluster_cols - 1, max(s_cluster[1], t_cluster[1]) + 1)))
+            dist, direct = self._local(s, (a0, a1, b0, b1), target=t)
+            if t in dist:
+                start_edges[t] = dist[t]
+            else:
+                direct = None
+        dist, _ = self._local(t, self.bounds(t_cluster), reverse=True)
+        goal_edges = {n: dist[n] for n in self.nodes[t_cluster] if n in dist and n != t}
+
+        distance = octile if self.allow_diagonal else manhattan
+        h = lambda i: distance(divmod(i, cols), goal)
+        g = {s: 0.0}
+        parent = {s: s}
+        heap = [(h(s), 0, s)]
+        closed = set()
+        counter = 1
+        while heap:
+            _, _, i = heapq.heappop(heap)
+            if i in closed: continue
+            closed.add(i)
+            result.expansions += 1
+            if i == t: break
+            edges = []
+            if i == s:
+                edges.extend(start_edges.items())
+            else:
+                edges.extend(self.intra[self.cluster_of(*divmod(i, cols))].get(i, {}).items())
+            edges.extend(self.inter.get(i, {}).items())
+            if i in goal_edges:
+                edges.append((t, goal_edges[i]))
+            for j, cost in edges:
+                if j in closed: continue
+                if g[i] + cost < g.get(j, float('inf')):
+                    g[j] = g[i] + cost
+                    parent[j] = i
+                    heapq.heappush(heap, (g[j] + h(j), counter, j))
+                    counter += 1
+        if t not in closed:
+            return result
+
+        hops = [t]
+        while hops[-1] != s:
+            hops.append(parent[hops[-1]])
+        hops.reverse()
+        path = [start]
+        if direct is not None and hops == [s, t]:
+            i = t
+            while i != s:
+                path.insert(1, divmod(i, cols))
+                i = direct[i]
+        else:
+            for a, b in zip(hops, hops[1:]):
+                path.extend(self._refine(a, b))
+        result.path, result.cost = path, g[t]
+        return result
+
+    def _refine(self, a, b):
+        # Cells after a up to b for one abstract hop.
+        cols = self.cols
+        a_cluster, b_cluster = self.cluster_of(*divmod(a, cols)), self.cluster_of(*divmod(b, cols))
+        if a_cluster != b_cluster:
+            return [divmod(b, cols)]
+        _, parent = self._local(a, self.bounds(a_cluster), target=b)
+        cells = []
+        i = b
+        while i != a:
+            cells.append(divmod(i, cols))
+            i = parent[i]
+        cells.reverse()
+        return cells
@@ -0,0 +1,130 @@
+# core/jps.py
+from core.moves import is_open, legal_moves
+
+# Jump Point Search pruning rules for uniform-cost grids. Three movement models match
+# PathfindingEngine's flags: 4-connected, 8-connected without corner cutting, and
+# 8-connected where a diagonal only needs its target cell to be open.
+
+def is_uniform(grid):
+    return all(v == 0 or v == 1.0 for row in grid for v in row)
+
+def sign(v):
+    return (v > 0) - (v < 0)
+
+class JumpPointSearch:
+    def __init__(self, grid, allow_diagonal=True, prevent_corner_cutting=True):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows else 0
+        self.allow_diagonal = allow_diagonal
+        self.prevent_corner_cutting = prevent_corner_cutting
+        self.goal = None
+
+    def open(self, r, c):
+        return is_open(self.grid, r, c)
+
+    def successors(self, r, c, parent):
+        # Jump points reachable from (r, c) when it was reached from parent (None at the start).
+        out = []
+        for nr, nc in self.pruned_neighbors(r, c, parent):
+            jp = self.jump(nr, nc, nr - r, nc - c)
+            if jp is not None:
+                out.append(jp)
+        return out
+
+    def pruned_neighbors(self, r, c, parent):
+        op = self.open
+        if parent is None:
+            return [(nr, nc) for nr, nc, _ in legal_moves(self.grid, r, c, self.allow_diagonal, self.prevent_corner_cutting)]
+
+        dr, dc = sign(r - parent[0]), sign(c - parent[1])
+        out = []
+        if not self.allow_diagonal:
+            if dc:
+                cand = [(r - 1, c), (r + 1, c), (r, c + dc)]
+            else:
+                cand = [(r, c - 1), (r, c + 1), (r + dr, c)]
+            return [p for p in cand if op(*p)]
+
+        if self.prevent_corner_cutting:
+            if dr and dc:
+                walk_r, walk_c = op(r + dr, c), op(r, c + dc)
+                if walk_r: out.append((r + dr, c))
+                if walk_c: out.append((r, c + dc))
+                if walk_r and walk_c: out.append((r + dr, c + dc))
+            elif dc:
+                nxt, up, down = op(r, c + dc), op(r - 1, c), op(r + 1, c)
+                if nxt:
+                    out.append((r, c + dc))
+                    if up: out.append((r - 1, c + dc))
+                    if down: out.append((r + 1, c + dc))
+                if up: out.append((r - 1, c))
+                if down: out.append((r + 1, c))
+            else:
+                nxt, left, right = op(r + dr, c), op(r, c - 1), op(r, c + 1)
+                if nxt:
+                    out.append((r + dr, c))
+                    if left: out.append((r + dr, c - 1))
+                    if right: out.append((r + dr, c + 1))
+                if left: out.append((r, c - 1))
+                if right: out.append((r, c + 1))
+            return out
+
+        if dr and dc:
+            cand = [(r + dr, c), (r, c + dc), (r + dr, c + dc)]
+            if not op(r, c - dc): cand.append((r + dr, c - dc))
+            if not op(r - dr, c): cand.append((r - dr, c + dc))
+        elif dc:
+            cand = [(r, c + dc)]
+            if not op(r + 1, c): cand.append((r + 1, c + dc))
+            if not op(r - 1, c): cand.append((r - 1, c + dc))
+        else:
+            cand = [(r + dr, c)]
+            if not op(r, c + 1): cand.append((r + dr, c + 1))
+            if not op(r, c - 1): cand.append((r + dr, c - 1))
+        return [p for p in cand if op(*p)]
+
+    def jump(self, r, c, dr, dc):
+        # Walk from (r, c) in direction (dr, dc) until a jump point, the goal, or a wall.
+        # Iterative so long corridors on big maps don't hit the recursion limit.
+        op, goal = self.open, self.goal
+        diagonal_only_if_clear = self.prevent_corner_cutting
+        while True:
+            if not op(r, c): return None
+            if (r, c) == goal: return (r, c)
+            if dr and dc:
+                if not diagonal_only_if_clear:
+                    if (op(r + dr, c - dc) and not op(r, c - dc)) or (op(r - dr, c + dc) and not op(r - dr, c)):
+                        return (r, c)
+                if self.jump(r, c + dc, 0, dc) is not None or self.jump(r + dr, c, dr, 0) is not None:
+                    return (r, c)
+                if diagonal_only_if_clear and not (op(r + dr, c) and op(r, c + dc)):
+                    return None
+            elif dc:
+                if not self.allow_diagonal or diagonal_only_if_clear:
+                    if (op(r - 1, c) and not op(r - 1, c - dc)) or (op(r + 1, c) and not op(r + 1, c - dc)):
+                        return (r, c)
+                elif (op(r + 1, c + dc) and not op(r + 1, c)) or (op(r - 1, c + dc) and not op(r - 1, c)):
+                    return (r, c)
+            else:
+                if not self.allow_diagonal or diagonal_only_if_clear:
+                    if (op(r, c - 1) and not op(r - dr, c - 1)) or (op(r, c + 1) and not op(r - dr, c + 1)):
+                        return (r, c)
+                    if not self.allow_diagonal:
+                        if self.jump(r, c + 1, 0, 1) is not None or self.jump(r, c - 1, 0, -1) is not None:
+                            return (r, c)
+                elif (op(r + dr, c + 1) and not op(r, c + 1)) or (op(r + dr, c - 1) and not op(r, c - 1)):
+                    return (r, c)
+            r += dr
+            c += dc
+
+def expand_segment(a, b):
+    # Cells strictly after a up to and including b along a straight or diagonal line.
+    dr, dc = sign(b[0] - a[0]), sign(b[1] - a[1])
+    r, c = a
+    out = []
+    while (r, c) != b:
+        r += dr
+        c += dc
+        out.append((r, c))
+    return out
@@ -0,0 +1,184 @@
+# core/landmarks.py
+import json
+import numpy as np
+from core.grid_codec import grid_digest
+from core.moves import moves_for
+from core.wavefront import cost_array, distance_field
+
+DEFAULT_LANDMARKS = 8
+
+# ALT preprocessing (Goldberg & Harrelson): exact distances to and from k landmarks give
+# a lower bound on d(v, t) through the triangle inequality,
+#   d(v, t) >= max(d(L, t) - d(L, v), d(v, L) - d(t, L)),
+# which tracks terrain costs where the geometric heuristics only see coordinates.
+class LandmarkSet:
+    def __init__(self, cells, forward, backward, rows, cols, allow_diagonal, prevent_corner_cutting,
+                 min_cost, digest, grid=None):
+        self.cells = [tuple(c) for c in cells]
+        self.forward = forward    # (k, rows*cols) float32, d(L, v)
+        self.backward = backward  # (k, rows*cols) float32, d(v, L)
+        self.rows = rows
+        self.cols = cols
+        self.allow_diagonal = allow_diagonal
+        self.prevent_corner_cutting = prevent_corner_cutting
+        self.min_cost = min_cost
+        self.digest = digest
+        self.grid = grid
+        # float32 storage rounds distances; shaving this much keeps the bound admissible.
+        finite = forward[np.isfinite(forward)]
+        self.slack = float(finite.max()) * 2.0 ** -20 if finite.size else 0.0
+
+    @staticmethod
+    def digest_of(grid):
+        return grid_digest(grid)
+
+    def matches(self, grid, allow_diagonal, prevent_corner_cutting):
+        return (self.grid is grid and self.allow_diagonal == allow_diagonal
+                and self.prevent_corner_cutting == prevent_corner_cutting)
+
+    def bind(self, grid, costs=None):
+        # Attach a stored set to a live grid, provided it was built for exactly these costs.
+        # costs is the layer to check when grid carries a transient overlay on top of it.
+        costs = grid if costs is None else costs
+        rows = len(costs)
+        if (rows, len(costs[0]) if rows else 0) != (self.rows, self.cols) or self.digest_of(costs) != self.digest:
+            return False
+        self.grid = grid
+        return True
+
+    def bound(self, goal, reverse=False):
+        # Lower bound on d(v, goal) for every cell as a (rows, cols) float64 ndarray;
+        # inf where the landmarks prove goal unreachable from v. Moves pay the cost of the
+        # cell they enter, so distances are asymmetric: reverse=True bounds d(goal, v)
+        # instead, for searches that run backward from goal,
+        #   d(s, v) >= max(d(L, v) - d(L, s), d(s, L) - d(v, L)).
+        if not self.cells:
+            return np.zeros((self.rows, self.cols))
+        t = goal[0] * self.cols + goal[1]
+        fwd = self.forward.astype(np.float64)
+        back = self.backward.astype(np.float64)
+        with np.errstate(invalid='ignore'):
+            if reverse:
+                terms = np.fmax(fwd - fwd[:, t:t + 1], back[:, t:t + 1] - back)
+            else:
+                terms = np.fmax(fwd[:, t:t + 1] - fwd, back - back[:, t:t + 1])
+        terms = np.nan_to_num(terms, nan=0.0, posinf=np.inf, neginf=0.0)
+        h = np.maximum(terms.max(axis=0) - self.slack, 0.0)
+        return h.reshape(self.rows, self.cols)
+
+    def to_row(self):
+        return (json.dumps(self.cells), self.rows, self.cols, int(self.allow_diagonal),
+                int(self.prevent_corner_cutting), self.min_cost, self.digest,
+                self.forward.tobytes(), self.backward.tobytes())
+
+    @classmethod
+    def from_row(cls, row):
+        cells, rows, cols, diag, corner, min_cost, digest, forward, backward = row
+        cells = json.loads(cells)
+        shape = (len(cells), rows * cols)
+        forward = np.frombuffer(forward, dtype=np.float32).reshape(shape)
+        backward = np.frombuffer(backward, dtype=np.float32).reshape(shape)
+        return cls(cells, forward, backward, rows, cols, bool(diag), bool(corner), min_cost, digest)
+
+def build_landmarks(grid, k=DEFAULT_LANDMARKS, allow_diagonal=True, prevent_corner_cutting=True,
+                    method="farthest", seed=0):
+    # Pick up to k landmarks ("avoid" or "farthest" selection) and store both distance
+    # fields for each as compact float32 rows.
+    cost = cost_array(grid)
+    rows, cols = cost.shape
+    open_idx = np.flatnonzero(cost.ravel() > 0)
+    rng = np.random.default_rng(seed)
+    cells, forward, backward = [], [], []
+    for _ in range(2 * min(k, len(open_idx))):
+        if len(cells) == k: break
+        root = divmod(int(rng.choice(open_idx)), cols)
+        dist = distance_field(cost, [root], allow_diagonal, prevent_corner_cutting)
+        if method == "avoid" and cells:
+            pick = _avoid_pick(cost, root, dist, np.array(forward), np.array(backward), cells,
+                               allow_diagonal, prevent_corner_cutting)
+        else:
+            pick = _farthest_pick(dist, forward, backward)
+        if pick is None or pick in cells: continue
+        cells.append(pick)
+        forward.append(distance_field(cost, [pick], allow_diagonal, prevent_corner_cutting).ravel())
+        backward.append(distance_field(cost, [pick], allow_diagonal, prevent_corner_cutting, reverse=True).ravel())
+    shape = (len(cells), rows * cols)
+    forward = np.array(forward, dtype=np.float32).reshape(shape)
+    backward = np.array(backward, dtype=np.float32).reshape(shape)
+    min_cost = float(cost[cost > 0].min()) if len(open_idx) else 1.0
+    return LandmarkSet(cells, forward, backward, rows, cols, allow_diagonal, prevent_corner_cutting,
+                       min_cost, LandmarkSet.digest_of(cost), grid)
+
+def _farthest_pick(dist, forward, backward):
+    # The reachable cell farthest (round trip) from every landmark chosen so far; the
+    # first landmark is simply the cell farthest from the random root.
+    score = dist.ravel().copy()
+    if forward:
+        score = np.min(np.array(forward) + np.array(backward), axis=0)
+    score[~np.isfinite(dist.ravel()) | ~np.isfinite(score)] = -1.0
+    i = int(np.argmax(score))
+    return divmod(i, dist.shape[1]) if score[i] >= 0 else None
+
+def _avoid_pick(cost, root, dist, forward, backward, cells, allow_diagonal, prevent_corner_cutting):
+    # "Avoid" (Goldberg & Werneck): weight each cell of the root's shortest-path tree by how
+    # badly the current landmarks bound d(root, v), total the weights per subtree (zero for
+    # subtrees that already hold a landmark), and walk from the root into the heaviest
+    # subtree down to a leaf.
+    rows, cols = cost.shape
+    width = cols + 2
+    flat_cost = np.zeros((rows + 2, width))
+    flat_cost[1:-1, 1:-1] = cost
+    flat_cost = flat_cost.ravel()
+    open_ = flat_cost > 0
+    padded = np.full((rows + 2, width), np.inf)
+    padded[1:-1, 1:-1] = dist
+    padded = padded.ravel()
+
+    inner = np.arange(rows * cols)
+    to_padded = (inner // cols + 1) * width + inner % cols + 1
+    r = root[0] * cols + root[1]
+    with np.errstate(invalid='ignore'):
+        lower = np.fmax(forward - forward[:, r:r + 1], backward[:, r:r + 1] - backward)
+    lower = np.nan_to_num(lower, nan=0.0, posinf=0.0, neginf=0.0).max(axis=0)
+    reach = np.isfinite(dist.ravel())
+    weight = np.zeros(padded.shape)
+    weight[to_padded[reach]] = np.maximum(dist.ravel()[reach] - lower[reach], 0.0)
+
+    # Shortest-path-tree parent of every reachable cell except the root.
+    root_p = to_padded[r]
+    nodes = to_padded[reach]
+    nodes = nodes[nodes != root_p]
+    parent = np.full(padded.shape, -1, dtype=np.int64)
+    for dr, dc, mult in moves_for(allow_diagonal):
+        u = nodes - (dr * width + dc)
+        ok = (parent[nodes] < 0) & open_[u]
+        if dr and dc and prevent_corner_cutting:
+            ok &= open_[u + dr * width] & open_[u + dc]
+        ok &= np.isclose(padded[u] + mult * flat_cost[nodes], padded[nodes])
+        parent[nodes[ok]] = u[ok]
+
+    # The subtree totals are a sequential sweep, so it runs over plain lists.
+    parent, weight = parent.tolist(), weight.tolist()
+    has_landmark = [False] * len(weight)
+    for lr, lc in cells:
+        has_landmark[(lr + 1) * width + lc + 1] = True
+    best_child = [-1] * len(weight)
+    best_size = [0.0] * len(weight)
+    # Children are strictly farther than their parent, so descending distance order
+    # finishes every subtree before its root.
+    for v in nodes[np.argsort(-padded[nodes], kind='stable')].tolist():
+        p = parent[v]
+        if p < 0: continue
+        if has_landmark[v]:
+            has_landmark[p] = True
+            continue
+        weight[p] += weight[v]
+        if weight[v] > best_size[p]:
+            best_size[p], best_child[p] = weight[v], v
+    v = int(root_p)
+    while best_child[v] >= 0:
+        v = best_child[v]
+    if v == root_p:
+        return None
+    pr, pc = divmod(v, width)
+    return pr - 1, pc - 1
@@ -0,0 +1,203 @@
+# core/mapf.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from core.batch import publish_grid, attach_grid
+from core.engine import SearchResult
+from core.spacetime import ReservationTable, SpaceTimePlanner
+
+# Multi-agent pathfinding over SpaceTimePlanner. Agents move one cell or wait per tick
+# and may neither share a cell nor swap places; every agent stays on its goal once it
+# arrives. Paths are timed: path[t] is the agent's cell at tick t.
+
+# Per-process low-level solver, set up once by _init_worker.
+_worker = {}
+
+class _LowLevel:
+    # Replans one agent under its constraints, steering away from the other agents'
+    # current paths within the focal bound w.
+    def __init__(self, grid, base, allow_diagonal, prevent_corner_cutting):
+        self.base = base
+        self.planner = SpaceTimePlanner(grid, base, allow_diagonal, prevent_corner_cutting)
+
+    def __call__(self, start, goal, constraints, w, others):
+        table = self.base
+        if constraints:
+            table = self.base.copy()
+            for kind, data in constraints:
+                if kind == 'vertex':
+                    table.hold(*data)
+                else:
+                    table.forbid(*data)
+        try:
+            # At w = 1 the focal search is plain A* breaking ties by fewest conflicts.
+            result, lower = self.planner.plan_focal(start, goal, w, _penalty(others, self.base.cols), table=table)
+        except ValueError:
+            return [], float('inf'), float('inf')
+        return result.path, result.cost, lower
+
+def _init_worker(name, rows, cols, base, allow_diagonal, prevent_corner_cutting):
+    shm, grid = attach_grid(name, rows, cols)
+    _worker['shm'] = shm
+    _worker['solve'] = _LowLevel(grid, base, allow_diagonal, prevent_corner_cutting)
+
+def _solve(task):
+    return _worker['solve'](*task)
+
+def _penalty(paths, cols):
+    # penalty(i, j, t): conflicts a move i -> j at tick t would have with these paths.
+    held, moves, parked = {}, {}, {}
+    for path in paths:
+        if not path: continue
+        cells = [r * cols + c for r, c in path]
+        for t, i in enumerate(cells):
+            held[i, t] = held.get((i, t), 0) + 1
+            if t: moves[cells[t - 1], i, t - 1] = moves.get((cells[t - 1], i, t - 1), 0) + 1
+        end = len(cells) - 1
+        parked[cells[-1]] = min(end, parked.get(cells[-1], end))
+    def penalty(i, j, t):
+        n = held.get((j, t + 1), 0) + (i != j and moves.get((j, i, t), 0))
+        return n + (t + 1 > parked.get(j, t + 1))
+    return penalty
+
+def at(path, t):
+    return path[min(t, len(path) - 1)]
+
+def find_conflicts(paths):
+    # Yields (a, b, kind, data) for every pair of agents that collide, in tick order:
+    # ('vertex', (cell, t)) when both hold cell at tick t, ('edge', (u, v, t)) when a
+    # moves u -> v while b moves v -> u between ticks t and t + 1.
+    live = [k for k, path in enumerate(paths) if path]
+    horizon = max((len(paths[k]) for k in live), default=0)
+    for t in range(horizon):
+        seen = {}
+        for k in live:
+            cell = at(paths[k], t)
+            if cell in seen:
+                yield seen[cell], k, 'vertex', (cell, t)
+            else:
+                seen[cell] = k
+        if t + 1 < horizon:
+            for k in live:
+                u, v = at(paths[k], t), at(paths[k], t + 1)
+                other = seen.get(v)
+                if u != v and other is not None and other != k and at(paths[other], t + 1) == u and other < k:
+                    yield other, k, 'edge', (v, u, t)
+
+def _check_agents(grid, agents):
+    agents = [(tuple(s), tuple(g)) for s, g in agents]
+    starts = [s for s, _ in agents]
+    goals = [g for _, g in agents]
+    if len(set(starts)) < len(starts) or len(set(goals)) < len(goals):
+        raise ValueError("Agents must have distinct starts and distinct goals")
+    return agents
+
+def _results(paths, costs):
+    out = []
+    for path, cost in zip(paths, costs):
+        result = SearchResult()
+        result.path, result.cost = path, cost
+        out.append(result)
+    return out
+
+def cooperative_astar(grid, agents, obstacles=(), allow_diagonal=True, prevent_corner_cutting=True, horizon=None):
+    # Fast mode: plans agents one after another in the given order, each around the paths
+    # reserved by those before it. Not complete; an agent that finds no way through gets
+    # an empty path. Returns one SearchResult per agent.
+    agents = _check_agents(grid, agents)
+    rows, cols = len(grid), len(grid[0]) if grid else 0
+    table = ReservationTable(obstacles, rows, cols, [p for pair in agents for p in pair])
+    # Every start is held at tick 0, so later agents cannot plan through an agent still waiting there.
+    for (r, c), _ in agents:
+        table.hold(r * cols + c, 0)
+    planner = SpaceTimePlanner(grid, table, allow_diagonal, prevent_corner_cutting, horizon)
+    results = []
+    for start, goal in agents:
+        table.vertices[start[0] * cols + start[1]].discard(0)
+        result = planner.plan(start, goal)
+        # An agent with no way through stays where it is.
+        table.reserve_path(result.path or [start])
+        results.append(result)
+    return results
+
+class _Node:
+    __slots__ = ('constraints', 'paths', 'costs', 'lowers', 'cost', 'lower', 'conflicts')
+
+    def __init__(self, constraints, paths, costs, lowers):
+        self.constraints = constraints  # per agent, a tuple of ('vertex', (i, t)) / ('move', (i, j, t))
+        self.paths = paths
+        self.costs = costs
+        self.lowers = lowers
+        self.cost = sum(costs)
+        self.lower = sum(lowers)
+        self.conflicts = sum(1 for _ in find_conflicts(paths))
+
+def conflict_based_search(grid, agents, obstacles=(), allow_diagonal=True, prevent_corner_cutting=True,
+                          w=1.0, workers=None, max_nodes=5000):
+    # Conflict-Based Search (Sharon et al.); with w > 1, ECBS (Barer et al.): focal search
+    # at both levels keeps the sum of costs within w times the optimum while preferring
+    # fewer conflicts. The high level takes the most promising node of the constraint
+    # tree, finds its first conflict and splits it into two children that each forbid it
+    # for one agent. The agents of the root and the two children are replanned in
+    # parallel over a process pool, sharing the grid once via shared memory.
+    # Returns one SearchResult per agent, or None if max_nodes runs out or no solution exists.
+    agents = _check_agents(grid, agents)
+    rows, cols = len(grid), len(grid[0]) if grid else 0
+    base = ReservationTable(obstacles, rows, cols, [p for pair in agents for p in pair])
+    workers = max(1, min(workers or os.cpu_count() or 1, len(agents)))
+    shm = pool = None
+    if workers > 1:
+        shm, rows, cols = publish_grid(grid)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(shm.name, rows, cols, base, allow_diagonal, prevent_corner_cutting))
+        run = lambda tasks: list(pool.map(_solve, tasks))
+    else:
+        solve = _LowLevel(grid, base, allow_diagonal, prevent_corner_cutting)
+        run = lambda tasks: [solve(*task) for task in tasks]
+    try:
+        empty = [()] * len(agents)
+        planned = run([(s, g, (), w, []) for s, g in agents])
+        if any(not path for path, _, _ in planned):
+            return None
+        root = _Node(empty, *map(list, zip(*planned)))
+        open_ = [root]
+        for _ in range(max_nodes):
+            if not open_: return None
+            node = _pick(open_, w)
+            conflict = next(find_conflicts(node.paths), None)
+            if conflict is None:
+                return _results(node.paths, node.costs)
+            a, b, kind, data = conflict
+            children = []
+            for k in (a, b):
+                if kind == 'vertex':
+                    (r, c), t = data
+                    constraint = ('vertex', (r * cols + c, t))
+                else:
+                    u, v, t = data
+                    if k == b: u, v = v, u
+                    constraint = ('move', (u[0] * cols + u[1], v[0] * cols + v[1], t))
+                constraints = list(node.constraints)
+                constraints[k] = constraints[k] + (constraint,)
+                children.append((k, constraints))
+            tasks = [(agents[k][0], agents[k][1], constraints[k], w,
+                      [p for j, p in enumerate(node.paths) if j != k]) for k, constraints in children]
+            for (k, constraints), (path, cost, lower) in zip(children, run(tasks)):
+                if not path: continue
+                paths, costs, lowers = list(node.paths), list(node.costs), list(node.lowers)
+                paths[k], costs[k], lowers[k] = path, cost, lower
+                open_.append(_Node(constraints, paths, costs, lowers))
+        return None
+    finally:
+        if pool is not None:
+            pool.shutdown()
+            shm.close()
+            shm.unlink()
+
+def _pick(open_, w):
+    # Among nodes whose cost is within w of the best lower bound, the one with the fewest
+    # conflicts (cheapest first on ties). With w = 1 that is plain CBS best-first order.
+    bound = w * min(node.lower for node in open_) + 1e-9
+    best = min((k for k, node in enumerate(open_) if node.cost <= bound),
+               key=lambda k: (open_[k].conflicts, open_[k].cost))
+    open_[best], open_[-1] = open_[-1], open_[best]
+    return open_.pop()
@@ -0,0 +1,26 @@
+# core/moves.py
+import math
+
+DIAG_COST = math.sqrt(2.0)
+
+# Grid moves as (dr, dc, step multiplier), orthogonal ones first so MOVES[:4] is the
+# 4-connected set. A move into a cell costs its multiplier times that cell's terrain.
+MOVES = ((0,1,1.0), (0,-1,1.0), (1,0,1.0), (-1,0,1.0),
+         (1,1,DIAG_COST), (1,-1,DIAG_COST), (-1,1,DIAG_COST), (-1,-1,DIAG_COST))
+
+def moves_for(allow_diagonal):
+    return MOVES if allow_diagonal else MOVES[:4]
+
+def is_open(grid, r, c):
+    return 0 <= r < len(grid) and 0 <= c < len(grid[r]) and grid[r][c] > 0
+
+def legal_moves(grid, r, c, allow_diagonal=True, prevent_corner_cutting=True):
+    # (nr, nc, step multiplier) of every move out of (r, c), which must be on the grid, that
+    # the movement rules allow: the target must be open and, without corner cutting, so
+    # must both cells a diagonal passes between.
+    rows, cols = len(grid), len(grid[r])
+    for dr, dc, mult in moves_for(allow_diagonal):
+        nr, nc = r + dr, c + dc
+        if not (0 <= nr < rows and 0 <= nc < cols) or grid[nr][nc] <= 0: continue
+        if dr and dc and prevent_corner_cutting and not (grid[nr][c] > 0 and grid[r][nc] > 0): continue
+        yield nr, nc, mult
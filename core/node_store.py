@@ -0,0 +1,37 @@
+# core/node_store.py
+from array import array
+
+INF = float('inf')
+
+# Flat per-cell search buffers indexed by r*cols+c. A cell's g/f/parent are only
+# meaningful when stamp[i] == generation and it is closed when closed[i] == generation,
+# so reset() starts a new search without touching the buffers.
+class NodeStore:
+    MAX_GENERATION = 2**32 - 1
+
+    def __init__(self, size):
+        self.size = size
+        self.g = array('d', [INF]) * size
+        self.f = array('d', [INF]) * size
+        self.parent = array('i', [-1]) * size
+        self.stamp = array('I', [0]) * size
+        self.closed = array('I', [0]) * size
+        self.generation = 0
+        self._partner = None
+
+    def reset(self):
+        self.generation += 1
+        if self.generation >= self.MAX_GENERATION:
+            self.stamp = array('I', [0]) * self.size
+            self.closed = array('I', [0]) * self.size
+            self.generation = 1
+        return self.generation
+
+    def fits(self, size):
+        return self.size == size
+
+    def partner(self):
+        # Second set of buffers for the backward half of a bidirectional search.
+        if self._partner is None:
+            self._partner = NodeStore(self.size)
+        return self._partner
@@ -12,4 +12,14 @@ class MovingObstacle:
         return pos if isinstance(pos, list) else [pos]
 
     def update(self):
-        self.phase += 1
\ No newline at end of file
+        self.phase += 1
+
+def occupancy(obstacles, rows, cols):
+    # Sparse {cell: cost} of every in-bounds cell the obstacles cover at their current
+    # phase; where obstacles overlap the lowest cost (most blocking) wins.
+    cells = {}
+    for obs in obstacles:
+        for r, c in obs.get_current_cells():
+            if 0 <= r < rows and 0 <= c < cols:
+                cells[(r, c)] = min(obs.cost, cells.get((r, c), obs.cost))
+    return cells
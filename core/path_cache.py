@@ -0,0 +1,74 @@
+# core/path_cache.py
+import sys
+from collections import OrderedDict
+
+# LRU cache of solved paths keyed by grid version plus every search parameter. Entries
+# are bounded both by count and by an estimate of their memory footprint.
+class PathCache:
+    TUPLE_BYTES = 64  # a (row, col) tuple with its two small ints
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (path, cost, nbytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(version, start, goal, algo, heuristic, weight, allow_diagonal, prevent_corner_cutting):
+        return (version, tuple(start), tuple(goal), algo, heuristic, weight, allow_diagonal, prevent_corner_cutting)
+
+    def __contains__(self, key):
+        # Membership only; unlike get() it neither counts nor refreshes the entry.
+        return key in self.entries
+
+    def get(self, key):
+        # Returns (path, cost) or None; a cached empty path means "known unreachable".
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key, path, cost):
+        nbytes = sys.getsizeof(path) + len(path) * self.TUPLE_BYTES
+        if nbytes > self.max_bytes: return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        self.entries[key] = (path, cost, nbytes)
+        self.bytes += nbytes
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, _, size) = self.entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def invalidate(self, current_version=None):
+        # Drop every entry computed against a grid version other than current_version.
+        stale = [k for k in self.entries if k[0] != current_version]
+        for k in stale:
+            self.bytes -= self.entries.pop(k)[2]
+        self.invalidations += len(stale)
+
+    def carry(self, version, cells):
+        # After a change that only raised costs at cells, no route got cheaper, so a path
+        # avoiding all of them is still optimal: re-key those entries from version - 1 to
+        # version and drop the rest.
+        cells = set(cells)
+        kept = OrderedDict()
+        for key, entry in self.entries.items():
+            if key[0] == version - 1 and cells.isdisjoint(entry[0]):
+                kept[(version,) + key[1:]] = entry
+            else:
+                self.bytes -= entry[2]
+                self.invalidations += 1
+        self.entries = kept
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "invalidations": self.invalidations}
@@ -0,0 +1,220 @@
+# core/spacetime.py
+import copy
+import heapq
+import math
+from core.engine import SearchResult
+from core.moves import moves_for
+from core.wavefront import distance_field
+
+WAIT = (0, 0, 1.0)  # staying put for one tick costs one orthogonal step on the cell
+
+# Moving-obstacle schedules folded into one compact table. Every obstacle repeats after
+# len(positions) ticks, so the whole set repeats after their lcm (the period) and each
+# covered cell only needs a bitmask over the phases of one period. Tick 0 is the
+# obstacles' current phase; cells in `protected` (start, goal, waypoints) are never
+# covered, as GridState.step_obstacles applies them.
+# On top of the schedules the table holds absolute reservations: ticks at which other
+# agents hold a cell, moves forbidden at a tick (swaps, or search constraints) and cells
+# agents have parked on for good. Past `until` only the periodic part is left.
+class ReservationTable:
+    def __init__(self, obstacles, rows, cols, protected=()):
+        self.rows = rows
+        self.cols = cols
+        self.period = 1
+        for obs in obstacles:
+            self.period = math.lcm(self.period, max(1, len(obs.positions)))
+        self.blocked = {}  # flat index -> bitmask of the phases it is a wall in
+        self.costs = {}    # (flat index, phase) -> cost, for obstacles that are not walls
+        self.vertices = {}  # flat index -> set of ticks it is held at
+        self.moves = set()  # (from, to, tick) moves forbidden at tick
+        self.parked = {}    # flat index -> tick from which it is held for good
+        self.until = 0
+        protected = set(protected)
+        for obs in obstacles:
+            n = len(obs.positions)
+            for phase in range(self.period if n else 0):
+                pos = obs.positions[(obs.phase + phase) % n]
+                for r, c in (pos if isinstance(pos, list) else [pos]):
+                    if not (0 <= r < rows and 0 <= c < cols) or (r, c) in protected: continue
+                    i = r * cols + c
+                    if obs.cost > 0:
+                        self.costs[i, phase] = min(obs.cost, self.costs.get((i, phase), obs.cost))
+                    else:
+                        self.blocked[i] = self.blocked.get(i, 0) | (1 << phase)
+
+    def copy(self):
+        # The schedules are shared; the absolute reservations are the copy's own.
+        table = copy.copy(self)
+        table.vertices = {i: set(ticks) for i, ticks in self.vertices.items()}
+        table.moves = set(self.moves)
+        table.parked = dict(self.parked)
+        return table
+
+    def is_blocked(self, i, t):
+        mask = self.blocked.get(i)
+        if mask is not None and (mask >> (t % self.period)) & 1: return True
+        if self.vertices and t in self.vertices.get(i, ()): return True
+        return bool(self.parked) and t >= self.parked.get(i, math.inf)
+
+    def can_stay(self, i, t):
+        # True if an agent arriving at i at tick t can stay there for good.
+        return (not self.blocked.get(i) and i not in self.parked
+                and all(held < t for held in self.vertices.get(i, ())))
+
+    def cost(self, i, t, static):
+        if self.is_blocked(i, t): return 0.0
+        return self.costs.get((i, t % self.period), static) if self.costs else static
+
+    def hold(self, i, t):
+        self.vertices.setdefault(i, set()).add(t)
+        self.until = max(self.until, t + 1)
+
+    def forbid(self, i, j, t):
+        self.moves.add((i, j, t))
+        self.until = max(self.until, t + 1)
+
+    def reserve_path(self, path, t0=0):
+        # Reserve a timed path (one cell per tick from t0) for another agent, which then
+        # stays on its last cell.
+        cols = self.cols
+        cells = [r * cols + c for r, c in path]
+        for k, i in enumerate(cells):
+            self.hold(i, t0 + k)
+            if k and i != cells[k - 1]:
+                self.forbid(i, cells[k - 1], t0 + k - 1)  # no swapping places
+        if cells:
+            end = t0 + len(cells) - 1
+            self.parked[cells[-1]] = min(end, self.parked.get(cells[-1], end))
+            self.until = max(self.until, end + 1)
+
+# A* through (cell, tick) states: each tick the agent moves to a neighbour or waits, and
+# may not enter a cell held on arrival, swap places with an obstacle or make a forbidden
+# move; it only stops on the goal once nothing else will need the cell. Since the table
+# repeats every period ticks past table.until, states (i, t) and (i, t + period) there
+# have the same future and the cheaper one dominates, so the closed set folds those ticks
+# modulo the period and the search stays finite; `horizon` optionally caps the arrival
+# tick as well. h is the exact static cost-to-goal, which waiting and blocking only add to.
+class SpaceTimePlanner:
+    def __init__(self, grid, table, allow_diagonal=True, prevent_corner_cutting=True, horizon=None):
+        self.grid = grid  # static costs, without the obstacles stamped in
+        self.table = table
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows else 0
+        self.allow_diagonal = allow_diagonal
+        self.prevent_corner_cutting = prevent_corner_cutting
+        self.horizon = horizon
+        self.fields = {}  # goal -> static cost-to-goal field, reused across plans
+
+    def h_values(self, goal):
+        field = self.fields.get(goal)
+        if field is None:
+            field = distance_field(self.grid, [goal], self.allow_diagonal, self.prevent_corner_cutting,
+                                   reverse=True).ravel().tolist()
+            self.fields[goal] = field
+        return field
+
+    def plan(self, start, goal, t0=0, check=None, table=None):
+        # Returns a SearchResult whose path holds one cell per tick from tick t0 (waits
+        # repeat the cell), or an empty path if the goal cannot be reached in time.
+        # check() is called now and then so a worker can cancel the search; table
+        # replaces self.table for this plan.
+        return self._search(start, goal, t0, check, table or self.table, 1.0, None)[0]
+
+    def plan_focal(self, start, goal, w, penalty, t0=0, check=None, table=None):
+        # Focal search (A*eps): expands, among open states with f <= w * min f, the one
+        # that has run up the least penalty(i, j, t) for its moves, so the path costs at
+        # most w times the optimum. Returns (SearchResult, lower bound on the optimum).
+        return self._search(start, goal, t0, check, table or self.table, w, penalty)
+
+    def _search(self, start, goal, t0, check, table, w, penalty):
+        rows, cols, grid = self.rows, self.cols, self.grid
+        if not all(0 <= r < rows and 0 <= c < cols and grid[r][c] > 0 for r, c in (start, goal)):
+            raise ValueError("Start or goal is blocked or out of bounds")
+        result = SearchResult()
+        h = self.h_values(tuple(goal))
+        s, t_goal = start[0] * cols + start[1], goal[0] * cols + goal[1]
+        if h[s] == math.inf:
+            return result, math.inf
+        moves = moves_for(self.allow_diagonal) + (WAIT,)
+        corner = self.prevent_corner_cutting
+        period, until, horizon = table.period, table.until, self.horizon
+        span = until + period
+        blocked, forbidden = table.is_blocked, table.moves
+
+        def open_at(r, c, t):
+            return 0 <= r < rows and 0 <= c < cols and grid[r][c] > 0 and not blocked(r * cols + c, t)
+
+        def fold(i, t):
+            return i * span + (t if t < until else until + (t - until) % period)
+
+        start_key = fold(s, t0)
+        g = {start_key: 0.0}
+        d = {start_key: 0}  # focal mode: penalty run up so far
+        parent = {start_key: None}
+        tick = {start_key: t0}
+        closed = set()
+        heap = [(h[s], 0, s, t0, 0.0)]  # open states by f
+        focal = [(0, h[s], 0, s, t0, 0.0)] if penalty is not None else None
+        pending = []  # focal mode: open states not yet within the bound
+        counter = 1
+        expansions = 0
+
+        def stale(key, t, gv):
+            return key in closed or tick[key] != t or g[key] != gv
+
+        while heap:
+            if focal is None:
+                f, _, i, t, gv = heapq.heappop(heap)
+                key = fold(i, t)
+                if stale(key, t, gv): continue
+                fmin = f
+            else:
+                while heap and stale(fold(heap[0][2], heap[0][3]), heap[0][3], heap[0][4]):
+                    heapq.heappop(heap)
+                if not heap: break
+                fmin = heap[0][0]
+                while pending and pending[0][0] <= w * fmin:
+                    f, n, i, t, gv = heapq.heappop(pending)
+                    heapq.heappush(focal, (d[fold(i, t)], f, n, i, t, gv))
+                _, _, _, i, t, gv = heapq.heappop(focal)
+                key = fold(i, t)
+                if stale(key, t, gv): continue
+            closed.add(key)
+            expansions += 1
+            if check is not None and not expansions & 1023: check()
+            if i == t_goal and table.can_stay(i, t):
+                path = []
+                while key is not None:
+                    path.append(divmod(key // span, cols))
+                    key = parent[key]
+                path.reverse()
+                result.path, result.cost, result.expansions = path, gv, expansions
+                return result, (fmin if focal is not None else gv)
+            nt = t + 1
+            if horizon is not None and nt > horizon: continue
+            r, c = divmod(i, cols)
+            for dr, dc, mult in moves:
+                nr, nc = r + dr, c + dc
+                if not open_at(nr, nc, nt): continue
+                j = nr * cols + nc
+                if h[j] == math.inf: continue
+                if dr or dc:
+                    if blocked(j, t) and blocked(i, nt): continue  # swap with an obstacle
+                    if forbidden and (i, j, t) in forbidden: continue
+                    if dr and dc and corner and not (open_at(r + dr, c, nt) and open_at(r, c + dc, nt)): continue
+                nkey = fold(j, nt)
+                if nkey in closed: continue
+                ng = gv + mult * table.cost(j, nt, grid[nr][nc])
+                if nkey not in g or ng < g[nkey]:
+                    g[nkey], parent[nkey], tick[nkey] = ng, key, nt
+                    entry = (ng + h[j], counter, j, nt, ng)
+                    heapq.heappush(heap, entry)
+                    if focal is not None:
+                        d[nkey] = d[key] + penalty(i, j, t)
+                        if entry[0] <= w * fmin:
+                            heapq.heappush(focal, (d[nkey],) + entry)
+                        else:
+                            heapq.heappush(pending, entry)
+                    counter += 1
+        result.expansions = expansions
+        return result, math.inf
@@ -0,0 +1,129 @@
+# core/wavefront.py
+import numpy as np
+from core.moves import moves_for
+
+def cost_array(grid):
+    return np.asarray(grid, dtype=np.float64).reshape(len(grid), len(grid[0]) if len(grid) else 0)
+
+def distance_field(grid, sources, allow_diagonal=True, prevent_corner_cutting=True, reverse=False):
+    # Cost of the cheapest path from any source to every cell (or, with reverse=True, from
+    # every cell to the nearest source) as a float64 ndarray; unreachable cells are inf.
+    # A move into a cell pays step * its cost, matching PathfindingEngine.
+    cost = cost_array(grid)
+    rows, cols = cost.shape
+    # One blocked cell of padding on every side keeps neighbour indices in range.
+    width = cols + 2
+    padded = np.zeros((rows + 2, width))
+    padded[1:-1, 1:-1] = cost
+    flat_cost = padded.ravel()
+    open_ = flat_cost > 0
+    dist = np.full(flat_cost.shape, np.inf)
+    seeds = np.array(sorted({(r + 1) * width + c + 1 for r, c in sources
+                             if 0 <= r < rows and 0 <= c < cols and cost[r, c] > 0}), dtype=np.int64)
+    if len(seeds):
+        dist[seeds] = 0.0
+        if not allow_diagonal and np.all(cost[cost > 0] == 1.0):
+            _bfs(open_, dist, seeds, width)
+        else:
+            _relax(flat_cost, open_, dist, seeds, width, allow_diagonal, prevent_corner_cutting, reverse)
+    return dist.reshape(rows + 2, width)[1:-1, 1:-1].copy()
+
+def _bfs(open_, dist, frontier, width):
+    # Uniform 4-connected grids: breadth-first layers over the frontier's indices only.
+    level = 0.0
+    offsets = [dr * width + dc for dr, dc, _ in moves_for(False)]
+    while len(frontier):
+        level += 1.0
+        targets = np.unique(np.concatenate([frontier + off for off in offsets]))
+        targets = targets[open_[targets] & np.isinf(dist[targets])]
+        dist[targets] = level
+        frontier = targets
+
+def _relax(cost, open_, dist, seeds, width, allow_diagonal, prevent_corner_cutting, reverse):
+    # Bucketed label-correcting relaxation: cells within the current distance bucket push
+    # to their neighbours together; improved neighbours join the pending frontier.
+    moves = moves_for(allow_diagonal)
+    delta = float(cost[open_].min())
+    pending = seeds
+    threshold = delta
+    while len(pending):
+        near = dist[pending] <= threshold
+        current = pending[near]
+        if not len(current):
+            threshold = float(dist[pending].min()) + delta
+            continue
+        waiting = pending[~near]
+        found = []
+        for dr, dc, mult in moves:
+            targets = current + (dr * width + dc)
+            ok = open_[targets]
+            if dr and dc and prevent_corner_cutting:
+                ok &= open_[current + dr * width] & open_[current + dc]
+            src, targets = current[ok], targets[ok]
+            cand = dist[src] + mult * (cost[src] if reverse else cost[targets])
+            better = cand < dist[targets]
+            if better.any():
+                targets, cand = targets[better], cand[better]
+                np.minimum.at(dist, targets, cand)
+                found.append(targets)
+        pending = np.unique(np.concatenate([waiting] + found)) if found else waiting
+
+def component_labels(grid, allow_diagonal=True, prevent_corner_cutting=True):
+    # Connected components of open cells under the movement rules (every move can be
+    # taken back, so reachability is symmetric) as an int32 (rows, cols) ndarray: each
+    # cell holds the smallest flat index in its component, blocked cells -1. A diagonal
+    # move that may not cut corners has both corner cells open, which already join its
+    # ends, so only diagonals that cut corners need edges of their own.
+    cost = cost_array(grid)
+    rows, cols = cost.shape
+    width = cols + 2
+    padded = np.zeros((rows + 2, width))
+    padded[1:-1, 1:-1] = cost
+    open_ = padded.ravel() > 0
+    cells = np.flatnonzero(open_)
+    moves = moves_for(allow_diagonal and not prevent_corner_cutting)
+    us, vs = [], []
+    for dr, dc, _ in moves[::2]:  # one move of each opposite pair
+        ok = open_[cells + dr * width + dc]
+        us.append(cells[ok])
+        vs.append(cells[ok] + dr * width + dc)
+    u, v = np.concatenate(us), np.concatenate(vs)
+    # Shiloach-Vishkin style: hook the larger root of every edge that still spans two
+    # trees onto the smaller, then flatten every tree to its root, until no edge spans two.
+    parent = np.arange(open_.size)
+    while len(u):
+        pu, pv = parent[u], parent[v]
+        spans = pu != pv
+        u, v, pu, pv = u[spans], v[spans], pu[spans], pv[spans]
+        if not len(u): break
+        np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent): break
+            parent = jumped
+    inner = parent.reshape(rows + 2, width)[1:-1, 1:-1]
+    # Back from padded indices to the grid's own flat indices.
+    out = (inner // width - 1) * cols + inner % width - 1
+    out[cost <= 0] = -1
+    return out.astype(np.int32)
+
+def trace_path(field, grid, target, allow_diagonal=True, prevent_corner_cutting=True):
+    # Walk a forward distance field back from target to its source. Returns [] if unreachable.
+    rows, cols = field.shape
+    r, c = target
+    if not np.isfinite(field[r, c]): return []
+    path = [(r, c)]
+    moves = moves_for(allow_diagonal)
+    while field[r, c] > 0:
+        best, nxt = np.inf, None
+        for dr, dc, mult in moves:
+            pr, pc = r - dr, c - dc
+            if not (0 <= pr < rows and 0 <= pc < cols) or grid[pr][pc] <= 0: continue
+            if dr and dc and prevent_corner_cutting and not (grid[pr][c] > 0 and grid[r][pc] > 0): continue
+            cand = field[pr, pc] + mult * grid[r][c]
+            if cand < best: best, nxt = cand, (pr, pc)
+        if nxt is None or field[nxt] >= field[r, c]: return []
+        r, c = nxt
+        path.append(nxt)
+    path.reverse()
+    return path
@@ -0,0 +1,148 @@
+# core/waypoints.py
+from core.batch import solve_many_batch
+from core.engine import PathfindingEngine
+from core.wavefront import distance_field, trace_path
+
+INF = float('inf')
+EXACT_LIMIT = 10      # Held-Karp up to this many waypoints, 2-opt/Or-opt beyond
+PARALLEL_MIN_POINTS = 6
+
+def distance_matrix(grid, points, allow_diagonal=True, prevent_corner_cutting=True, adjacency=None, workers=None,
+                    method="dijkstra", check=None, known=None):
+    # legs[i][j] = (path, cost) from points[i] to points[j], from one one-to-many Dijkstra
+    # per point. Runs in a process pool once there are enough points to pay for it.
+    # method="wavefront" builds one NumPy distance field per point instead. check() is
+    # called between rows (and inside in-process searches) so a worker can cancel.
+    # known = {(i, j): (path, cost)} holds legs already solved; a point whose outgoing
+    # legs are all known is not searched from.
+    check = check or (lambda: None)
+    known = known or {}
+    points = [tuple(p) for p in points]
+    n = len(points)
+    legs = [[None] * n for _ in range(n)]
+    sources = []
+    for i, p in enumerate(points):
+        if all((i, j) in known for j in range(n) if j != i):
+            legs[i] = [known[i, j] if j != i else ([p], 0.0) for j in range(n)]
+        else:
+            sources.append(i)
+    if method == "wavefront":
+        rows = ((k, _wavefront_legs(grid, points[i], points, allow_diagonal, prevent_corner_cutting))
+                for k, i in enumerate(sources))
+    elif len(sources) >= PARALLEL_MIN_POINTS and workers != 1:
+        rows = solve_many_batch(grid, [points[i] for i in sources], points, allow_diagonal, prevent_corner_cutting, workers)
+    else:
+        engine = PathfindingEngine(grid, algo="Dijkstra", allow_diagonal=allow_diagonal,
+                                   prevent_corner_cutting=prevent_corner_cutting, adjacency=adjacency)
+        rows = ((k, {t: (res.path, res.cost) for t, res in engine.solve_many(points[i], points, check).items()})
+                for k, i in enumerate(sources))
+    for k, found in rows:
+        check()
+        legs[sources[k]] = [found[p] for p in points]
+    return legs
+
+def _wavefront_legs(grid, source, points, allow_diagonal, prevent_corner_cutting):
+    field = distance_field(grid, [source], allow_diagonal, prevent_corner_cutting)
+    found = {}
+    for p in points:
+        path = trace_path(field, grid, p, allow_diagonal, prevent_corner_cutting)
+        found[tuple(p)] = (path, float(field[p]) if path else INF)
+    return found
+
+def route_cost(cost, order):
+    return sum(cost[a][b] for a, b in zip(order, order[1:]))
+
+def held_karp(cost, n):
+    # Exact order for a path 0 -> {1..n-2} -> n-1 over an asymmetric cost matrix.
+    mids = list(range(1, n - 1))
+    m = len(mids)
+    if m == 0: return [0, n - 1]
+    best = {}
+    for k, v in enumerate(mids):
+        best[(1 << k, k)] = (cost[0][v], -1)
+    for mask in range(1, 1 << m):
+        for k in range(m):
+            if not mask & (1 << k) or (mask, k) not in best: continue
+            base = best[(mask, k)][0]
+            if base == INF: continue
+            for k2 in range(m):
+                if mask & (1 << k2): continue
+                key = (mask | (1 << k2), k2)
+                cand = base + cost[mids[k]][mids[k2]]
+                if cand < best.get(key, (INF, -1))[0]:
+                    best[key] = (cand, k)
+    full = (1 << m) - 1
+    end, last = INF, -1
+    for k in range(m):
+        if (full, k) in best and best[(full, k)][0] + cost[mids[k]][n - 1] < end:
+            end, last = best[(full, k)][0] + cost[mids[k]][n - 1], k
+    if last < 0: return list(range(n))
+    order = []
+    mask = full
+    while last >= 0:
+        order.append(mids[last])
+        mask, last = mask ^ (1 << last), best[(mask, last)][1]
+    return [0] + order[::-1] + [n - 1]
+
+def improve_order(cost, order):
+    # 2-opt segment reversals and Or-opt moves of 1-3 waypoints, with full re-costing
+    # because legs are asymmetric. Endpoints stay fixed.
+    best = route_cost(cost, order)
+    improved = True
+    while improved:
+        improved = False
+        n = len(order)
+        for i in range(1, n - 2):
+            for j in range(i + 1, n - 1):
+                cand = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                c = route_cost(cost, cand)
+                if c < best - 1e-9:
+                    order, best, improved = cand, c, True
+        for size in (1, 2, 3):
+            for i in range(1, n - 1 - size + 1):
+                seg = order[i:i + size]
+                rest = order[:i] + order[i + size:]
+                for j in range(1, len(rest)):
+                    if j == i: continue
+                    cand = rest[:j] + seg + rest[j:]
+                    c = route_cost(cost, cand)
+                    if c < best - 1e-9:
+                        order, best, improved = cand, c, True
+                        break
+                if improved: break
+    return order
+
+def nearest_neighbor(cost, n):
+    order = [0]
+    left = set(range(1, n - 1))
+    while left:
+        nxt = min(left, key=lambda k: cost[order[-1]][k])
+        order.append(nxt)
+        left.discard(nxt)
+    return order + [n - 1]
+
+def plan_route(grid, start, waypoints, goal, allow_diagonal=True, prevent_corner_cutting=True,
+               adjacency=None, workers=None, method="dijkstra", check=None):
+    # Visit every waypoint between start and goal in the cheapest order found. Returns
+    # (waypoint order as indices into waypoints, stitched path, cost); path is [] if any
+    # waypoint is unreachable.
+    points = [tuple(start)] + [tuple(w) for w in waypoints] + [tuple(goal)]
+    legs = distance_matrix(grid, points, allow_diagonal, prevent_corner_cutting, adjacency, workers, method, check)
+    return route_from_legs(legs)
+
+def route_from_legs(legs):
+    # plan_route over a ready distance_matrix of start, waypoints..., goal.
+    n = len(legs)
+    cost = [[legs[i][j][1] if i != j else 0.0 for j in range(n)] for i in range(n)]
+    if n - 2 <= EXACT_LIMIT:
+        order = held_karp(cost, n)
+    else:
+        order = improve_order(cost, nearest_neighbor(cost, n))
+    total = route_cost(cost, order)
+    if total == INF:
+        return [k - 1 for k in order[1:-1]], [], INF
+    path = []
+    for a, b in zip(order, order[1:]):
+        leg = legs[a][b][0]
+        path.extend(leg[1:] if path else leg)
+    return [k - 1 for k in order[1:-1]], path, total
@@ -1,4 +1,5 @@
 # main.py
+import multiprocessing
 import tkinter as tk
 from ui.app import AStarApp
 
@@ -11,4 +12,7 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # The frozen (PyInstaller) build starts process-pool workers by re-running this
+    # executable; freeze_support lets them run their task instead of opening the GUI.
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
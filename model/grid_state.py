@@ -1,6 +1,7 @@
 # model/grid_state.py
-from collections import deque
-from typing import Deque, List, Tuple
+from typing import Callable, List, Tuple
+from core.obstacles import occupancy
+from model.history import EditHistory
 
 class GridState:
     def __init__(self, rows=32, cols=52):
@@ -16,18 +17,76 @@ class GridState:
         self.fov_radius = 5
         self.visible_cells = set()
         self.moving_obstacles = []
-        self.undo_stack: Deque = deque(maxlen=50)
-        self.redo_stack: Deque = deque(maxlen=50)
-
-    def save_undo(self):
-        self.undo_stack.append((
-            [row[:] for row in self.grid],
-            self.start,
-            self.goal,
-            self.waypoints[:]
-        ))
-        self.redo_stack.clear()
-
-    def restore_from_undo(self, state):
-        self.grid, self.start, self.goal, self.waypoints = state
-        self.original_grid = [row[:] for row in self.grid]
\ No newline at end of file
+        self.obstacle_cells = {}  # dynamic overlay currently applied to grid: cell -> cost
+        self.history = EditHistory()
+        self.version = 0
+        self.listeners: List[Callable] = []
+
+    def touch(self, cells=None, previous=None):
+        # Call after editing grid cells; cells=None means the whole grid (or the grid object) changed.
+        # previous = {cell: cost before} marks a change of the moving-obstacle overlay only,
+        # with the static layer (original_grid) untouched.
+        self.version += 1
+        for listener in self.listeners:
+            listener(cells, previous)
+
+    def step_obstacles(self):
+        # Advance every moving obstacle one phase. original_grid is the static layer and
+        # the obstacles a sparse overlay on it, so only cells whose occupancy changed are
+        # rewritten in grid. Start, goal and waypoints are never covered. Returns
+        # {changed cell: its cost before}.
+        for obs in self.moving_obstacles:
+            obs.update()
+        protected = {self.start, self.goal, *self.waypoints}
+        now = {cell: cost for cell, cost in occupancy(self.moving_obstacles, self.rows, self.cols).items()
+               if cell not in protected}
+        before = self.obstacle_cells
+        changed = {}
+        for cell in before.keys() | now.keys():
+            r, c = cell
+            if not (0 <= r < self.rows and 0 <= c < self.cols): continue
+            value = now.get(cell, self.original_grid[r][c])
+            if self.grid[r][c] != value:
+                changed[cell] = self.grid[r][c]
+                self.grid[r][c] = value
+        self.obstacle_cells = now
+        return changed
+
+    def points(self):
+        return self.start, self.goal, tuple(self.waypoints)
+
+    def begin_edit(self):
+        # Opens a history entry; a stroke keeps it open across many cells until end_edit.
+        self.history.begin(self.points())
+
+    def set_cell(self, r, c, value):
+        # Static edit of one cell, recorded in the open entry. A moving obstacle on the
+        # cell keeps showing until it moves off.
+        self.history.record(r, c, self.original_grid[r][c], value)
+        self.original_grid[r][c] = value
+        if (r, c) not in self.obstacle_cells:
+            self.grid[r][c] = value
+
+    def end_edit(self):
+        self.history.end(self.points())
+
+    def undo(self):
+        return self.apply_history(backward=True)
+
+    def redo(self):
+        return self.apply_history(backward=False)
+
+    def apply_history(self, backward):
+        # Returns the cells that changed, or None if there was nothing to undo/redo.
+        self.end_edit()
+        step = self.history.step(backward)
+        if step is None: return None
+        cells, (self.start, self.goal, waypoints) = step
+        self.waypoints = list(waypoints)
+        for (r, c), value in cells.items():
+            self.original_grid[r][c] = value
+            if (r, c) not in self.obstacle_cells:
+                self.grid[r][c] = value
+        changed = list(cells)
+        self.touch(changed)
+        return changed
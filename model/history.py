@@ -0,0 +1,74 @@
+# model/history.py
+from collections import deque
+
+# Undo/redo as a log of edits rather than grid snapshots. An entry holds only the cells
+# it changed ({(r, c): [old, new]} over the static grid) plus the start/goal/waypoints
+# before and after, so one click costs a cell and a whole drag stroke, opened by begin()
+# and closed by end(), coalesces into a single entry. The log is bounded by an estimate
+# of its memory footprint rather than by entry count; the oldest entries go first.
+class EditHistory:
+    CELL_BYTES = 200   # dict slot, (row, col) key and [old, new] list of one changed cell
+    ENTRY_BYTES = 400  # the entry itself and its two start/goal/waypoint records
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()
+        self.redo_stack = deque()
+        self.bytes = 0
+        self.open = None  # entry being recorded: {'cells': {...}, 'points': (before, after)}
+
+    @staticmethod
+    def size(entry):
+        before, after = entry['points']
+        return (EditHistory.ENTRY_BYTES + EditHistory.CELL_BYTES * len(entry['cells'])
+                + 16 * (len(before[2]) + len(after[2])))
+
+    def begin(self, points):
+        # Start an entry unless one is already open (a stroke in progress); points is the
+        # (start, goal, waypoints) the edit starts from.
+        if self.open is None:
+            self.open = {'cells': {}, 'points': (points, points)}
+
+    def record(self, r, c, old, new):
+        change = self.open['cells'].get((r, c))
+        if change is None:
+            self.open['cells'][r, c] = [old, new]
+        else:
+            change[1] = new
+
+    def end(self, points):
+        # Close the open entry; entries that changed nothing are dropped.
+        entry, self.open = self.open, None
+        if entry is None: return
+        entry['cells'] = {cell: change for cell, change in entry['cells'].items() if change[0] != change[1]}
+        entry['points'] = (entry['points'][0], points)
+        if not entry['cells'] and points == entry['points'][0]: return
+        # Release the redo branch first so the budget never evicts the entry being pushed.
+        for old in self.redo_stack:
+            self.bytes -= self.size(old)
+        self.redo_stack.clear()
+        self.push(self.undo_stack, entry)
+
+    def push(self, stack, entry):
+        stack.append(entry)
+        self.bytes += self.size(entry)
+        while self.bytes > self.max_bytes and len(self.undo_stack) + len(self.redo_stack) > 1:
+            oldest = self.undo_stack.popleft() if self.undo_stack else self.redo_stack.popleft()
+            self.bytes -= self.size(oldest)
+
+    def step(self, backward):
+        # Pops the next entry to undo (backward) or redo and moves it to the other stack;
+        # returns ({cell: value to set}, (start, goal, waypoints) to set) or None.
+        source, target = (self.undo_stack, self.redo_stack) if backward else (self.redo_stack, self.undo_stack)
+        if not source: return None
+        entry = source.pop()
+        self.bytes -= self.size(entry)
+        self.push(target, entry)
+        side = 0 if backward else 1
+        return {cell: change[side] for cell, change in entry['cells'].items()}, entry['points'][side]
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.bytes = 0
+        self.open = None
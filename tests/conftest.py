@@ -0,0 +1,38 @@
+# tests/conftest.py
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Movement rules as (allow_diagonal, prevent_corner_cutting).
+RULES = [(True, True), (True, False), (False, True)]
+
+
+def random_grid(rnd, rows, cols, costs=(1.0, 1.0, 2.0, 3.0, 0.0, 0.0)):
+    return [[rnd.choice(costs) for _ in range(cols)] for _ in range(rows)]
+
+
+def random_case(rnd, costs=(1.0, 1.0, 2.0, 3.0, 0.0, 0.0), low=5, high=20):
+    # A random grid with an open start and goal.
+    rows, cols = rnd.randint(low, high), rnd.randint(low, high)
+    grid = random_grid(rnd, rows, cols, costs)
+    start = (rnd.randrange(rows), rnd.randrange(cols))
+    goal = (rnd.randrange(rows), rnd.randrange(cols))
+    grid[start[0]][start[1]] = grid[goal[0]][goal[1]] = 1.0
+    return grid, start, goal
+
+
+def path_cost(grid, path, allow_diagonal=True, prevent_corner_cutting=True):
+    # Checks every step against the movement rules and returns what the path costs: each
+    # step pays the entered cell's cost, times sqrt(2) on a diagonal.
+    total = 0.0
+    for (r, c), (nr, nc) in zip(path, path[1:]):
+        assert max(abs(nr - r), abs(nc - c)) == 1 and grid[nr][nc] > 0
+        if r != nr and c != nc:
+            assert allow_diagonal
+            assert not prevent_corner_cutting or (grid[nr][c] > 0 and grid[r][nc] > 0)
+            total += math.sqrt(2.0) * grid[nr][nc]
+        else:
+            total += grid[nr][nc]
+    return total
@@ -0,0 +1,126 @@
+# tests/test_database.py
+import json
+import random
+import sqlite3
+import numpy as np
+import pytest
+from conftest import random_grid
+from core.artifacts import PATH, decode_path, encode_path, params_key
+from core.database import MapDatabase
+from core.grid_codec import grid_digest
+from core.landmarks import build_landmarks
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = MapDatabase(str(tmp_path / "maps.db"))
+    yield database
+    database.close()
+
+
+def test_save_and_get_round_trip(db):
+    grid = random_grid(random.Random(1), 9, 13)
+    map_id = db.save_map("m", 9, 13, grid, (0, 1), (8, 12), [(2, 3), (4, 5)], tags=" b, a ,,a", rating=4)
+    data = db.get_map_by_id(map_id)
+    assert data["grid"] == grid and (data["rows"], data["cols"]) == (9, 13)
+    assert data["start"] == (0, 1) and data["goal"] == (8, 12)
+    assert data["waypoints"] == [(2, 3), (4, 5)]
+    assert data["tags"] == ["a", "b"] and data["rating"] == 4 and data["name"] == "m"
+    assert db.get_map_by_id(map_id + 1) is None
+
+
+@pytest.mark.parametrize("order", ["created", "rating"])
+def test_keyset_pages_cover_the_catalog(db, order):
+    rnd = random.Random(2)
+    for k in range(23):
+        db.save_map(f"map {k}", 1, 1, [[1.0]], (0, 0), (0, 0), tags="even" if k % 2 == 0 else "odd",
+                    rating=rnd.randint(0, 5))
+    expected = db.query_maps(order=order, limit=100)
+    assert len(expected) == 23
+    pages, after = [], None
+    while True:
+        page = db.query_maps(order=order, limit=5, after=after)
+        if not page: break
+        pages.extend(page)
+        after = MapDatabase.cursor(page[-1], order)
+    assert pages == expected
+    if order == "rating":
+        assert [row[3] for row in pages] == sorted((row[3] for row in pages), reverse=True)
+
+
+def test_filters_and_counts(db):
+    db.save_map("alpha 100%", 1, 1, [[1.0]], (0, 0), (0, 0), tags="maze", rating=5)
+    db.save_map("beta_1", 1, 1, [[1.0]], (0, 0), (0, 0), tags="maze,open", rating=2)
+    db.save_map("gamma", 1, 1, [[1.0]], (0, 0), (0, 0), rating=0)
+    assert [row[1] for row in db.query_maps(tag="maze")] == ["beta_1", "alpha 100%"]
+    assert [row[1] for row in db.query_maps(min_rating=3)] == ["alpha 100%"]
+    # LIKE wildcards in the search text match literally.
+    assert [row[1] for row in db.query_maps(name="0%")] == ["alpha 100%"]
+    assert [row[1] for row in db.query_maps(name="a_1")] == ["beta_1"]
+    assert db.query_maps(name="_")[0][1] == "beta_1" and len(db.query_maps(name="_")) == 1
+    assert db.count_maps() == 3 and db.count_maps(tag="maze") == 2 and db.count_maps(tag="open", min_rating=3) == 0
+    assert db.list_tags() == ["maze", "open"]
+
+
+def test_landmarks_round_trip(db):
+    grid = random_grid(random.Random(3), 8, 11)
+    map_id = db.save_map("m", 8, 11, grid, (0, 0), (7, 10))
+    landmarks = build_landmarks(grid, k=3, allow_diagonal=True, prevent_corner_cutting=False)
+    db.save_landmarks(map_id, landmarks)
+    assert db.load_landmarks(map_id, True, True) is None
+    loaded = db.load_landmarks(map_id, True, False)
+    assert loaded.cells == landmarks.cells and loaded.digest == landmarks.digest
+    assert np.array_equal(loaded.forward, landmarks.forward) and np.array_equal(loaded.backward, landmarks.backward)
+    assert loaded.bind(grid) and loaded.matches(grid, True, False)
+    assert np.array_equal(loaded.bound((4, 4)), landmarks.bound((4, 4)))
+    edited = [row[:] for row in grid]
+    edited[0][0] = 9.0
+    assert not loaded.bind(edited)
+
+
+def test_artifacts_follow_the_grid_digest(db):
+    grid = [[1.0, 2.0], [1.0, 1.0]]
+    map_id = db.save_map("m", 2, 2, grid, (0, 0), (1, 1))
+    digest = grid_digest(grid)
+    params = params_key(start=(0, 0), goal=(1, 1))
+    db.save_artifact(map_id, digest, PATH, params, encode_path([(0, 0), (1, 1)], 1.5, 7))
+    [(kind, loaded, blob)] = db.load_artifacts(map_id, digest)
+    assert kind == PATH and loaded == json.loads(params)
+    assert decode_path(blob) == ([(0, 0), (1, 1)], 1.5, 7)
+    assert db.load_artifacts(map_id, digest, kind="field") == []
+    # Saving under a new digest drops what was stored for the old grid.
+    db.save_artifact(map_id, "other", PATH, params, encode_path([], 0.0))
+    assert db.load_artifacts(map_id, digest) == []
+    assert decode_path(db.load_artifacts(map_id, "other")[0][2]) == ([], 0.0, 0)
+
+
+def test_migrates_version_zero(tmp_path):
+    # The original schema: grids as JSON text, tags as a JSON list per map, user_version 0.
+    path = str(tmp_path / "old.db")
+    grid = [[1.0, 0.0, 2.5], [1.0, 1.0, 1.0]]
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE maps (id INTEGER PRIMARY KEY, name TEXT NOT NULL, rows INTEGER, cols INTEGER,
+                           grid TEXT, start TEXT, goal TEXT, waypoints TEXT, tags TEXT,
+                           rating INTEGER DEFAULT 0, created TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+    """)
+    conn.execute("INSERT INTO maps (name, rows, cols, grid, start, goal, waypoints, tags, rating) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                 ("old", 2, 3, json.dumps(grid), "[0, 0]", "[1, 2]", "[[1, 1]]", json.dumps(["x", " y ", ""]), 3))
+    conn.commit()
+    conn.close()
+    db = MapDatabase(path)
+    try:
+        assert db.conn.execute("PRAGMA user_version").fetchone()[0] == MapDatabase.SCHEMA_VERSION
+        [(map_id, name, tags, rating, _)] = db.query_maps()
+        assert (name, tags, rating) == ("old", ["x", "y"], 3)
+        data = db.get_map_by_id(map_id)
+        assert data["grid"] == grid and data["waypoints"] == [(1, 1)] and data["tags"] == ["x", "y"]
+        assert db.count_maps(tag="y") == 1
+    finally:
+        db.close()
+    # Opening it again finds nothing left to migrate.
+    db = MapDatabase(path)
+    try:
+        assert db.get_map_by_id(map_id)["grid"] == grid
+    finally:
+        db.close()
@@ -0,0 +1,36 @@
+# tests/test_grid_codec.py
+import random
+import pytest
+from core.grid_codec import HEADER, decode_grid, encode_grid, grid_digest
+
+
+@pytest.mark.parametrize("levels", [1, 2, 3, 4, 16, 256, 300])
+def test_round_trip(levels):
+    # 1..256 distinct costs pack at 1, 2, 4 or 8 bits; more fall back to raw float64s.
+    rnd = random.Random(levels)
+    costs = [0.0] + [1.0 + k * 0.37 for k in range(levels - 1)]
+    for rows, cols in ((1, 1), (3, 7), (17, 23), (40, 40)):
+        grid = [[rnd.choice(costs) for _ in range(cols)] for _ in range(rows)]
+        blob = encode_grid(grid)
+        assert decode_grid(blob) == grid
+        assert grid_digest(decode_grid(blob)) == grid_digest(grid)
+
+
+def test_exact_floats():
+    grid = [[0.1, 1e-300, 3.141592653589793], [2.0 / 3.0, 1e300, 0.0]]
+    assert decode_grid(encode_grid(grid)) == grid
+
+
+def test_maze_packs_to_a_bit_per_cell():
+    rnd = random.Random(0)
+    grid = [[rnd.choice([0.0, 1.0]) for _ in range(200)] for _ in range(200)]
+    blob = encode_grid(grid)
+    assert HEADER.unpack_from(blob)[1] == 1
+    assert len(blob) < HEADER.size + 16 + 200 * 200 // 8 + 64
+
+
+def test_rejects_unknown_version():
+    blob = bytearray(encode_grid([[1.0]]))
+    blob[0] = 99
+    with pytest.raises(ValueError):
+        decode_grid(bytes(blob))
@@ -0,0 +1,50 @@
+# tests/test_hpa.py
+import random
+import pytest
+from conftest import RULES, path_cost, random_case, random_grid
+from core.engine import PathfindingEngine
+from core.hpa import HierarchicalPlanner
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+def test_matches_dijkstra_reachability(diag, corner):
+    # HPA* is near-optimal: same reachability as Dijkstra, never a cheaper path.
+    rnd = random.Random(7)
+    for _ in range(300):
+        grid, start, goal = random_case(rnd)
+        ref = PathfindingEngine(grid, algo="Dijkstra", allow_diagonal=diag, prevent_corner_cutting=corner).solve(start, goal)
+        got = HierarchicalPlanner(grid, cluster_size=rnd.choice([3, 4, 5]), allow_diagonal=diag,
+                                  prevent_corner_cutting=corner).solve(start, goal)
+        assert bool(got.path) == bool(ref.path)
+        if got.path:
+            assert got.path[0] == start and got.path[-1] == goal
+            assert got.cost == pytest.approx(path_cost(grid, got.path, diag, corner))
+            assert got.cost >= ref.cost - 1e-9
+
+
+def test_corner_cutting_crossing():
+    # The only way through squeezes diagonally between two walls at a cluster corner.
+    grid = [[1.0] * 12 for _ in range(12)]
+    for r in range(12):
+        for c in range(12):
+            if (r < 6) != (c < 6): grid[r][c] = 0.0
+    planner = HierarchicalPlanner(grid, cluster_size=3, allow_diagonal=True, prevent_corner_cutting=False)
+    result = planner.solve((0, 0), (11, 11))
+    assert result.path and result.cost == pytest.approx(path_cost(grid, result.path, True, False))
+    grid[6][6] = 0.0
+    planner.update_cell(6, 6)
+    assert not planner.solve((0, 0), (11, 11)).path
+
+
+def test_update_cell_matches_rebuild():
+    rnd = random.Random(3)
+    for diag, corner in RULES:
+        grid = random_grid(rnd, 14, 17)
+        planner = HierarchicalPlanner(grid, cluster_size=4, allow_diagonal=diag, prevent_corner_cutting=corner)
+        for _ in range(60):
+            r, c = rnd.randrange(14), rnd.randrange(17)
+            grid[r][c] = rnd.choice([0.0, 1.0, 3.0])
+            planner.update_cell(r, c)
+        fresh = HierarchicalPlanner(grid, cluster_size=4, allow_diagonal=diag, prevent_corner_cutting=corner)
+        assert planner.nodes == fresh.nodes and planner.intra == fresh.intra
+        assert {k: v for k, v in planner.inter.items() if v} == {k: v for k, v in fresh.inter.items() if v}
@@ -0,0 +1,59 @@
+# tests/test_mapf.py
+import random
+import pytest
+from conftest import RULES, path_cost, random_grid
+from core.engine import PathfindingEngine
+from core.mapf import conflict_based_search, cooperative_astar, find_conflicts
+
+
+def timed_cost(grid, path, diag, corner):
+    # One cell per tick: a repeated cell is a wait, which costs one orthogonal step on it.
+    total = 0.0
+    for a, b in zip(path, path[1:]):
+        total += grid[a[0]][a[1]] if a == b else path_cost(grid, [a, b], diag, corner)
+    return total
+
+
+def random_agents(rnd, grid, n):
+    cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0])) if grid[r][c] > 0]
+    picks = rnd.sample(cells, 2 * n)
+    return list(zip(picks[:n], picks[n:]))
+
+
+def check_plan(grid, agents, results, diag, corner):
+    paths = [result.path for result in results]
+    assert not list(find_conflicts(paths))
+    for (start, goal), result in zip(agents, results):
+        assert result.path[0] == start and result.path[-1] == goal
+        assert timed_cost(grid, result.path, diag, corner) == pytest.approx(result.cost)
+        ref = PathfindingEngine(grid, algo="Dijkstra", allow_diagonal=diag, prevent_corner_cutting=corner).solve(start, goal)
+        assert result.cost >= ref.cost - 1e-9
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+def test_cbs_and_ecbs(diag, corner):
+    rnd = random.Random(11)
+    for _ in range(8):
+        grid = random_grid(rnd, 7, 7, costs=(1.0, 1.0, 1.0, 2.0, 0.0))
+        agents = random_agents(rnd, grid, 3)
+        optimal = conflict_based_search(grid, agents, allow_diagonal=diag, prevent_corner_cutting=corner, workers=1)
+        if optimal is None: continue
+        check_plan(grid, agents, optimal, diag, corner)
+        bounded = conflict_based_search(grid, agents, allow_diagonal=diag, prevent_corner_cutting=corner,
+                                        w=1.5, workers=1)
+        check_plan(grid, agents, bounded, diag, corner)
+        best = sum(result.cost for result in optimal)
+        assert sum(result.cost for result in bounded) <= 1.5 * best + 1e-9
+        fast = cooperative_astar(grid, agents, allow_diagonal=diag, prevent_corner_cutting=corner)
+        if all(result.path for result in fast):
+            check_plan(grid, agents, fast, diag, corner)
+            assert sum(result.cost for result in fast) >= best - 1e-9
+
+
+def test_cbs_resolves_swap():
+    # Two agents swapping ends of a corridor with one passing bay.
+    grid = [[1.0] * 5, [0.0, 0.0, 1.0, 0.0, 0.0]]
+    agents = [((0, 0), (0, 4)), ((0, 4), (0, 0))]
+    for workers in (1, 2):
+        results = conflict_based_search(grid, agents, allow_diagonal=False, workers=workers)
+        check_plan(grid, agents, results, False, True)
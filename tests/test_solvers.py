@@ -0,0 +1,139 @@
+# tests/test_solvers.py
+# Every exact solver against plain Dijkstra on small random grids.
+import random
+import pytest
+from conftest import RULES, path_cost, random_case
+from core.adjacency import Adjacency
+from core.dstar_lite import DStarLite
+from core.engine import PathfindingEngine, SearchResult
+from core.landmarks import build_landmarks
+from core.spacetime import ReservationTable, SpaceTimePlanner
+from core.waypoints import distance_matrix, route_from_legs
+from core.wavefront import distance_field
+
+CASES = 60
+
+
+def dijkstra(grid, start, goal, diag, corner):
+    return PathfindingEngine(grid, algo="Dijkstra", allow_diagonal=diag, prevent_corner_cutting=corner).solve(start, goal)
+
+
+def check(grid, start, goal, diag, corner, result, ref):
+    assert bool(result.path) == bool(ref.path)
+    if ref.path:
+        assert result.path[0] == start and result.path[-1] == goal
+        assert result.cost == pytest.approx(ref.cost)
+        assert path_cost(grid, result.path, diag, corner) == pytest.approx(ref.cost)
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+@pytest.mark.parametrize("algo", ["A*", "Bidirectional A*", "Bidirectional Dijkstra"])
+def test_engine_searches(algo, diag, corner):
+    rnd = random.Random(1)
+    for _ in range(CASES):
+        grid, start, goal = random_case(rnd)
+        ref = dijkstra(grid, start, goal, diag, corner)
+        for adjacency in (None, Adjacency(grid, diag, corner)):
+            engine = PathfindingEngine(grid, algo=algo, allow_diagonal=diag, prevent_corner_cutting=corner,
+                                       adjacency=adjacency)
+            check(grid, start, goal, diag, corner, engine.solve(start, goal), ref)
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+def test_jump_point_search(diag, corner):
+    rnd = random.Random(2)
+    for _ in range(CASES):
+        grid, start, goal = random_case(rnd, costs=(1.0, 1.0, 1.0, 0.0))
+        engine = PathfindingEngine(grid, algo="Jump Point Search", allow_diagonal=diag, prevent_corner_cutting=corner)
+        check(grid, start, goal, diag, corner, engine.solve(start, goal), dijkstra(grid, start, goal, diag, corner))
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+@pytest.mark.parametrize("algo", ["A*", "Bidirectional A*"])
+def test_landmarks(algo, diag, corner):
+    rnd = random.Random(3)
+    for _ in range(CASES):
+        grid, start, goal = random_case(rnd)
+        landmarks = build_landmarks(grid, k=4, allow_diagonal=diag, prevent_corner_cutting=corner)
+        engine = PathfindingEngine(grid, algo=algo, heuristic="Landmarks", allow_diagonal=diag,
+                                   prevent_corner_cutting=corner, landmarks=landmarks)
+        assert engine.landmarks is landmarks
+        check(grid, start, goal, diag, corner, engine.solve(start, goal), dijkstra(grid, start, goal, diag, corner))
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+def test_wavefront_distance_field(diag, corner):
+    rnd = random.Random(4)
+    for _ in range(CASES // 2):
+        grid, start, _ = random_case(rnd)
+        cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0])) if grid[r][c] > 0]
+        found = PathfindingEngine(grid, algo="Dijkstra", allow_diagonal=diag,
+                                  prevent_corner_cutting=corner).solve_many(start, cells)
+        forward = distance_field(grid, [start], diag, corner)
+        for cell, result in found.items():
+            assert forward[cell] == (pytest.approx(result.cost) if result.path else float('inf'))
+        # reverse=True is the cost from each cell to the source.
+        backward = distance_field(grid, [start], diag, corner, reverse=True)
+        for cell in rnd.sample(cells, min(5, len(cells))):
+            ref = dijkstra(grid, cell, start, diag, corner)
+            assert backward[cell] == (pytest.approx(ref.cost) if ref.path else float('inf'))
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+def test_dstar_lite_repairs(diag, corner):
+    rnd = random.Random(5)
+    for _ in range(CASES // 2):
+        grid, start, goal = random_case(rnd)
+        planner = DStarLite(grid, start, goal, diag, corner)
+        path = planner.compute()
+        check(grid, start, goal, diag, corner, _result(path, planner.cost()), dijkstra(grid, start, goal, diag, corner))
+        for _ in range(5):
+            # Walk a step, then change a few cells and let it repair.
+            if len(path) > 1:
+                start = path[1]
+                planner.move_start(start)
+            cells = [(rnd.randrange(len(grid)), rnd.randrange(len(grid[0]))) for _ in range(3)]
+            for r, c in cells:
+                if (r, c) not in (start, goal):
+                    grid[r][c] = rnd.choice([0.0, 1.0, 4.0])
+            path = planner.update_cells(cells)
+            check(grid, start, goal, diag, corner, _result(path, planner.cost()), dijkstra(grid, start, goal, diag, corner))
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+def test_space_time_without_obstacles(diag, corner):
+    # With nothing moving, waiting never pays, so the timed plan costs what Dijkstra does.
+    rnd = random.Random(6)
+    for _ in range(CASES // 2):
+        grid, start, goal = random_case(rnd, low=4, high=12)
+        table = ReservationTable([], len(grid), len(grid[0]))
+        result = SpaceTimePlanner(grid, table, diag, corner).plan(start, goal)
+        check(grid, start, goal, diag, corner, result, dijkstra(grid, start, goal, diag, corner))
+
+
+@pytest.mark.parametrize("diag,corner", RULES)
+def test_distance_matrix_legs(diag, corner):
+    rnd = random.Random(8)
+    for _ in range(10):
+        grid, start, goal = random_case(rnd)
+        open_cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0])) if grid[r][c] > 0]
+        points = [start] + rnd.sample(open_cells, 3) + [goal]
+        legs = distance_matrix(grid, points, diag, corner, workers=1)
+        for i, a in enumerate(points):
+            for j, b in enumerate(points):
+                if i == j: continue
+                ref = dijkstra(grid, a, b, diag, corner)
+                path, cost = legs[i][j]
+                assert bool(path) == bool(ref.path)
+                if path:
+                    assert cost == pytest.approx(ref.cost)
+        order, path, total = route_from_legs(legs)
+        if path:
+            assert path[0] == start and path[-1] == goal
+            assert path_cost(grid, path, diag, corner) == pytest.approx(total)
+
+
+def _result(path, cost):
+    result = SearchResult()
+    result.path, result.cost = path, cost
+    return result
@@ -3,8 +3,21 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import time
 import math
+from collections import deque
 from config import parse_args
-from core.engine import PathfindingEngine
+from core.adjacency import Adjacency
+from core.hpa import HierarchicalPlanner
+from core.dstar_lite import DStarLite
+from core.path_cache import PathCache
+from core.executor import SearchExecutor, stream_events, PROGRESS, ERROR
+from core.waypoints import distance_matrix, route_from_legs
+from core.spacetime import ReservationTable, SpaceTimePlanner
+from core.wavefront import distance_field, component_labels
+from core.artifacts import PATH, COMPONENTS, FIELD, params_key, encode_path, decode_path, encode_array, decode_array
+from core.grid_codec import grid_digest
+from core.heuristics import h_grid
+from core.landmarks import build_landmarks
+from core.engine import PathfindingEngine, EXPAND, OPEN, PATH_FOUND, EXHAUSTED, BACKWARD
 from core.maze import generate_maze
 from core.obstacles import MovingObstacle
 from core.database import MapDatabase
@@ -14,9 +27,15 @@ from utils.export import export_path_to_csv
 from ui.theme import apply_theme
 from ui.sidebar import Sidebar
 from ui.canvas_view import CanvasView
+from ui.bitmap_view import BitmapCanvasView
 from ui.dialogs import Dialogs
+from ui.scheduler import FrameScheduler
 import json
 
+def raises(before, after):
+    # Whether a cell's cost going from before to after can only lengthen paths (0 is a wall).
+    return after == before or after == 0 or 0 < before <= after
+
 class AStarApp:
     def __init__(self, root):
         self.root = root
@@ -24,16 +43,44 @@ class AStarApp:
         self.state = GridState(rows=30, cols=55)
         self.db = MapDatabase()
         self.animating = False
-        self.search_gen = None
+        self.executor = SearchExecutor()
+        self.search_task = None  # animated search streaming trace events
+        self.route_task = None   # headless waypoint/HPA* solve
+        self.prepare_task = None  # builds what the search needs before it starts
+        self.pending_cells = []  # cells edited while prepare_task runs; None = whole grid
+        self.replan_executor = SearchExecutor()
+        self.replan_task = None  # first D* Lite compute() for the replanner
+        self.replan_cells = []   # cells edited while replan_task runs; None = whole grid
+        self.pending_events = deque()
+        self.scheduler = FrameScheduler()
+        self.search_start_time = None
+        self.visited_count = 0
+        self.opened_count = 0
         self.last_path = []
-        self.last_g_values = {}
+        self.adjacency_cache = {}
+        self.hierarchy = None
+        self.replanner = None
+        self.timed_route = None  # (path, obstacle tick of path[0]) from Space-Time A*
+        self.route_tick = None
+        self.obstacle_tick = 0
+        self.path_cache = PathCache()
+        self.landmarks = None
+        self.map_id = None  # database id of the loaded map while the grid is unedited
+        self.map_digest = None  # grid_digest of that map, the key its artifacts are filed under
+        self.components = {}  # (allow_diagonal, prevent_corner) -> (grid version, component labels)
+        self.search_key = None  # cache key of the animated search, taken when it started
+        self.heatmap = None  # None, "distance" or "heuristic"
+        self.field_cache = None  # (key, ndarray) for the goal distance-field heatmap
+        self.state.listeners.append(self.on_grid_changed)
         self.obstacle_animation_id = None
         self.mode = "obstacle"
+        self.stroke_value = None  # value the current drag stroke paints in obstacle mode
         self.algo = "A*"
         self.heuristic = "Octile"
         self.weight = 1.0
         self.allow_diagonal = not self.args.no_diagonal
         self.prevent_corner = not self.args.allow_corner_cut
+        self.optimize_waypoints = True
 
         # Apply theme
         self.theme = apply_theme(root, None)
@@ -49,6 +96,9 @@ class AStarApp:
             "set_weight": self.set_weight,
             "set_diagonal": self.set_diagonal,
             "set_corner_cut": self.set_corner_cut,
+            "set_optimize_waypoints": self.set_optimize_waypoints,
+            "set_speed": self.scheduler.set_speed,
+            "set_max_rate": self.scheduler.set_max_rate,
             "toggle_fov": self.toggle_fov,
             "set_fov_radius": self.set_fov_radius,
             "resize_grid": self.resize_grid,
@@ -58,14 +108,17 @@ class AStarApp:
             "generate_maze": self.generate_maze,
             "add_moving_obstacle": self.add_moving_obstacle,
             "set_influence_map": self.set_influence_map,
+            "cycle_heatmap": self.cycle_heatmap,
             "save_map": self.save_map,
             "load_map": self.load_map,
             "open_db": self.open_map_db,
-            "on_grid_click": self.on_grid_click
+            "on_grid_click": self.on_grid_click,
+            "end_stroke": self.end_stroke
         }
-        self.sidebar = Sidebar(main_pane, callbacks)
+        bitmap = self.args.renderer == "bitmap"
+        self.sidebar = Sidebar(main_pane, callbacks, max_grid=2000 if bitmap else 100)
         main_pane.add(self.sidebar.frame)
-        self.canvas_view = CanvasView(main_pane, self.theme, callbacks)
+        self.canvas_view = (BitmapCanvasView if bitmap else CanvasView)(main_pane, self.theme, callbacks)
         main_pane.add(self.canvas_view.frame, weight=1)
         
         # Status bar
@@ -94,10 +147,13 @@ class AStarApp:
     # State setters
     def set_mode(self, mode): self.mode = mode
     def set_algo(self, algo): self.algo = algo
-    def set_heuristic(self, heur): self.heuristic = heur
+    def set_heuristic(self, heur):
+        self.heuristic = heur
+        if self.heatmap == "heuristic": self.redraw()
     def set_weight(self, w): self.weight = w
     def set_diagonal(self, v): self.allow_diagonal = v
     def set_corner_cut(self, v): self.prevent_corner = v
+    def set_optimize_waypoints(self, v): self.optimize_waypoints = v
     def set_fov_radius(self, r): self.state.fov_radius = r; self.update_fov()
     def toggle_fov(self): 
         self.state.fov_enabled = not self.state.fov_enabled
@@ -123,45 +179,65 @@ class AStarApp:
         self.state.start = (min(old_start[0], new_rows-1), min(old_start[1], new_cols-1))
         self.state.goal = (min(old_goal[0], new_rows-1), min(old_goal[1], new_cols-1))
         self.state.waypoints = [(min(r, new_rows-1), min(c, new_cols-1)) for (r,c) in old_waypoints]
+        self.state.history.clear()
+        self.state.touch()
         self.redraw()
-        self.canvas_view.canvas.configure(scrollregion=(0, 0, new_cols * self.canvas_view.cell_size, new_rows * self.canvas_view.cell_size))
 
     def on_grid_click(self, r, c, is_right):
         if not (0 <= r < self.state.rows and 0 <= c < self.state.cols):
             return
         if self.mode == "obstacle":
-            self.state.grid[r][c] = 0.0 if self.state.grid[r][c] > 0 else 1.0
-            self.state.original_grid[r][c] = self.state.grid[r][c]
-            self.state.save_undo()
-            self.redraw()
+            # A drag stroke paints the value its first cell toggled to, as one undo entry.
+            if self.stroke_value is None:
+                self.stroke_value = 0.0 if self.state.original_grid[r][c] > 0 else 1.0
+            if self.state.original_grid[r][c] == self.stroke_value:
+                return
+            self.state.begin_edit()
+            self.state.set_cell(r, c, self.stroke_value)
+            self.state.touch([(r, c)])
+            self.redraw([(r, c)])
+            if is_right:
+                self.end_stroke()  # no release event ends a right click
         elif self.mode == "terrain" and is_right:
-            current = self.state.grid[r][c]
+            current = self.state.original_grid[r][c]
             if current == 0:
-                self.state.grid[r][c] = 1.0
+                value = 1.0
             elif current <= 1.0:
-                self.state.grid[r][c] = 2.0
+                value = 2.0
             elif current <= 2.0:
-                self.state.grid[r][c] = 3.0
+                value = 3.0
             elif current <= 3.0:
-                self.state.grid[r][c] = 5.0
+                value = 5.0
             else:
-                self.state.grid[r][c] = 1.0
-            self.state.original_grid[r][c] = self.state.grid[r][c]
-            self.state.save_undo()
-            self.redraw()
+                value = 1.0
+            self.state.begin_edit()
+            self.state.set_cell(r, c, value)
+            self.state.end_edit()
+            self.state.touch([(r, c)])
+            self.redraw([(r, c)])
         elif self.mode == "start":
             if self.state.grid[r][c] > 0:
+                self.state.begin_edit()
                 self.state.start = (r, c)
+                self.state.end_edit()
                 self.update_fov()
                 self.redraw()
         elif self.mode == "goal":
             if self.state.grid[r][c] > 0:
+                self.state.begin_edit()
                 self.state.goal = (r, c)
-                self.redraw()
+                self.state.end_edit()
+                self.redraw([])
         elif self.mode == "waypoint":
             if self.state.grid[r][c] > 0:
+                self.state.begin_edit()
                 self.state.waypoints.append((r, c))
-                self.redraw()
+                self.state.end_edit()
+                self.redraw([])
+
+    def end_stroke(self):
+        self.stroke_value = None
+        self.state.end_edit()
 
     def run_search(self):
         if self.animating: return
@@ -171,80 +247,417 @@ class AStarApp:
             if not (0 <= r < self.state.rows and 0 <= c < self.state.cols and self.state.grid[r][c] > 0):
                 messagebox.showerror("Error", f"Point {pt} is invalid or blocked!")
                 return
+        self.cancel_tasks()
+        cached = self.cached_route()
+        if cached is not None:
+            self.show_cached_route(*cached)
+            return
+        # Adjacency, landmarks, the hierarchy and component labels can take seconds on a
+        # large map, so a worker builds whichever aren't cached before the search starts.
+        self.animating = True
+        self.update_stats("Preparing...")
+        self.pending_cells = []
+        self.prepare_task = self.executor.submit(self.prepare_job())
+        self.poll_prepare()
+
+    def leg_key(self, a, b, algo=None):
+        return PathCache.key(self.state.version, a, b, algo or self.algo, self.heuristic, self.weight,
+                             self.allow_diagonal, self.prevent_corner)
+
+    def route_keys(self, points):
+        # Cache keys of the legs a route over points is assembled from: {(i, j): key} over
+        # every ordered pair when the waypoint order is optimized (always Dijkstra legs, see
+        # route_job), otherwise one per consecutive pair.
+        if self.optimize_waypoints and len(points) > 2:
+            return {(i, j): self.leg_key(a, b, "Dijkstra")
+                    for i, a in enumerate(points) for j, b in enumerate(points) if i != j}
+        return {(i, i + 1): self.leg_key(a, b) for i, (a, b) in enumerate(zip(points, points[1:]))}
+
+    def cached_route(self):
+        # (path, cost) when every leg the current query needs is already in the path cache,
+        # so it is answered without a worker; ([], inf) if one of them is known unreachable.
+        if self.algo == "Space-Time A*": return None
+        points = [self.state.start] + self.state.waypoints + [self.state.goal]
+        keys = self.route_keys(points)
+        if not all(key in self.path_cache for key in keys.values()): return None
+        legs = {ij: self.path_cache.get(key) for ij, key in keys.items()}
+        if self.optimize_waypoints and len(points) > 2:
+            n = len(points)
+            _, path, cost = route_from_legs([[legs[i, j] if i != j else ([p], 0.0) for j in range(n)]
+                                             for i, p in enumerate(points)])
+            return path, cost
+        path, cost = [], 0.0
+        for ij in sorted(legs):
+            leg, leg_cost = legs[ij]
+            if not leg: return [], float('inf')
+            path.extend(leg[1:] if path else leg)
+            cost += leg_cost
+        return path, cost
+
+    def show_cached_route(self, path, cost):
+        self.timed_route = None
+        if not path:
+            self.update_stats("No Path")
+            messagebox.showerror("Error", "No path found through all waypoints!" if self.state.waypoints else "No path found!")
+            return
+        self.last_path = path
+        if self.state.waypoints or self.algo == "HPA*":
+            self.cancel_replanner()
+            self.animate_waypoint_path()
+            return
+        self.canvas_view.clear_overlays("visited", "opened", "current", "path")
+        self.draw_path(path)
+        self.update_stats("Path Found!", 0, 0, len(path), cost)
+        if self.state.moving_obstacles:
+            self.start_replanner()
+
+    def prepare_job(self):
+        # Captured on the Tk thread: the grid, the movement rules and whichever cached
+        # structures still fit them. The job builds the rest and returns them all.
+        grid, static, version, map_id = self.state.grid, self.state.original_grid, self.state.version, self.map_id
+        rules = (self.allow_diagonal, self.prevent_corner)
+        algo = self.algo
+        if algo == "Space-Time A*":
+            return lambda task: {'version': version}
+        adjacency = self.adjacency_cache.get(rules)
+        if adjacency is not None and not adjacency.matches(grid, *rules):
+            adjacency = None
+        landmarks = None
+        if self.heuristic == "Landmarks" and algo != "HPA*":
+            landmarks = self.landmarks
+            if landmarks is None or not landmarks.matches(grid, *rules):
+                landmarks = False  # to build
+        hierarchy = None
+        if algo == "HPA*":
+            hierarchy = self.hierarchy
+            if hierarchy is None or not hierarchy.matches(grid, *rules):
+                hierarchy = False
+        labels = self.components.get(rules)
+        labels = labels[1] if labels is not None and labels[0] == version else None
+        def prepare(task):
+            built = {'version': version, 'rules': rules}
+            built['adjacency'] = adjacency or Adjacency(grid, *rules)
+            task.check()
+            if labels is None:
+                built['components'] = component_labels(grid, *rules)
+                built['components_blob'] = encode_array(built['components'], '<i4')
+            else:
+                built['components'] = labels
+            task.check()
+            if landmarks is not None:
+                built['landmarks'] = landmarks or self.find_landmarks(map_id, grid, static, rules)
+            task.check()
+            if hierarchy is not None:
+                built['hierarchy'] = hierarchy or HierarchicalPlanner(grid, allow_diagonal=rules[0],
+                                                                      prevent_corner_cutting=rules[1])
+            return built
+        return prepare
+
+    def poll_prepare(self):
+        task = self.prepare_task
+        if task is None: return
+        for kind, payload in task.drain():
+            if kind == PROGRESS: continue
+            self.prepare_task = None
+            self.executor.task = None
+            if kind == ERROR:
+                self.animating = False
+                messagebox.showerror("Search Error", f"Failed to initialize search:\n{payload}")
+                return
+            if self.pending_cells is None:
+                # The whole grid changed underneath; start over on the new one.
+                self.animating = False
+                self.run_search()
+                return
+            labels = self.adopt(payload)
+            points = [self.state.start] + self.state.waypoints + [self.state.goal]
+            if labels is not None and len({int(labels[r, c]) for r, c in points}) > 1:
+                # Points in different components can't be joined; say so without searching.
+                self.animating = False
+                self.update_stats("No Path")
+                messagebox.showerror("Error", "No path found through all waypoints!" if self.state.waypoints else "No path found!")
+                return
+            self.start_search()
+            return
+        self.root.after(30, self.poll_prepare)
+
+    def adopt(self, built):
+        # Move what prepare_job built into the caches. Cells edited while it ran are
+        # patched in, as on_grid_changed would have; bounds and labels computed before
+        # those edits are dropped. Returns the component labels if still current.
+        cells, self.pending_cells = self.pending_cells, []
+        rules = built.get('rules')
+        if rules is None: return None
+        adjacency, hierarchy = built['adjacency'], built.get('hierarchy')
+        for r, c in cells:
+            adjacency.patch(r, c)
+            if hierarchy is not None:
+                hierarchy.update_cell(r, c)
+        self.adjacency_cache[rules] = adjacency
+        if hierarchy is not None:
+            self.hierarchy = hierarchy
+        if cells:
+            return None
+        if built.get('landmarks') is not None and self.overlay_raises(self.state.obstacle_cells):
+            self.landmarks = built['landmarks']
+        self.components[rules] = (built['version'], built['components'])
+        if 'components_blob' in built:
+            self.store_artifact(COMPONENTS, built['components_blob'],
+                                allow_diagonal=rules[0], prevent_corner_cutting=rules[1])
+        return built['components']
+
+    def start_search(self):
         try:
-            if self.state.waypoints:
-                full_path = self.solve_with_waypoints()
-                if not full_path:
-                    messagebox.showerror("Error", "No path found through all waypoints!")
-                    return
-                self.last_path = full_path
-                self.animate_waypoint_path()
+            # Engine work runs on a worker thread; the Tk thread only polls its queue.
+            if self.state.waypoints or self.algo in ("HPA*", "Space-Time A*"):
+                self.animating = True
+                self.cancel_replanner()
+                self.timed_route = None
+                self.update_stats("Solving...")
+                self.route_task = self.executor.submit(self.route_job())
+                self.poll_route()
             else:
-                engine = PathfindingEngine(
-                    self.state.grid,
-                    algo=self.algo,
-                    heuristic=self.heuristic,
-                    weight=self.weight,
-                    allow_diagonal=self.allow_diagonal,
-                    prevent_corner_cutting=self.prevent_corner
-                )
-                self.search_gen = engine.search_generator(self.state.start, self.state.goal)
+                engine = self.make_engine()
+                self.search_key = self.leg_key(self.state.start, self.state.goal)
+                self.search_task = self.executor.submit(stream_events, engine, self.state.start, self.state.goal)
                 self.animating = True
                 self.search_start_time = time.time()
-                self.canvas_view.canvas.delete("search")
-                # Initialize incremental state
-                self._prev_visited = set()
-                self._prev_opened = set()
-                self._prev_path = []
-                self._prev_current = None
+                self.canvas_view.clear_overlays("visited", "opened", "current", "path")
+                self.visited_count = 0
+                self.opened_count = 0
                 self.update_stats("Searching...")
+                self.scheduler.begin()
                 self.animate_step()
         except Exception as e:
             messagebox.showerror("Search Error", f"Failed to initialize search:\n{e}")
             self.animating = False
-            self.search_gen = None
-
-    def solve_with_waypoints(self):
-        sequence = [self.state.start] + self.state.waypoints + [self.state.goal]
-        full_path = []
-        for i in range(len(sequence) - 1):
-            path = self.find_path(sequence[i], sequence[i+1])
-            if not path: return []
-            full_path.extend(path[:-1] if full_path else path)
-        return full_path
-
-    def find_path(self, start, goal):
-        try:
-            engine = PathfindingEngine(
-                self.state.grid,
-                algo=self.algo,
-                heuristic=self.heuristic,
-                weight=self.weight,
-                allow_diagonal=self.allow_diagonal,
-                prevent_corner_cutting=self.prevent_corner
-            )
-            for state in engine.search_generator(start, goal):
-                if state.get("path"):
-                    return state["path"]
-        except:
-            return []
-        return []
+            self.cancel_tasks()
+
+    def route_job(self):
+        # Everything the solve needs is gathered here on the Tk thread (cached legs,
+        # adjacency, hierarchy, a fresh engine), so the returned job touches no shared
+        # app state from the worker. It returns (path, {cache key: (path, cost)}).
+        start, goal, waypoints = self.state.start, self.state.goal, self.state.waypoints[:]
+        self.route_tick = None
+        if self.algo == "Space-Time A*":
+            return self.timed_job(start, waypoints, goal)
+        if self.optimize_waypoints and waypoints:
+            # Exact legs from a start/waypoints/goal distance matrix, visited in the cheapest
+            # order. The matrix is one-to-many Dijkstra whatever the selected algorithm, so
+            # its legs are cached as Dijkstra legs. It runs in this worker thread
+            # (workers=1) so task.check can cancel it mid-search.
+            grid, diag, corner = self.state.grid, self.allow_diagonal, self.prevent_corner
+            adjacency = self.adjacency_cache.get((diag, corner))
+            points = [start] + waypoints + [goal]
+            keys = self.route_keys(points)
+            known = {}
+            for ij, key in keys.items():
+                hit = self.path_cache.get(key)
+                if hit is not None:
+                    known[ij] = hit
+            def optimized(task):
+                legs = distance_matrix(grid, points, diag, corner, adjacency, workers=1, check=task.check, known=known)
+                _, path, _ = route_from_legs(legs)
+                return path, {key: legs[i][j] for (i, j), key in keys.items() if (i, j) not in known}
+            return optimized
+        keys = list(self.route_keys([start] + waypoints + [goal]).values())
+        cached = [self.path_cache.get(key) for key in keys]
+        hierarchy = self.hierarchy if self.algo == "HPA*" else None
+        grid, diag, corner = self.state.grid, self.allow_diagonal, self.prevent_corner
+        engine = None if self.algo == "HPA*" else self.make_engine()
+        def legs(task):
+            solver = engine
+            if solver is None:
+                solver = hierarchy
+                if solver is None or not solver.matches(grid, diag, corner):
+                    solver = HierarchicalPlanner(grid, allow_diagonal=diag, prevent_corner_cutting=corner)
+            full_path, solved = [], {}
+            for key, hit in zip(keys, cached):
+                task.check()
+                if hit is None:
+                    try:
+                        result = solver.solve(key[1], key[2])
+                        hit = (result.path, result.cost)
+                    except ValueError:
+                        hit = ([], float('inf'))
+                    solved[key] = hit
+                if not hit[0]: return [], solved
+                full_path.extend(hit[0][1:] if full_path else hit[0])
+            return full_path, solved
+        return legs
+
+    def timed_job(self, start, waypoints, goal):
+        # One collision-free timed route against the obstacles' schedules from their
+        # current phase; legs chain on from the previous leg's arrival tick.
+        sequence = [start] + waypoints + [goal]
+        table = ReservationTable(self.state.moving_obstacles, self.state.rows, self.state.cols, sequence)
+        planner = SpaceTimePlanner([row[:] for row in self.state.original_grid], table,
+                                   self.allow_diagonal, self.prevent_corner)
+        self.route_tick = self.obstacle_tick
+        def timed(task):
+            full_path = []
+            for a, b in zip(sequence, sequence[1:]):
+                result = planner.plan(a, b, t0=max(len(full_path) - 1, 0), check=task.check)
+                if not result.path: return [], {}
+                full_path.extend(result.path[1:] if full_path else result.path)
+            return full_path, {}
+        return timed
+
+    def poll_route(self):
+        task = self.route_task
+        if task is None: return
+        for kind, payload in task.drain():
+            if kind == PROGRESS: continue
+            self.route_task = None
+            self.executor.task = None
+            if kind == ERROR:
+                self.animating = False
+                messagebox.showerror("Search Error", f"Search failed:\n{payload}")
+                return
+            full_path, solved = payload
+            for key, (path, cost) in solved.items():
+                if key[0] == self.state.version:
+                    self.path_cache.put(key, path, cost)
+                    self.store_path(key, path, cost)
+            if not full_path:
+                self.animating = False
+                self.update_stats("No Path")
+                messagebox.showerror("Error", "No path found through all waypoints!" if self.state.waypoints else "No path found!")
+                return
+            self.last_path = full_path
+            if self.route_tick is not None:
+                self.timed_route = (full_path, self.route_tick)
+            self.animate_waypoint_path()
+            return
+        self.root.after(30, self.poll_route)
+
+    def cancel_tasks(self):
+        self.executor.cancel()
+        self.search_task = None
+        self.route_task = None
+        self.prepare_task = None
+        self.pending_events.clear()
+
+    def make_engine(self):
+        # Takes only what prepare_job left in the caches; the engine ignores anything that
+        # no longer fits the grid. Each engine gets fresh search buffers: a cancelled
+        # worker may still be finishing its search when the next one starts.
+        return PathfindingEngine(
+            self.state.grid,
+            algo=self.algo,
+            heuristic=self.heuristic,
+            weight=self.weight,
+            allow_diagonal=self.allow_diagonal,
+            prevent_corner_cutting=self.prevent_corner,
+            adjacency=self.adjacency_cache.get((self.allow_diagonal, self.prevent_corner)),
+            landmarks=self.landmarks if self.heuristic == "Landmarks" else None
+        )
+
+    def find_landmarks(self, map_id, grid, static, rules):
+        # Stored tables for the map when they still fit the grid; otherwise build them and
+        # store them against that map. Safe on a worker: it only touches the database.
+        # They describe the static layer, so moving obstacles that only raise costs over
+        # it keep the bounds valid (see overlay_raises).
+        landmarks = None
+        if map_id is not None:
+            landmarks = self.db.load_landmarks(map_id, *rules)
+            if landmarks is not None and not landmarks.bind(grid, static):
+                landmarks = None
+        if landmarks is None:
+            landmarks = build_landmarks(static, allow_diagonal=rules[0], prevent_corner_cutting=rules[1])
+            landmarks.bind(grid, static)
+            if map_id is not None:
+                self.db.save_landmarks(map_id, landmarks)
+        return landmarks
+
+    def overlay_raises(self, cells):
+        # True if the overlay at cells costs at least what the static layer does (a wall
+        # counting as infinite). Distances then only grow, and lower bounds built on the
+        # static layer stay admissible and consistent.
+        grid, static = self.state.grid, self.state.original_grid
+        return all(raises(static[r][c], grid[r][c]) for r, c in cells)
+
+    def on_grid_changed(self, cells, previous=None):
+        if previous is None:
+            # A static edit: any cost change can break the landmark bounds, and the grid no
+            # longer matches the stored map.
+            self.path_cache.invalidate(self.state.version)
+            self.landmarks = None
+            self.map_id = None
+        else:
+            # Moving obstacles over an unchanged static layer. Cached paths off the changed
+            # cells survive a tick that only raised costs, and landmarks one that leaves the
+            # overlay at or above the static costs.
+            grid = self.state.grid
+            if all(raises(previous[r, c], grid[r][c]) for r, c in cells):
+                self.path_cache.carry(self.state.version, cells)
+            else:
+                self.path_cache.invalidate(self.state.version)
+            if self.landmarks is not None and not self.overlay_raises(cells):
+                self.landmarks = None
+        # Structures still being built on a worker get these cells patched in on arrival.
+        if self.prepare_task is not None:
+            self.pending_cells = None if cells is None or self.pending_cells is None else self.pending_cells + list(cells)
+        if self.replan_task is not None:
+            self.replan_cells = None if cells is None or self.replan_cells is None else self.replan_cells + list(cells)
+        if cells is None:
+            self.adjacency_cache.clear()
+            self.hierarchy = None
+            self.replanner = None
+            return
+        if self.replanner is not None:
+            if (self.replanner.start, self.replanner.goal) == (self.state.start, self.state.goal):
+                self.replanner.update_cells(cells)
+            else:
+                self.replanner = None
+        if self.search_task is not None or self.route_task is not None:
+            # A worker may be reading them; build fresh ones next time rather than patch in place.
+            self.adjacency_cache.clear()
+            self.hierarchy = None
+            return
+        for adjacency in self.adjacency_cache.values():
+            for r, c in cells:
+                adjacency.patch(r, c)
+        if self.hierarchy is not None:
+            for r, c in cells:
+                self.hierarchy.update_cell(r, c)
+
+    def next_event(self):
+        # Next trace event from the worker, or None if it hasn't produced one yet.
+        if not self.pending_events and self.search_task is not None:
+            for kind, payload in self.search_task.drain(8):
+                if kind == PROGRESS:
+                    self.pending_events.extend(payload)
+                elif kind == ERROR:
+                    raise payload
+        return self.pending_events.popleft() if self.pending_events else None
 
     def animate_step(self):
-        if not self.animating or self.search_gen is None: return
+        if not self.animating or self.search_task is None: return
+        batch = []
+        def step():
+            event = self.next_event()
+            if event is None: return FrameScheduler.STALL
+            batch.append(event)
+            if event[0] in (PATH_FOUND, EXHAUSTED): return None
+            return 1 if event[0] == EXPAND else 0
         try:
-            state = next(self.search_gen)
-            self.update_from_state(state)
-            self.root.after(20, self.animate_step)  # Faster loop for smoother performance
-        except StopIteration:
-            self.animating = False
+            running = self.scheduler.run_frame(step)
+            self.apply_events(batch)
         except Exception as e:
             self.animating = False
+            self.cancel_tasks()
             messagebox.showerror("Search Error", f"Search failed:\n{e}")
+            return
+        if running:
+            self.root.after(self.scheduler.frame_ms, self.animate_step)
+        else:
+            self.animating = False
+            self.cancel_tasks()
 
     def animate_waypoint_path(self):
         self.animating = True
-        self.canvas_view.canvas.delete("search")
+        self.canvas_view.clear_overlays("path")
         path = self.last_path
         step = 0
         def animate():
@@ -273,100 +686,194 @@ class AStarApp:
             path_cost += mult * self.state.grid[b[0]][b[1]]
         self.update_stats("Path Found!", len(path), 0, len(path), path_cost, 0)
 
-    def redraw(self):
-        # Only draw base grid + static elements (no search state)
+    def redraw(self, cells=None):
+        # Only draw base grid + static elements (no search state). cells limits the repaint
+        # to edited cells; a heatmap changes everywhere with the grid, so it always repaints.
         self.canvas_view.draw_grid(
             self.state,
             [],  # visited
             set(),  # opened
             None,  # current
             [],  # path
-            {}  # g_values
+            {},  # g_values
+            self.heatmap_layer(),
+            None if self.heatmap else cells
         )
 
-    def update_from_state(self, state):
-        if not isinstance(state, dict):
-            return
+    def goal_field(self):
+        # Cost-to-goal from every cell, recomputed only when the grid or goal changes.
+        key = (self.state.version, self.state.goal, self.allow_diagonal, self.prevent_corner)
+        if self.field_cache is None or self.field_cache[0] != key:
+            field = distance_field(self.state.grid, [self.state.goal], self.allow_diagonal,
+                                   self.prevent_corner, reverse=True)
+            self.field_cache = (key, field)
+            self.store_artifact(FIELD, encode_array(field, '<f4'), goal=self.state.goal,
+                                allow_diagonal=self.allow_diagonal, prevent_corner_cutting=self.prevent_corner)
+        return self.field_cache[1]
 
-        visited = state.get("visited") or []
-        opened = state.get("opened") or set()
-        path = state.get("path") or []
-        current = state.get("current")
-        done = state.get("done", False)
+    def store_artifact(self, kind, data, **params):
+        # Write-through of derived data while the grid still matches the stored map, with
+        # no moving obstacles over it.
+        if self.map_id is not None and not self.state.obstacle_cells:
+            self.db.save_artifact(self.map_id, self.map_digest, kind, params_key(**params), data)
 
-        # Store for export
-        if path:
-            self.last_path = path
-
-        # Convert to sets for efficient diff
-        visited_set = set(visited)
-        opened_set = set(opened)
-
-        # Get previous state (for incremental updates)
-        prev_visited = getattr(self, '_prev_visited', set())
-        prev_opened = getattr(self, '_prev_opened', set())
-        prev_path = getattr(self, '_prev_path', [])
-        prev_current = getattr(self, '_prev_current', None)
-
-        # 1. Add newly visited nodes
-        new_visited = visited_set - prev_visited
-        for (r, c) in new_visited:
-            if not self.state.fov_enabled or (r, c) in self.state.visible_cells:
-                self.canvas_view.draw_overlay(r, c, "#2c3e50" if self.theme["is_dark"] else "#b0c4de", tag="visited")
-
-        # 2. Add newly opened nodes (not visited)
-        new_opened = (opened_set - visited_set) - prev_opened
-        for (r, c) in new_opened:
-            if not self.state.fov_enabled or (r, c) in self.state.visible_cells:
-                self.canvas_view.draw_overlay(r, c, "#f1c40f", tag="opened")
-
-        # 3. Update current node
-        if current != prev_current:
-            if prev_current:
-                self.canvas_view.canvas.delete(f"current_{prev_current[0]}_{prev_current[1]}")
-            if current and (not self.state.fov_enabled or current in self.state.visible_cells):
-                self.canvas_view.draw_overlay(
-                    current[0], current[1], "#e74c3c", shape="diamond", 
-                    tag=f"current_{current[0]}_{current[1]}"
-                )
+    def store_path(self, key, path, cost, expansions=0):
+        _, start, goal, algo, heuristic, weight, diag, corner = key
+        self.store_artifact(PATH, encode_path(path, cost, expansions), start=start, goal=goal, algo=algo,
+                            heuristic=heuristic, weight=weight, allow_diagonal=diag, prevent_corner_cutting=corner)
+
+    def warm_caches(self):
+        # Fill the in-memory caches from what earlier sessions stored for this map, so the
+        # first query after a load costs what a repeat one does.
+        version = self.state.version
+        for kind, params, data in self.db.load_artifacts(self.map_id, self.map_digest):
+            if kind == PATH:
+                path, cost, _ = decode_path(data)
+                self.path_cache.put(PathCache.key(version, params['start'], params['goal'], params['algo'],
+                                                  params['heuristic'], params['weight'], params['allow_diagonal'],
+                                                  params['prevent_corner_cutting']), path, cost)
+            elif kind == COMPONENTS:
+                key = (params['allow_diagonal'], params['prevent_corner_cutting'])
+                self.components[key] = (version, decode_array(data))
+            elif kind == FIELD:
+                key = (version, tuple(params['goal']), params['allow_diagonal'], params['prevent_corner_cutting'])
+                if key == (version, self.state.goal, self.allow_diagonal, self.prevent_corner):
+                    self.field_cache = (key, decode_array(data).astype(float))
+        if self.heuristic == "Landmarks":
+            # Stored tables only; building them is left to the search's worker.
+            landmarks = self.db.load_landmarks(self.map_id, self.allow_diagonal, self.prevent_corner)
+            if landmarks is not None and landmarks.bind(self.state.grid, self.state.original_grid):
+                self.landmarks = landmarks
+
+    def heatmap_layer(self):
+        if self.heatmap == "distance":
+            return self.goal_field()
+        if self.heatmap == "heuristic":
+            # Same cached table the engine reads during the search. Landmark tables are only
+            # built on a worker, so until one delivers them this shows the geometric fallback.
+            landmarks = self.landmarks if self.heuristic == "Landmarks" else None
+            if landmarks is not None and not landmarks.matches(self.state.grid, self.allow_diagonal, self.prevent_corner):
+                landmarks = None
+            return h_grid(self.heuristic, tuple(self.state.goal), self.state.rows, self.state.cols, landmarks)
+        return None
 
-        # 4. Update path (only if changed)
-        if path != prev_path:
-            self.canvas_view.canvas.delete("path")
-            if path:
-                for i, (r, c) in enumerate(path):
-                    if not self.state.fov_enabled or (r, c) in self.state.visible_cells:
-                        self.canvas_view.draw_overlay(r, c, "#2ecc71", shape="circle", tag="path")
-                        if i > 0:
-                            pr, pc = path[i-1]
-                            if (not self.state.fov_enabled or (pr, pc) in self.state.visible_cells) and (not self.state.fov_enabled or (r, c) in self.state.visible_cells):
-                                self.canvas_view.canvas.create_line(
-                                    pc * self.canvas_view.cell_size + self.canvas_view.cell_size//2,
-                                    pr * self.canvas_view.cell_size + self.canvas_view.cell_size//2,
-                                    c * self.canvas_view.cell_size + self.canvas_view.cell_size//2,
-                                    r * self.canvas_view.cell_size + self.canvas_view.cell_size//2,
-                                    fill="#27ae60", width=3, tags="path"
-                                )
-
-        # Save current state for next update
-        self._prev_visited = visited_set
-        self._prev_opened = opened_set
-        self._prev_path = path[:]
-        self._prev_current = current
-
-        # Update stats
+    def cycle_heatmap(self):
+        self.heatmap = {None: "distance", "distance": "heuristic"}.get(self.heatmap)
+        self.redraw()
+
+    def apply_event(self, event):
+        self.apply_events([event])
+
+    def apply_events(self, events):
+        # One frame's worth of events, coalesced: each cell gets at most one overlay (a
+        # cell opened and expanded in the same frame is only drawn as visited), the
+        # current marker moves once and the stats panel updates once.
+        fov = self.state.fov_enabled
+        visible = self.state.visible_cells
+        status = "Searching..."
+        path = []
         path_cost = 0.0
+        visited, opened = {}, {}
+        current = None
+        for event in events:
+            kind = event[0]
+            backward = len(event) > 2 and event[2] == BACKWARD
+            if kind == EXPAND:
+                self.visited_count += 1
+                visited[event[1]] = backward
+                current = event[1]
+            elif kind == OPEN:
+                self.opened_count += 1
+                opened[event[1]] = backward
+            elif kind == PATH_FOUND:
+                path, path_cost = event[1], event[2]
+                self.last_path = path
+                status = "Path Found!"
+                # Points and settings may have changed since; only the grid version
+                # (key[0]) says whether the path still holds.
+                key = self.search_key
+                if key is not None and key[0] == self.state.version:
+                    self.path_cache.put(key, path, path_cost)
+                    self.store_path(key, path, path_cost, self.visited_count)
+            elif kind == EXHAUSTED:
+                status = "No Path"
+
+        draw = self.canvas_view.draw_overlay
+        for (r, c), backward in opened.items():
+            if (r, c) not in visited and (not fov or (r, c) in visible):
+                draw(r, c, "#9b59b6" if backward else "#f1c40f", tag="opened")
+        for (r, c), backward in visited.items():
+            if not fov or (r, c) in visible:
+                if backward:
+                    color = "#4a235a" if self.theme["is_dark"] else "#d7bde2"
+                else:
+                    color = "#2c3e50" if self.theme["is_dark"] else "#b0c4de"
+                draw(r, c, color, tag="visited")
+        if current is not None:
+            self.canvas_view.clear_overlays("current")
+            if not fov or current in visible:
+                draw(current[0], current[1], "#e74c3c", shape="diamond", tag="current")
         if path:
-            for a, b in zip(path[:-1], path[1:]):
-                dr = abs(a[0]-b[0]); dc = abs(a[1]-b[1])
-                mult = math.sqrt(2) if (dr == 1 and dc == 1) else 1.0
-                path_cost += mult * self.state.grid[b[0]][b[1]]
-        
+            self.draw_path(path)
+            if self.state.moving_obstacles:
+                self.start_replanner()
+
         elapsed = time.time() - self.search_start_time if self.search_start_time else 0.001
-        nodes_per_sec = len(visited) / elapsed if elapsed > 0 else 0
-        status = "Path Found!" if done and path else "Searching..." if not done else "No Path"
-        
-        self.update_stats(status, len(visited), len(opened), len(path), path_cost, nodes_per_sec)
+        nodes_per_sec = self.visited_count / elapsed if elapsed > 0 else 0
+        self.update_stats(status, self.visited_count, self.opened_count, len(path), path_cost, nodes_per_sec)
+
+    def draw_path(self, path):
+        fov = self.state.fov_enabled
+        visible = self.state.visible_cells
+        size = self.canvas_view.cell_size
+        self.canvas_view.clear_overlays("path")
+        for i, (r, c) in enumerate(path):
+            if not fov or (r, c) in visible:
+                self.canvas_view.draw_overlay(r, c, "#2ecc71", shape="circle", tag="path")
+                if i > 0:
+                    pr, pc = path[i-1]
+                    if not fov or (pr, pc) in visible:
+                        self.canvas_view.canvas.create_line(
+                            pc * size + size//2, pr * size + size//2,
+                            c * size + size//2, r * size + size//2,
+                            fill="#27ae60", width=3, tags="path"
+                        )
+
+    def start_replanner(self):
+        # Keep a D* Lite planner alive while obstacles move so each tick only repairs
+        # the part of the search the changed cells affect. The first full compute() runs
+        # on its own worker; cells that change meanwhile are replayed into it on arrival.
+        grid, start, goal = self.state.grid, self.state.start, self.state.goal
+        rules = (self.allow_diagonal, self.prevent_corner)
+        def build(task):
+            replanner = DStarLite(grid, start, goal, *rules)
+            replanner.compute()
+            return replanner
+        self.replanner = None
+        self.replan_cells = []
+        self.replan_task = self.replan_executor.submit(build)
+        self.poll_replanner()
+
+    def poll_replanner(self):
+        task = self.replan_task
+        if task is None: return
+        for kind, payload in task.drain():
+            if kind == PROGRESS: continue
+            self.replan_task = None
+            self.replan_executor.task = None
+            cells, self.replan_cells = self.replan_cells, []
+            if kind == ERROR or cells is None: return
+            if (payload.start, payload.goal) != (self.state.start, self.state.goal): return
+            if cells:
+                payload.update_cells(cells)
+            self.replanner = payload
+            return
+        self.root.after(30, self.poll_replanner)
+
+    def cancel_replanner(self):
+        self.replan_executor.cancel()
+        self.replan_task = None
+        self.replanner = None
 
     def update_stats(self, status, visited=0, opened=0, path_len=0, total_cost=0.0, nodes_per_sec=0.0):
         text = f"Status: {status}\n"
@@ -375,6 +882,8 @@ class AStarApp:
         text += f"Path Nodes: {path_len}\n"
         text += f"Path Cost: {total_cost:.3f}\n"
         text += f"Speed: {nodes_per_sec:.1f} nodes/sec\n"
+        cache = self.path_cache.stats()
+        text += f"Cache: {cache['hits']} hit / {cache['misses']} miss / {cache['evictions']} evicted\n"
         self.sidebar.stats_text.config(state="normal")
         self.sidebar.stats_text.delete(1.0, "end")
         self.sidebar.stats_text.insert("end", text)
@@ -382,81 +891,90 @@ class AStarApp:
 
     def step_search(self):
         if self.animating: return
-        if self.search_gen is None:
+        if self.search_task is None:
             self.run_search()
             return
         try:
-            state = next(self.search_gen)
-            self.update_from_state(state)
-        except StopIteration:
-            self.animating = False
+            event = self.next_event()
+            if event is None: return
+            self.apply_event(event)
+            if event[0] in (PATH_FOUND, EXHAUSTED):
+                self.cancel_tasks()
         except Exception as e:
             self.animating = False
+            self.cancel_tasks()
             messagebox.showerror("Step Error", str(e))
 
     def pause_search(self):
+        # A paused animated search keeps its worker, which blocks once its queue fills;
+        # a headless solve (or the build before a search) has nothing to resume, so it is cancelled.
         self.animating = False
+        if self.route_task is not None or self.prepare_task is not None:
+            self.cancel_tasks()
+            self.update_stats("Cancelled")
 
     def reset_search(self):
         self.animating = False
-        self.search_gen = None
-        # Clear incremental state
-        if hasattr(self, '_prev_visited'):
-            delattr(self, '_prev_visited')
-            delattr(self, '_prev_opened')
-            delattr(self, '_prev_path')
-            delattr(self, '_prev_current')
+        self.cancel_tasks()
+        self.cancel_replanner()
+        self.timed_route = None
         # Clear only search-related overlays
-        self.canvas_view.canvas.delete("visited", "opened", "current_*", "path")
+        self.canvas_view.clear_overlays("visited", "opened", "current", "path")
         self.update_stats("Ready")
 
     def undo(self):
-        if self.state.undo_stack:
-            self.state.redo_stack.append((
-                [row[:] for row in self.state.grid],
-                self.state.start,
-                self.state.goal,
-                self.state.waypoints[:]
-            ))
-            self.state.restore_from_undo(self.state.undo_stack.pop())
-            self.redraw()
+        points = self.state.points()
+        self.after_history(self.state.undo(), points)
 
     def redo(self):
-        if self.state.redo_stack:
-            self.state.undo_stack.append((
-                [row[:] for row in self.state.grid],
-                self.state.start,
-                self.state.goal,
-                self.state.waypoints[:]
-            ))
-            self.state.restore_from_undo(self.state.redo_stack.pop())
-            self.redraw()
+        points = self.state.points()
+        self.after_history(self.state.redo(), points)
+
+    def after_history(self, cells, points):
+        # Only the edited cells need repainting unless a start/goal/waypoint moved or FOV
+        # shading, which follows the start and the walls, may have changed anywhere.
+        if cells is None: return
+        self.update_fov()
+        full = self.state.fov_enabled or self.state.points() != points
+        self.redraw(None if full else cells)
 
     def clear_obstacles(self):
-        self.state.save_undo()
+        self.state.begin_edit()
+        changed = []
         for r in range(self.state.rows):
             for c in range(self.state.cols):
-                if self.state.grid[r][c] == 0 and (r, c) not in self.state.waypoints and (r, c) != self.state.start and (r, c) != self.state.goal:
-                    self.state.grid[r][c] = 1.0
-                    self.state.original_grid[r][c] = 1.0
-        self.redraw()
+                if self.state.original_grid[r][c] == 0 and (r, c) not in self.state.waypoints and (r, c) != self.state.start and (r, c) != self.state.goal:
+                    self.state.set_cell(r, c, 1.0)
+                    changed.append((r, c))
+        self.state.end_edit()
+        self.state.touch(changed)
+        self.redraw(changed)
 
     def clear_all(self):
-        self.state.save_undo()
-        self.state.grid = [[1.0 for _ in range(self.state.cols)] for _ in range(self.state.rows)]
-        self.state.original_grid = [row[:] for row in self.state.grid]
+        self.state.begin_edit()
+        changed = []
+        for r in range(self.state.rows):
+            for c in range(self.state.cols):
+                if self.state.original_grid[r][c] != 1.0:
+                    self.state.set_cell(r, c, 1.0)
+                    changed.append((r, c))
         self.state.waypoints = []
-        self.redraw()
+        self.state.end_edit()
+        self.state.touch(changed)
+        self.redraw(changed)
 
     def new_map(self):
         self.state.grid = [[1.0 for _ in range(self.state.cols)] for _ in range(self.state.rows)]
         self.state.original_grid = [row[:] for row in self.state.grid]
         self.state.waypoints = []
+        self.state.history.clear()
         self.state.influence_map = None
         self.state.moving_obstacles = []
+        self.state.obstacle_cells = {}
         if self.obstacle_animation_id:
             self.root.after_cancel(self.obstacle_animation_id)
             self.obstacle_animation_id = None
+        self.state.touch()
         self.redraw()
 
     def add_moving_obstacle(self):
@@ -471,16 +989,22 @@ class AStarApp:
     def animate_obstacles(self):
         if not self.state.moving_obstacles:
             return
-        for r in range(self.state.rows):
-            for c in range(self.state.cols):
-                if (r, c) != self.state.start and (r, c) != self.state.goal and (r, c) not in self.state.waypoints:
-                    self.state.grid[r][c] = self.state.original_grid[r][c]
-        for obs in self.state.moving_obstacles:
-            obs.update()
-            for (r, c) in obs.get_current_cells():
-                if 0 <= r < self.state.rows and 0 <= c < self.state.cols:
-                    self.state.grid[r][c] = obs.cost
-        self.redraw()
+        previous = self.state.step_obstacles()
+        changed = list(previous)
+        self.obstacle_tick += 1
+        if changed:
+            self.state.touch(changed, previous)
+        self.redraw(changed)
+        if self.timed_route is not None:
+            # The timed route was planned once against the schedule; just show where the
+            # agent is at this tick.
+            path, tick0 = self.timed_route
+            r, c = path[min(self.obstacle_tick - tick0, len(path) - 1)]
+            self.canvas_view.clear_overlays("current")
+            self.canvas_view.draw_overlay(r, c, "#e74c3c", shape="diamond", tag="current")
+        if self.replanner is not None:
+            self.last_path = self.replanner.path()
+            self.draw_path(self.last_path)
         if self.obstacle_animation_id:
             self.root.after_cancel(self.obstacle_animation_id)
         self.obstacle_animation_id = self.root.after(200, self.animate_obstacles)
@@ -496,36 +1020,49 @@ class AStarApp:
         self.redraw()
 
     def generate_maze(self):
-        self.state.save_undo()
+        self.state.begin_edit()
         raw_maze = generate_maze(self.state.rows, self.state.cols, start=self.state.start)
         for r in range(min(self.state.rows, len(raw_maze))):
             for c in range(min(self.state.cols, len(raw_maze[0]))):
-                self.state.grid[r][c] = 1.0 if raw_maze[r][c] == 1 else 0.0
-                self.state.original_grid[r][c] = self.state.grid[r][c]
+                self.state.set_cell(r, c, 1.0 if raw_maze[r][c] == 1 else 0.0)
+        self.state.end_edit()
+        self.state.touch()
         self.redraw()
 
     def open_map_db(self):
-        Dialogs.open_map_db(self.root, {"load_map_data": self.load_map_data})
+        Dialogs.open_map_db(self.root, {"load_map_data": self.load_map_data}, self.db)
 
     def load_map_data(self, map_data):
         self.state.rows, self.state.cols = map_data["rows"], map_data["cols"]
         self.state.grid = map_data["grid"]
         self.state.original_grid = [row[:] for row in self.state.grid]
-        self.state.start = map_data["start"]
-        self.state.goal = map_data["goal"]
-        self.state.waypoints = map_data.get("waypoints", [])
+        # Cells are hashed (obstacle protection, reservations), so points must be tuples.
+        self.state.start = tuple(map_data["start"])
+        self.state.goal = tuple(map_data["goal"])
+        self.state.waypoints = [tuple(w) for w in map_data.get("waypoints", [])]
+        self.state.history.clear()
         self.state.influence_map = None
         self.state.moving_obstacles = []
+        self.state.obstacle_cells = {}
         if self.obstacle_animation_id:
             self.root.after_cancel(self.obstacle_animation_id)
             self.obstacle_animation_id = None
+        self.state.touch()
+        self.map_id = map_data["id"]
+        self.map_digest = grid_digest(self.state.grid)
+        if not self.args.no_warm_cache:
+            self.warm_caches()
         self.redraw()
-        self.canvas_view.canvas.configure(scrollregion=(0, 0, self.state.cols * self.canvas_view.cell_size, self.state.rows * self.canvas_view.cell_size))
 
     def save_map(self):
         name, tags, rating = Dialogs.save_map_dialog()
         if name:
-            self.db.save_map(name, self.state.rows, self.state.cols, self.state.grid, self.state.start, self.state.goal, self.state.waypoints, tags, rating)
+            self.map_id = self.db.save_map(name, self.state.rows, self.state.cols, self.state.grid, self.state.start, self.state.goal, self.state.waypoints, tags, rating)
+            self.map_digest = grid_digest(self.state.grid)
+            # Landmarks are stored only if already built for this grid; otherwise the first
+            # Landmarks search builds and stores them.
+            if self.landmarks is not None and self.landmarks.matches(self.state.grid, self.allow_diagonal, self.prevent_corner):
+                self.db.save_landmarks(self.map_id, self.landmarks)
             messagebox.showinfo("Saved", f"Map '{name}' saved to database!")
 
     def load_map(self):
@@ -539,9 +1076,10 @@ class AStarApp:
             self.state.original_grid = [row[:] for row in self.state.grid]
             self.state.start = tuple(data["start"])
             self.state.goal = tuple(data["goal"])
-            self.state.waypoints = data.get("waypoints", [])
+            self.state.waypoints = [tuple(w) for w in data.get("waypoints", [])]
+            self.state.history.clear()
+            self.state.touch()
             self.redraw()
-            self.canvas_view.canvas.configure(scrollregion=(0, 0, self.state.cols * self.canvas_view.cell_size, self.state.rows * self.canvas_view.cell_size))
         except Exception as e:
             messagebox.showerror("Load Error", str(e))
 
@@ -555,6 +1093,9 @@ class AStarApp:
             messagebox.showinfo("Exported", f"Path saved to {filepath}")
 
     def on_closing(self):
+        self.cancel_tasks()
+        self.cancel_replanner()
         if self.obstacle_animation_id:
             self.root.after_cancel(self.obstacle_animation_id)
+        self.db.close()
         self.root.destroy()
\ No newline at end of file
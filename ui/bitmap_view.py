@@ -0,0 +1,258 @@
+# ui/bitmap_view.py
+import tkinter as tk
+import numpy as np
+from ui.canvas_view import CanvasView
+
+# Zoom levels as (pixels per block, cells per block). Below one pixel per cell each block
+# shows a subsample of its cells (level of detail), with obstacles kept visible.
+ZOOM_LEVELS = ((1, 8), (1, 4), (1, 2), (1, 1), (2, 1), (4, 1), (8, 1), (14, 1), (28, 1), (40, 1))
+TILE_PX = 256
+MAX_TILES = 256   # cached tile images beyond this are dropped once off screen
+OVERLAY_ORDER = ("visited", "opened", "path", "current")
+
+def hex_rgb(color):
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+# Canvas backend for very large grids: cells and search overlays are rasterized into
+# PhotoImage tiles at the current zoom, and only tiles inside the visible scroll region
+# are rendered. Exposes the same drawing interface as CanvasView.
+class BitmapCanvasView(CanvasView):
+    def __init__(self, parent, theme, callbacks):
+        self.zoom = ZOOM_LEVELS.index((28, 1))
+        self.tiles = {}        # (tx, ty) -> (PhotoImage, canvas item)
+        self.stale = set()     # cached tiles whose pixels are out of date
+        self.base = None       # (rows, cols, 3) uint8 cell colours without overlays
+        self.rgb = None        # base with overlays composited
+        self.blocked = None    # (rows, cols) bool, for level-of-detail rendering
+        self.overlays = {tag: {} for tag in OVERLAY_ORDER}
+        super().__init__(parent, theme, callbacks)
+        self.cell_size = ZOOM_LEVELS[self.zoom][0] / ZOOM_LEVELS[self.zoom][1]
+
+    def create_widgets(self):
+        super().create_widgets()
+        self.scroll_x.configure(command=lambda *a: self.scrolled(self.canvas.xview, *a))
+        self.scroll_y.configure(command=lambda *a: self.scrolled(self.canvas.yview, *a))
+        self.canvas.bind("<Configure>", lambda e: self.schedule())
+        self.canvas.bind("<MouseWheel>", lambda e: self.on_wheel(e, 1 if e.delta > 0 else -1))
+        self.canvas.bind("<Button-4>", lambda e: self.on_wheel(e, 1))
+        self.canvas.bind("<Button-5>", lambda e: self.on_wheel(e, -1))
+
+    def scrolled(self, view, *args):
+        view(*args)
+        self.schedule()
+
+    def schedule(self):
+        if self.pending is None:
+            self.pending = self.canvas.after(self.FRAME_MS, self.flush)
+
+    def on_wheel(self, event, direction):
+        zoom = min(len(ZOOM_LEVELS) - 1, max(0, self.zoom + direction))
+        if zoom == self.zoom or self.scene is None: return
+        # Keep the cell under the cursor in place.
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        old = self.cell_size
+        self.zoom = zoom
+        self.cell_size = ZOOM_LEVELS[zoom][0] / ZOOM_LEVELS[zoom][1]
+        factor = self.cell_size / old
+        self.canvas.scale("path", 0, 0, factor, factor)
+        self.drop_tiles()
+        state = self.scene[0]
+        width, height = state.cols * self.cell_size, state.rows * self.cell_size
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+        if width > 0: self.canvas.xview_moveto(max(0.0, (x * factor - event.x) / width))
+        if height > 0: self.canvas.yview_moveto(max(0.0, (y * factor - event.y) / height))
+        self.canvas.delete("point")
+        self.schedule()
+
+    def drop_tiles(self, keep=()):
+        for key in [k for k in self.tiles if k not in keep]:
+            self.canvas.delete(self.tiles.pop(key)[1])
+        self.stale &= set(self.tiles)
+
+    def draw_grid(self, state, visited, opened, current, path, last_g_values, heatmap=None, dirty=None):
+        self.clear_overlays("visited", "opened", "current", "path")
+        self.scene = (state, visited, opened, current, path, heatmap)
+        if dirty is None:
+            self.full_repaint = True
+        else:
+            self.dirty.update(dirty)
+        for (r, c) in visited:
+            self.draw_overlay(r, c, "#2c3e50", tag="visited")
+        for (r, c) in opened:
+            if (r, c) not in visited:
+                self.draw_overlay(r, c, "#f1c40f", tag="opened")
+        if current:
+            self.draw_overlay(current[0], current[1], "#e74c3c", shape="diamond", tag="current")
+        for (r, c) in path or ():
+            self.draw_overlay(r, c, "#2ecc71", shape="circle", tag="path")
+        self.schedule()
+
+    def flush(self):
+        self.pending = None
+        if self.scene is None: return
+        state, heatmap = self.scene[0], self.scene[5]
+        rows, cols = state.rows, state.cols
+        if self.base is None or self.base.shape[:2] != (rows, cols):
+            self.base = np.zeros((rows, cols, 3), dtype=np.uint8)
+            self.drop_tiles()
+            self.canvas.configure(scrollregion=(0, 0, cols * self.cell_size, rows * self.cell_size))
+            self.full_repaint = True
+        if self.full_repaint:
+            self.base = self.cell_rgb(state, heatmap)
+            self.blocked = np.asarray(state.grid, dtype=np.float64).reshape(rows, cols) <= 0
+            self.rgb = self.base.copy()
+            for tag in OVERLAY_ORDER:
+                for (r, c), color in self.overlays[tag].items():
+                    if r < rows and c < cols:
+                        self.rgb[r, c] = color
+            self.stale = set(self.tiles)
+        elif self.dirty:
+            cells = [(r, c) for r, c in self.dirty if 0 <= r < rows and 0 <= c < cols]
+            if cells:
+                rs, cs = np.array(cells).T
+                self.base[rs, cs] = self.cell_rgb(state, heatmap, rs, cs)
+                self.blocked[rs, cs] = [state.grid[r][c] <= 0 for r, c in cells]
+                self.compose(cells)
+        self.full_repaint = False
+        self.dirty = set()
+
+        # Render only the tiles that intersect the viewport.
+        px, step = ZOOM_LEVELS[self.zoom]
+        span = max(1, TILE_PX // px) * step  # cells per tile edge
+        tile_px = span // step * px
+        x0, y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        x1 = x0 + max(1, self.canvas.winfo_width())
+        y1 = y0 + max(1, self.canvas.winfo_height())
+        visible = [(tx, ty)
+                   for ty in range(max(0, int(y0 // tile_px)), min(-(-rows // span), int(y1 // tile_px) + 1))
+                   for tx in range(max(0, int(x0 // tile_px)), min(-(-cols // span), int(x1 // tile_px) + 1))]
+        for key in visible:
+            if key not in self.tiles or key in self.stale:
+                self.render_tile(key, span, px, step, tile_px)
+        if len(self.tiles) > MAX_TILES:
+            self.drop_tiles(keep=set(visible))
+        self.canvas.tag_lower("tile")
+
+        self.canvas.delete("point")
+        self.draw_point(state.start, "#30D158", "S")
+        for i, wp in enumerate(state.waypoints):
+            self.draw_point(wp, "#FF9F0A", str(i+1))
+        self.draw_point(state.goal, "#0A84FF", "G")
+
+    def render_tile(self, key, span, px, step, tile_px):
+        tx, ty = key
+        r0, c0 = ty * span, tx * span
+        block = self.rgb[r0:r0 + span:step, c0:c0 + span:step]
+        if step > 1:
+            # Level of detail: a block with any obstacle shows as an obstacle.
+            rows, cols = self.blocked[r0:r0 + span, c0:c0 + span].shape
+            pad = np.zeros((-(-rows // step) * step, -(-cols // step) * step), dtype=bool)
+            pad[:rows, :cols] = self.blocked[r0:r0 + span, c0:c0 + span]
+            walls = pad.reshape(pad.shape[0] // step, step, pad.shape[1] // step, step).any(axis=(1, 3))
+            block = block.copy()
+            block[walls] = hex_rgb("#3A3A3C")
+        if px > 1:
+            block = np.repeat(np.repeat(block, px, axis=0), px, axis=1)
+            if px >= 8:
+                block[px - 1::px, :] = hex_rgb("#444444")
+                block[:, px - 1::px] = hex_rgb("#444444")
+        height, width = block.shape[:2]
+        data = b"P6 %d %d 255\n" % (width, height) + np.ascontiguousarray(block).tobytes()
+        photo = tk.PhotoImage(width=width, height=height, data=data, format="PPM")
+        if key in self.tiles:
+            self.canvas.itemconfig(self.tiles[key][1], image=photo)
+            self.tiles[key] = (photo, self.tiles[key][1])
+        else:
+            item = self.canvas.create_image(tx * tile_px, ty * tile_px, image=photo, anchor="nw", tags="tile")
+            self.tiles[key] = (photo, item)
+        self.stale.discard(key)
+
+    def cell_rgb(self, state, heatmap, rs=None, cs=None):
+        # Vectorized CanvasView.cell_color over every cell, or over the cells (rs, cs).
+        rows, cols = state.rows, state.cols
+        influence = None
+        heat = heatmap
+        if rs is None:
+            cost = np.asarray(state.grid, dtype=np.float64).reshape(rows, cols)
+            if state.influence_map:
+                influence = np.asarray(state.influence_map, dtype=np.float64)
+        else:
+            # A handful of dirty cells: read them straight from the lists.
+            cells = list(zip(rs.tolist(), cs.tolist()))
+            cost = np.array([state.grid[r][c] for r, c in cells], dtype=np.float64)
+            if state.influence_map:
+                influence = np.array([state.influence_map[r][c] for r, c in cells], dtype=np.float64)
+            heat = heatmap[rs, cs] if heatmap is not None else None
+        t = np.clip((cost + (influence if influence is not None else 0.0) - 1.0) / 4.0, None, 1.0)
+        out = np.stack([50 + t * 180, 200 - t * 150, np.full(t.shape, 50.0)], axis=-1)
+        if heatmap is not None:
+            finite = heatmap[np.isfinite(heatmap)]
+            heat_max = float(finite.max()) if finite.size else 0.0
+            with np.errstate(invalid='ignore'):
+                u = 1.0 - (heat / heat_max if heat_max > 0 else np.zeros(heat.shape))
+            shade = np.stack([40 + u * 60, 60 + u * 150, 120 + u * 135], axis=-1)
+            out = np.where(np.isfinite(heat)[..., None], shade, np.array(hex_rgb("#2C2C2E"), dtype=np.float64))
+        out[cost == 0] = hex_rgb("#3A3A3C")
+        if state.fov_enabled:
+            visible = state.visible_cells
+            if rs is None:
+                hidden = np.ones((rows, cols), dtype=bool)
+                for r, c in visible:
+                    hidden[r, c] = False
+            else:
+                hidden = np.array([(r, c) not in visible for r, c in zip(rs.tolist(), cs.tolist())], dtype=bool)
+            out[hidden] = hex_rgb("#1C1C1E")
+        return out.astype(np.uint8)
+
+    def compose(self, cells):
+        # Recompute displayed colours of cells from the base plus overlays, topmost last.
+        rows, cols = self.rgb.shape[:2]
+        cells = [(r, c) for r, c in cells if 0 <= r < rows and 0 <= c < cols]
+        for r, c in cells:
+            color = self.base[r, c]
+            for tag in OVERLAY_ORDER:
+                color = self.overlays[tag].get((r, c), color)
+            self.rgb[r, c] = color
+        self.mark(cells)
+
+    def mark(self, cells):
+        px, step = ZOOM_LEVELS[self.zoom]
+        span = max(1, TILE_PX // px) * step
+        for r, c in cells:
+            key = (c // span, r // span)
+            if key in self.tiles:
+                self.stale.add(key)
+        self.schedule()
+
+    def draw_overlay(self, r, c, color, shape="square", tag="path"):
+        # Before the first flush there is no raster yet; the full repaint composites these.
+        ready = self.rgb is not None and 0 <= r < self.rgb.shape[0] and 0 <= c < self.rgb.shape[1]
+        rgb = np.array(hex_rgb(color), dtype=np.uint16)
+        if shape == "square" and ready:
+            # The item renderer stipples squares; blend halfway instead.
+            rgb = (rgb + self.base[r, c]) // 2
+        rgb = rgb.astype(np.uint8)
+        self.overlays.setdefault(tag, {})[(r, c)] = rgb
+        if ready:
+            self.rgb[r, c] = rgb
+            self.mark([(r, c)])
+
+    def clear_overlays(self, *tags):
+        self.canvas.delete(*tags)
+        cells = []
+        for tag in tags:
+            cells.extend(self.overlays.get(tag, {}))
+            self.overlays[tag] = {}
+        if cells and self.rgb is not None:
+            self.compose(cells)
+
+    def draw_point(self, pos, color, label):
+        # Start/goal/waypoint markers stay canvas items, never smaller than 12 px.
+        r, c = pos
+        size = max(12, self.cell_size)
+        cx, cy = (c + 0.5) * self.cell_size, (r + 0.5) * self.cell_size
+        x1, y1, x2, y2 = cx - size / 2 + 4, cy - size / 2 + 4, cx + size / 2 - 4, cy + size / 2 - 4
+        self.canvas.create_oval(x1, y1, x2, y2, fill=color, outline="white", width=2, tags="point")
+        if self.cell_size >= 12:
+            font = ("SF Pro", 10, "bold" if label in "SG" else "normal")
+            self.canvas.create_text(cx, cy, text=label, fill="white", font=font, tags="point")
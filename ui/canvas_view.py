@@ -1,14 +1,22 @@
 # ui/canvas_view.py
 import tkinter as tk
 from tkinter import ttk
-from config import HEURISTIC_FUNCS
+import numpy as np
 
 class CanvasView:
+    FRAME_MS = 16  # redraw requests within one frame are batched into a single flush
     def __init__(self, parent, theme, callbacks):
         self.parent = parent
         self.theme = theme
         self.callbacks = callbacks
         self.cell_size = 28
+        self.items = []   # canvas item id per cell, r*cols+c
+        self.colors = []  # fill currently shown per cell
+        self.shape = None
+        self.dirty = set()
+        self.full_repaint = True
+        self.scene = None
+        self.pending = None
         self.create_widgets()
 
     def create_widgets(self):
@@ -23,6 +31,7 @@ class CanvasView:
         self.canvas.pack(side="left", fill="both", expand=True)
         self.canvas.bind("<Button-1>", self.on_click)
         self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", lambda e: self.callbacks["end_stroke"]())
         self.canvas.bind("<Button-3>", lambda e: self.on_click(e, is_right=True))
 
     def on_click(self, event, is_right=False):
@@ -35,40 +44,48 @@ class CanvasView:
     def on_drag(self, event):
         self.on_click(event, is_right=False)
 
-    def draw_grid(self, state, visited, opened, current, path, last_g_values):
-        self.canvas.delete("all")
+    def draw_grid(self, state, visited, opened, current, path, last_g_values, heatmap=None, dirty=None):
+        # Retained mode: cell rectangles are created once per grid shape and only
+        # recoloured when dirty. Calls within one frame coalesce into a single flush;
+        # dirty=None repaints every cell, a list repaints just those cells.
+        self.clear_overlays("visited", "opened", "current", "path")
+        self.scene = (state, visited, opened, current, path, heatmap)
+        if dirty is None:
+            self.full_repaint = True
+        else:
+            self.dirty.update(dirty)
+        if self.pending is None:
+            self.pending = self.canvas.after(self.FRAME_MS, self.flush)
+
+    def flush(self):
+        self.pending = None
+        state, visited, opened, current, path, heatmap = self.scene
         rows, cols = state.rows, state.cols
-        self.canvas.configure(scrollregion=(0, 0, cols * self.cell_size, rows * self.cell_size))
-        
-        # Precompute heuristic if needed (for future heatmap)
-        heuristic_cache = {}
-        if state.goal:
-            heuristic_func = HEURISTIC_FUNCS.get("Octile", lambda a,b: 0)
-            for r in range(rows):
-                for c in range(cols):
-                    heuristic_cache[(r, c)] = heuristic_func((r, c), state.goal)
+        if self.shape != (rows, cols, self.cell_size):
+            self.build_cells(rows, cols)
+        if self.full_repaint:
+            cells = ((r, c) for r in range(rows) for c in range(cols))
+        else:
+            cells = [(r, c) for r, c in self.dirty if 0 <= r < rows and 0 <= c < cols]
+        self.full_repaint = False
+        self.dirty = set()
 
-        for r in range(rows):
-            for c in range(cols):
-                if state.fov_enabled and (r, c) not in state.visible_cells:
-                    color = "#1C1C1E"
-                else:
-                    cost = state.grid[r][c]
-                    if cost == 0:
-                        color = "#3A3A3C"
-                    else:
-                        base_cost = cost
-                        if state.influence_map:
-                            base_cost += state.influence_map[r][c]
-                        t = min(1.0, (base_cost - 1.0) / 4.0)
-                        r_val = int(50 + t * 180)
-                        g_val = int(200 - t * 150)
-                        b_val = 50
-                        color = f"#{r_val:02x}{g_val:02x}{b_val:02x}"
-                x1, y1 = c * self.cell_size, r * self.cell_size
-                x2, y2 = x1 + self.cell_size, y1 + self.cell_size
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="#444444")
+        # Heatmap layer (distance field or h-table): cells shade from bright (near goal) to dark (far).
+        heat_max = 0.0
+        if heatmap is not None:
+            finite = heatmap[np.isfinite(heatmap)]
+            heat_max = float(finite.max()) if finite.size else 0.0
 
+        items, colors = self.items, self.colors
+        itemconfig = self.canvas.itemconfig
+        for r, c in cells:
+            color = self.cell_color(state, r, c, heatmap, heat_max)
+            i = r * cols + c
+            if colors[i] != color:
+                colors[i] = color
+                itemconfig(items[i], fill=color)
+
+        self.canvas.delete("point")
         self.draw_point(state.start, "#30D158", "S")
         for i, wp in enumerate(state.waypoints):
             self.draw_point(wp, "#FF9F0A", str(i+1))
@@ -76,12 +93,12 @@ class CanvasView:
 
         for (r, c) in visited:
             if not state.fov_enabled or (r, c) in state.visible_cells:
-                self.draw_overlay(r, c, "#2c3e50")
+                self.draw_overlay(r, c, "#2c3e50", tag="visited")
         for (r, c) in opened:
             if (r, c) not in visited and (not state.fov_enabled or (r, c) in state.visible_cells):
-                self.draw_overlay(r, c, "#f1c40f")
+                self.draw_overlay(r, c, "#f1c40f", tag="opened")
         if current and (not state.fov_enabled or current in state.visible_cells):
-            self.draw_overlay(current[0], current[1], "#e74c3c", shape="diamond")
+            self.draw_overlay(current[0], current[1], "#e74c3c", shape="diamond", tag="current")
         if path:
             for i, (r, c) in enumerate(path):
                 if not state.fov_enabled or (r, c) in state.visible_cells:
@@ -94,18 +111,55 @@ class CanvasView:
                                 pr * self.cell_size + self.cell_size//2,
                                 c * self.cell_size + self.cell_size//2,
                                 r * self.cell_size + self.cell_size//2,
-                                fill="#27ae60", width=3
+                                fill="#27ae60", width=3, tags="path"
                             )
 
+    def build_cells(self, rows, cols):
+        # One rectangle per cell, indexed r*cols+c; colours are filled in by flush().
+        self.canvas.delete("cell")
+        self.canvas.configure(scrollregion=(0, 0, cols * self.cell_size, rows * self.cell_size))
+        size = self.cell_size
+        create = self.canvas.create_rectangle
+        self.items = [create(c * size, r * size, c * size + size, r * size + size, outline="#444444", tags="cell")
+                      for r in range(rows) for c in range(cols)]
+        self.canvas.tag_lower("cell")
+        self.colors = [None] * (rows * cols)
+        self.shape = (rows, cols, self.cell_size)
+        self.full_repaint = True
+
+    def cell_color(self, state, r, c, heatmap, heat_max):
+        if state.fov_enabled and (r, c) not in state.visible_cells:
+            return "#1C1C1E"
+        cost = state.grid[r][c]
+        if cost == 0:
+            return "#3A3A3C"
+        if heatmap is not None:
+            d = heatmap[r, c]
+            if not np.isfinite(d):
+                return "#2C2C2E"
+            t = d / heat_max if heat_max > 0 else 0.0
+            return f"#{int(40 + (1 - t) * 60):02x}{int(60 + (1 - t) * 150):02x}{int(120 + (1 - t) * 135):02x}"
+        base_cost = cost
+        if state.influence_map:
+            base_cost += state.influence_map[r][c]
+        t = min(1.0, (base_cost - 1.0) / 4.0)
+        r_val = int(50 + t * 180)
+        g_val = int(200 - t * 150)
+        b_val = 50
+        return f"#{r_val:02x}{g_val:02x}{b_val:02x}"
+
+    def clear_overlays(self, *tags):
+        self.canvas.delete(*tags)
+
     def draw_point(self, pos, color, label):
         r, c = pos
         x1 = c * self.cell_size + 4
         y1 = r * self.cell_size + 4
         x2 = x1 + self.cell_size - 8
         y2 = y1 + self.cell_size - 8
-        self.canvas.create_oval(x1, y1, x2, y2, fill=color, outline="white", width=2)
+        self.canvas.create_oval(x1, y1, x2, y2, fill=color, outline="white", width=2, tags="point")
         font = ("SF Pro", 10, "bold" if label in "SG" else "normal")
-        self.canvas.create_text((x1+x2)//2, (y1+y2)//2, text=label, fill="white", font=font)
+        self.canvas.create_text((x1+x2)//2, (y1+y2)//2, text=label, fill="white", font=font, tags="point")
 
     def draw_overlay(self, r, c, color, shape="square", tag="path"):
         x1 = c * self.cell_size
@@ -113,9 +167,9 @@ class CanvasView:
         x2 = x1 + self.cell_size
         y2 = y1 + self.cell_size
         if shape == "square":
-            self.canvas.create_rectangle(x1+2, y1+2, x2-2, y2-2, fill=color, stipple="gray50")
+            self.canvas.create_rectangle(x1+2, y1+2, x2-2, y2-2, fill=color, stipple="gray50", tags=tag)
         elif shape == "diamond":
             cx, cy = (x1+x2)//2, (y1+y2)//2
-            self.canvas.create_polygon(cx, y1+6, x2-6, cy, cx, y2-6, x1+6, cy, fill=color, outline="white", width=1)
+            self.canvas.create_polygon(cx, y1+6, x2-6, cy, cx, y2-6, x1+6, cy, fill=color, outline="white", width=1, tags=tag)
         elif shape == "circle":
-            self.canvas.create_oval(x1+5, y1+5, x2-5, y2-5, fill=color, outline="white", width=1)
\ No newline at end of file
+            self.canvas.create_oval(x1+5, y1+5, x2-5, y2-5, fill=color, outline="white", width=1, tags=tag)
\ No newline at end of file
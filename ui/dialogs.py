@@ -1,22 +1,57 @@
 # ui/dialogs.py
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
-import json
 from core.database import MapDatabase
 
 class Dialogs:
+    PAGE_SIZE = 100
+
     @staticmethod
-    def open_map_db(root, callbacks):
-        db = MapDatabase()
+    def open_map_db(root, callbacks, db):
+        # Browses the catalog one keyset page at a time, filtered by tag, minimum rating
+        # and name, so it opens instantly however many maps are stored.
         db_window = tk.Toplevel(root)
         db_window.title("Map Database")
-        db_window.geometry("600x400")
-        listbox = tk.Listbox(db_window, width=80, height=20)
-        listbox.pack(pady=10, padx=10)
-        maps = db.load_maps()
-        for map_id, name, tags, rating in maps:
-            tag_list = json.loads(tags)
-            listbox.insert(tk.END, f"[{rating}★] {name} - Tags: {', '.join(tag_list) if tag_list else 'none'}")
+        db_window.geometry("640x480")
+        filters = ttk.Frame(db_window)
+        filters.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(filters, text="Name:").pack(side="left")
+        name_var = tk.StringVar()
+        ttk.Entry(filters, textvariable=name_var, width=14).pack(side="left", padx=(2, 8))
+        ttk.Label(filters, text="Tag:").pack(side="left")
+        tag_var = tk.StringVar()
+        ttk.Combobox(filters, textvariable=tag_var, values=[""] + db.list_tags(), width=12).pack(side="left", padx=(2, 8))
+        ttk.Label(filters, text="Min ★:").pack(side="left")
+        rating_var = tk.IntVar(value=0)
+        ttk.Spinbox(filters, from_=0, to=5, textvariable=rating_var, width=3).pack(side="left", padx=(2, 8))
+        order_var = tk.StringVar(value="created")
+        ttk.Combobox(filters, textvariable=order_var, values=["created", "rating"], state="readonly", width=8).pack(side="left")
+        listbox = tk.Listbox(db_window, width=80, height=18)
+        listbox.pack(pady=10, padx=10, fill="both", expand=True)
+        page_var = tk.StringVar()
+        maps = []
+        cursors = [None]  # `after` cursor of each page visited so far
+        current = [0]     # index of the page shown
+
+        def show(page):
+            nonlocal maps
+            try:
+                min_rating = int(rating_var.get())
+            except (tk.TclError, ValueError):
+                min_rating = 0
+            del cursors[page + 1:]
+            maps = db.query_maps(tag=tag_var.get(), min_rating=min_rating, name=name_var.get(),
+                                 order=order_var.get(), limit=Dialogs.PAGE_SIZE, after=cursors[page])
+            if len(maps) == Dialogs.PAGE_SIZE:
+                cursors.append(MapDatabase.cursor(maps[-1], order_var.get()))
+            listbox.delete(0, tk.END)
+            for map_id, name, tag_list, rating, created in maps:
+                listbox.insert(tk.END, f"[{rating}★] {name} - Tags: {', '.join(tag_list) if tag_list else 'none'}")
+            page_var.set(f"Page {page + 1}")
+            prev_button.configure(state="normal" if page > 0 else "disabled")
+            next_button.configure(state="normal" if len(cursors) > page + 1 else "disabled")
+            current[0] = page
+
         def load_selected():
             selection = listbox.curselection()
             if selection:
@@ -25,8 +60,19 @@ class Dialogs:
                 if map_data:
                     callbacks["load_map_data"](map_data)
                     db_window.destroy()
+
+        ttk.Button(filters, text="Search", command=lambda: show(0)).pack(side="left", padx=(8, 0))
+        nav = ttk.Frame(db_window)
+        nav.pack(pady=5)
+        prev_button = ttk.Button(nav, text="◀ Prev", command=lambda: show(current[0] - 1))
+        prev_button.pack(side="left")
+        ttk.Label(nav, textvariable=page_var, width=10, anchor="center").pack(side="left", padx=8)
+        next_button = ttk.Button(nav, text="Next ▶", command=lambda: show(current[0] + 1))
+        next_button.pack(side="left")
         ttk.Button(db_window, text="Load Selected", command=load_selected).pack(pady=5)
         ttk.Button(db_window, text="Close", command=db_window.destroy).pack(pady=5)
+        listbox.bind("<Double-Button-1>", lambda e: load_selected())
+        show(0)
 
     @staticmethod
     def save_map_dialog():
@@ -0,0 +1,64 @@
+# ui/scheduler.py
+import time
+
+BASE_RATE = 50.0  # expansions per second at speed 1x (one per 20 ms, the old fixed pace)
+
+# Paces an animated search: each frame applies as many events as the target rate has
+# made due since the search started, but never runs past the frame's time budget, so a
+# large search animates quickly without starving the Tk event loop.
+class FrameScheduler:
+    STALL = -1  # step() result: nothing to apply yet, end this frame early
+
+    def __init__(self, frame_ms=16, budget_ms=10, speed=1.0, max_rate=None, clock=time.perf_counter):
+        self.frame_ms = frame_ms
+        self.budget = budget_ms / 1000.0
+        self.speed = speed
+        self.max_rate = max_rate  # expansions per second cap; None for no cap
+        self.clock = clock
+        self.start = None
+        self.done = 0
+
+    def rate(self):
+        rate = BASE_RATE * self.speed
+        if self.max_rate:
+            rate = min(rate, self.max_rate)
+        return max(rate, 1.0)
+
+    def begin(self):
+        self.start = self.clock()
+        self.done = 0
+
+    def run_frame(self, step):
+        # Calls step() until this frame's quota or time budget is used up; step returns
+        # the expansions it performed, STALL if it has nothing yet, or None once the
+        # search has finished.
+        now = self.clock()
+        if self.start is None:
+            self.start = now
+        due = max(1, int(self.rate() * (now - self.start)) - self.done)
+        deadline = now + self.budget
+        while due > 0:
+            expanded = step()
+            if expanded is None:
+                return False
+            if expanded == self.STALL:
+                break
+            self.done += expanded
+            due -= expanded
+            if self.clock() >= deadline:
+                # Fell behind: restart pacing from here rather than bursting to catch up.
+                self.start = self.clock() - self.done / self.rate()
+                break
+        return True
+
+    def set_speed(self, speed):
+        self.rebase(lambda: setattr(self, 'speed', speed))
+
+    def set_max_rate(self, max_rate):
+        self.rebase(lambda: setattr(self, 'max_rate', max_rate or None))
+
+    def rebase(self, change):
+        # Keep the current position when the rate changes mid-search.
+        change()
+        if self.start is not None:
+            self.start = self.clock() - self.done / self.rate()
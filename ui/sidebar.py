@@ -4,9 +4,10 @@ from tkinter import ttk
 from config import ALGORITHMS, HEURISTICS
 
 class Sidebar:
-    def __init__(self, parent, callbacks):
+    def __init__(self, parent, callbacks, max_grid=100):
         self.frame = ttk.Frame(parent, width=280)
         self.callbacks = callbacks
+        self.max_grid = max_grid
         self.create_widgets()
 
     def create_widgets(self):
@@ -43,6 +44,20 @@ class Sidebar:
         self.corner_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(self.frame, text="Prevent Corner Cutting", variable=self.corner_var,
                         command=lambda: self.callbacks["set_corner_cut"](self.corner_var.get())).pack(anchor="w", padx=20, pady=2)
+        self.optimize_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.frame, text="Optimize Waypoint Order (Dijkstra legs)", variable=self.optimize_var,
+                        command=lambda: self.callbacks["set_optimize_waypoints"](self.optimize_var.get())).pack(anchor="w", padx=20, pady=2)
+
+        anim_frame = ttk.Frame(self.frame)
+        anim_frame.pack(fill="x", padx=20, pady=2)
+        ttk.Label(anim_frame, text="Speed ×").pack(side="left")
+        self.speed_var = tk.DoubleVar(value=1.0)
+        ttk.Spinbox(anim_frame, from_=0.25, to=1000.0, increment=0.25, textvariable=self.speed_var, width=6).pack(side="left", padx=5)
+        self.speed_var.trace("w", lambda *a: self.callbacks["set_speed"](self.speed_var.get()))
+        ttk.Label(anim_frame, text="Max exp/s").pack(side="left")
+        self.max_rate_var = tk.IntVar(value=0)
+        ttk.Spinbox(anim_frame, from_=0, to=1000000, increment=100, textvariable=self.max_rate_var, width=8).pack(side="right")
+        self.max_rate_var.trace("w", lambda *a: self.callbacks["set_max_rate"](self.max_rate_var.get()))
 
         fov_frame = ttk.Frame(self.frame)
         fov_frame.pack(fill="x", padx=20, pady=2)
@@ -58,8 +73,8 @@ class Sidebar:
         size_frame.pack(fill="x", padx=20)
         self.rows_var = tk.IntVar(value=33)
         self.cols_var = tk.IntVar(value=52)
-        ttk.Spinbox(size_frame, from_=5, to=100, textvariable=self.rows_var, width=5).pack(side="left")
-        ttk.Spinbox(size_frame, from_=5, to=100, textvariable=self.cols_var, width=5).pack(side="left", padx=5)
+        ttk.Spinbox(size_frame, from_=5, to=self.max_grid, textvariable=self.rows_var, width=5).pack(side="left")
+        ttk.Spinbox(size_frame, from_=5, to=self.max_grid, textvariable=self.cols_var, width=5).pack(side="left", padx=5)
         ttk.Button(self.frame, text="Resize Grid", command=lambda: self.callbacks["resize_grid"](self.rows_var.get(), self.cols_var.get())).pack(fill="x", padx=20, pady=5)
 
         actions = [
@@ -69,6 +84,7 @@ class Sidebar:
             ("🧩 Generate Maze", self.callbacks["generate_maze"]),
             ("➕ Add Moving Obstacle", self.callbacks["add_moving_obstacle"]),
             ("🌡️ Set Influence Map", self.callbacks["set_influence_map"]),
+            ("🗺️ Heatmap: Distance / h / Off", self.callbacks["cycle_heatmap"]),
             ("💾 Save Map", self.callbacks["save_map"]),
             ("📂 Load Map", self.callbacks["load_map"]),
             ("🗃️ Map Database", self.callbacks["open_db"]),